@@ -0,0 +1,4 @@
+from django.contrib import admin
+from .models import Tournament, Game, MatchEvent, LineupEntry
+
+admin.site.register([Tournament, Game, MatchEvent, LineupEntry])
@@ -0,0 +1,225 @@
+"""Bulk upsert of scraped championat.asia data into the championat models.
+
+Takes the records the scrapers write (scrapping/futbol_match.py calendar
+games, scrapping/futbol_match_details.py match details), from .json dumps
+or JSON Lines files, and upserts them batch by batch with
+bulk_create(update_conflicts=True): ingesting the same files again updates
+rows in place instead of duplicating them.
+"""
+import gzip
+import json
+import re
+import time
+from collections import Counter, defaultdict
+from datetime import date
+
+from django.db import transaction
+
+from .models import Tournament, Game, MatchEvent, LineupEntry
+
+
+GAME_FIELDS = ['tournament', 'date', 'time', 'home_team', 'away_team', 'home_score', 'away_score', 'status',
+               'home_logo', 'away_logo', 'link', 'updated_at']
+EVENT_FIELDS = ['half', 'minute', 'added_time', 'event_type', 'team_side', 'player_name', 'assist', 'player_out',
+                'score']
+LINEUP_FIELDS = ['role', 'shirt_number', 'photo_url', 'position_group', 'event_icons']
+
+_EXT_ID_RE = re.compile(r'/fixture/(\d+)')
+_MINUTE_RE = re.compile(r'^\s*(\d+)\s*(?:\+\s*(\d+))?')
+_SCORE_RE = re.compile(r'^\s*(\d+)\s*\D+\s*(\d+)\s*$')
+
+
+def ext_id_from_link(link):
+    """`.../game-center/fixture/19438666` -> '19438666'"""
+    match = _EXT_ID_RE.search(link or '')
+    return match.group(1) if match else None
+
+
+def split_minute(minute):
+    """`45+2` -> (45, 2), `67` -> (67, None), `` -> (None, None)"""
+    match = _MINUTE_RE.match(minute or '')
+    if not match:
+        return None, None
+    return int(match.group(1)), int(match.group(2)) if match.group(2) else None
+
+
+def split_score(score):
+    """`2 : 1` -> (2, 1); not played yet -> (None, None)"""
+    match = _SCORE_RE.match(score or '')
+    if not match:
+        return None, None
+    return int(match.group(1)), int(match.group(2))
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def int_or_none(value):
+    value = (value or '').strip()
+    return int(value) if value.isdigit() else None
+
+
+def read_records(path):
+    """Records of a .json dump (a list or one match) or a JSON Lines file (.jsonl, .jsonl.gz)"""
+    if path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        yield from data if isinstance(data, list) else [data]
+        return
+
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class Ingestor:
+    """Collects records and upserts them every `batch_size` records, in one transaction per batch"""
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.rows = Counter()
+        self.seconds = Counter()
+        self.skipped = 0
+        # Keyed by ext_id: ON CONFLICT DO UPDATE may not touch a row twice in one statement
+        self._games = {}
+        self._matches = {}
+        self._tournaments = {}
+
+    def add(self, record):
+        """A match_data dict (has `events`) or a calendar game"""
+        if 'events' in record:
+            self._matches[str(record['ext_id'])] = record
+        else:
+            ext_id = ext_id_from_link(record.get('link'))
+            if ext_id is None:
+                # No fixture page, nothing can refer to it
+                self.skipped += 1
+                return
+            self._games[ext_id] = record
+        if len(self._games) + len(self._matches) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        with transaction.atomic():
+            if self._games:
+                self._upsert_games(self._games)
+            if self._matches:
+                self._upsert_matches(self._matches)
+        self._games = {}
+        self._matches = {}
+
+    def _bulk_create(self, model, objs, **kwargs):
+        started = time.perf_counter()
+        model.objects.bulk_create(objs, batch_size=self.batch_size, **kwargs)
+        self.seconds[model.__name__] += time.perf_counter() - started
+        self.rows[model.__name__] += len(objs)
+
+    def _tournament_ids(self, names):
+        new = {name for name in names if name and name not in self._tournaments}
+        if new:
+            self._bulk_create(Tournament, [Tournament(name=name) for name in new], ignore_conflicts=True)
+            self._tournaments.update(Tournament.objects.filter(name__in=new).values_list('name', 'id'))
+        return self._tournaments
+
+    def _upsert_games(self, games):
+        tournaments = self._tournament_ids({game.get('tournament') for game in games.values()})
+        objs = []
+        for ext_id, game in games.items():
+            home_score, away_score = split_score(game.get('score'))
+            objs.append(Game(
+                ext_id=ext_id,
+                tournament_id=tournaments.get(game.get('tournament')),
+                date=parse_date(game.get('date')),
+                time=game.get('time') or '',
+                home_team=game.get('home_team') or '',
+                away_team=game.get('away_team') or '',
+                home_score=home_score,
+                away_score=away_score,
+                status=(game.get('status') or {}).get('type') or '',
+                home_logo=game.get('home_logo') or '',
+                away_logo=game.get('away_logo') or '',
+                link=game.get('link') or '',
+            ))
+        self._bulk_create(Game, objs, update_conflicts=True, unique_fields=['ext_id'], update_fields=GAME_FIELDS)
+
+    def _game_ids(self, ext_ids):
+        """Game ids by ext_id; matches whose calendar day was not ingested get a bare Game row"""
+        ids = dict(Game.objects.filter(ext_id__in=ext_ids).values_list('ext_id', 'id'))
+        missing = [ext_id for ext_id in ext_ids if ext_id not in ids]
+        if missing:
+            self._bulk_create(Game, [Game(ext_id=ext_id) for ext_id in missing], ignore_conflicts=True)
+            ids.update(Game.objects.filter(ext_id__in=missing).values_list('ext_id', 'id'))
+        return ids
+
+    def _upsert_matches(self, matches):
+        game_ids = self._game_ids(list(matches))
+        events, lineups = [], {}
+        for ext_id, match_data in matches.items():
+            game_id = game_ids[ext_id]
+            for seq, event in enumerate(match_data.get('events') or []):
+                minute, added_time = split_minute(event.get('minute'))
+                events.append(MatchEvent(
+                    game_id=game_id,
+                    seq=seq,
+                    half=event.get('half') or '',
+                    minute=minute,
+                    added_time=added_time,
+                    event_type=event.get('event_type') or '',
+                    team_side=event.get('team_side') or '',
+                    player_name=event.get('player_name') or '',
+                    assist=event.get('assist') or '',
+                    player_out=event.get('player_out') or '',
+                    score=event.get('score') or '',
+                ))
+
+            for team_key, team_side in (('home_team', 'home'), ('away_team', 'away')):
+                team = match_data.get(team_key) or {}
+                for role in (LineupEntry.STARTING, LineupEntry.SUBSTITUTE):
+                    for player in team.get(role) or []:
+                        if not player.get('player_name'):
+                            continue
+                        lineups[(game_id, team_side, player['player_name'])] = LineupEntry(
+                            game_id=game_id,
+                            team_side=team_side,
+                            role=role,
+                            player_name=player['player_name'],
+                            shirt_number=int_or_none(player.get('shirt_number')),
+                            photo_url=player.get('photo_url') or '',
+                            position_group=player.get('position_group') or '',
+                            event_icons=player.get('event_icons') or [],
+                        )
+                if team.get('coach'):
+                    lineups[(game_id, team_side, team['coach'])] = LineupEntry(
+                        game_id=game_id, team_side=team_side, role=LineupEntry.COACH, player_name=team['coach'])
+
+        self._bulk_create(MatchEvent, events, update_conflicts=True, unique_fields=['game', 'seq'],
+                          update_fields=EVENT_FIELDS)
+        self._bulk_create(LineupEntry, list(lineups.values()), update_conflicts=True,
+                          unique_fields=['game', 'team_side', 'player_name'], update_fields=LINEUP_FIELDS)
+
+        # Rows a re-scrape no longer has (a cancelled goal, a corrected name). A record without
+        # events or lineups is a failed or early fetch, not a correction: what is stored stays
+        # One delete per event count: an OR of per-game conditions outgrows SQLite's expression depth
+        games_by_count = defaultdict(list)
+        for game_id, count in Counter(event.game_id for event in events).items():
+            games_by_count[count].append(game_id)
+        for count, game_ids in games_by_count.items():
+            MatchEvent.objects.filter(game_id__in=game_ids, seq__gte=count).delete()
+        lineup_games = {game_id for game_id, team_side, player_name in lineups}
+        stale_lineups = [pk for pk, game_id, team_side, player_name in LineupEntry.objects.filter(
+            game_id__in=lineup_games).values_list('pk', 'game', 'team_side', 'player_name')
+            if (game_id, team_side, player_name) not in lineups]
+        if stale_lineups:
+            LineupEntry.objects.filter(pk__in=stale_lineups).delete()
+
+    def report(self):
+        """(model, rows, seconds, rows/sec) per model written to"""
+        return [(name, self.rows[name], self.seconds[name],
+                 self.rows[name] / self.seconds[name] if self.seconds[name] else 0.0)
+                for name in self.rows]
@@ -0,0 +1,50 @@
+import copy
+import time
+
+from django.core.management.base import BaseCommand
+
+from championat.ingest import Ingestor, read_records
+
+
+class Command(BaseCommand):
+    help = ("Benchmark: rows/sec of ingest_matches over N synthetic games and match details, cloned from "
+            "scraped sample files; the second pass re-upserts the same rows")
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help="calendar and match detail dumps to clone")
+        parser.add_argument('-n', type=int, default=5000, help="games (each with its match details)")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def synthetic(self, files, n):
+        games, matches = [], []
+        for path in files:
+            for record in read_records(path):
+                (matches if 'events' in record else games).append(record)
+        games = [game for game in games if game.get('link')]
+        if not games or not matches:
+            raise SystemExit("Need both calendar games and match details to clone")
+
+        for i in range(n):
+            ext_id = str(90_000_000 + i)
+            game = dict(games[i % len(games)], link=f'https://championat.asia/oz/game-center/fixture/{ext_id}',
+                        tournament=f"{games[i % len(games)]['tournament']} {i % 40}")
+            match_data = copy.deepcopy(matches[i % len(matches)])
+            match_data['ext_id'] = ext_id
+            yield game
+            yield match_data
+
+    def handle(self, *args, **options):
+        records = list(self.synthetic(options['files'], options['n']))
+        for label in ('insert', 'upsert'):
+            ingestor = Ingestor(batch_size=options['batch_size'])
+            started = time.perf_counter()
+            for record in records:
+                ingestor.add(record)
+            ingestor.flush()
+            elapsed = time.perf_counter() - started
+
+            self.stdout.write(f"\n{label}")
+            for name, rows, seconds, rate in ingestor.report():
+                self.stdout.write(f"  {name:<12}{rows:>10} rows {seconds:>8.2f}s {rate:>10.0f} rows/s")
+            total = sum(ingestor.rows.values())
+            self.stdout.write(f"  {total} rows in {elapsed:.2f}s ({total / elapsed:.0f} rows/s)")
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from championat.ingest import Ingestor, read_records
+
+
+class Command(BaseCommand):
+    help = "Upsert scraped calendar games and match details (.json, .jsonl, .jsonl.gz) into the championat tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+')
+        parser.add_argument('--batch-size', type=int, default=1000, help="records per bulk upsert transaction")
+
+    def handle(self, *args, **options):
+        ingestor = Ingestor(batch_size=options['batch_size'])
+        started = time.perf_counter()
+        for path in options['files']:
+            for record in read_records(path):
+                ingestor.add(record)
+        ingestor.flush()
+        elapsed = time.perf_counter() - started
+
+        total = 0
+        for name, rows, seconds, rate in ingestor.report():
+            total += rows
+            self.stdout.write(f"{name:<12}{rows:>10} rows {seconds:>8.2f}s {rate:>10.0f} rows/s")
+        if ingestor.skipped:
+            self.stdout.write(f"Skipped {ingestor.skipped} games without a fixture link")
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} rows in {elapsed:.2f}s ({total / elapsed if elapsed else 0:.0f} rows/s)"))
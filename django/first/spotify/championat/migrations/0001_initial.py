@@ -0,0 +1,92 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tournament',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=150, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Game',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ext_id', models.CharField(max_length=20, unique=True)),
+                ('date', models.DateField(blank=True, null=True)),
+                ('time', models.CharField(blank=True, max_length=10)),
+                ('home_team', models.CharField(blank=True, max_length=150)),
+                ('away_team', models.CharField(blank=True, max_length=150)),
+                ('home_score', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('away_score', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('status', models.CharField(blank=True, choices=[('finished', 'Tugagan'), ('cancelled', 'Bekor qilingan'), ('live', 'Davom etmoqda'), ('notstarted', 'Boshlanmagan')], max_length=10)),
+                ('home_logo', models.URLField(blank=True)),
+                ('away_logo', models.URLField(blank=True)),
+                ('link', models.URLField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tournament', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='games', to='championat.tournament')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LineupEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('team_side', models.CharField(max_length=4)),
+                ('role', models.CharField(choices=[('starting_lineup', 'Asosiy tarkib'), ('substitutes', 'Zaxira'), ('coach', 'Murabbiy')], max_length=20)),
+                ('player_name', models.CharField(max_length=150)),
+                ('shirt_number', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('photo_url', models.URLField(blank=True)),
+                ('position_group', models.CharField(blank=True, max_length=30)),
+                ('event_icons', models.JSONField(blank=True, default=list)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lineups', to='championat.game')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('game', 'team_side', 'player_name'), name='lineup_entry_player_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MatchEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveSmallIntegerField()),
+                ('half', models.CharField(blank=True, max_length=20)),
+                ('minute', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('added_time', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('event_type', models.CharField(max_length=30)),
+                ('team_side', models.CharField(blank=True, max_length=4)),
+                ('player_name', models.CharField(blank=True, max_length=150)),
+                ('assist', models.CharField(blank=True, max_length=150)),
+                ('player_out', models.CharField(blank=True, max_length=150)),
+                ('score', models.CharField(blank=True, max_length=10)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='championat.game')),
+            ],
+            options={
+                'ordering': ['game', 'seq'],
+                'indexes': [models.Index(fields=['player_name'], name='match_event_player_idx')],
+                'constraints': [models.UniqueConstraint(fields=('game', 'seq'), name='match_event_game_seq_uniq')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['date'], name='game_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['status', 'date'], name='game_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['tournament', 'date'], name='game_tournament_date_idx'),
+        ),
+    ]
@@ -0,0 +1,4 @@
+from .tournament import Tournament
+from .game import Game
+from .match_event import MatchEvent
+from .lineup_entry import LineupEntry
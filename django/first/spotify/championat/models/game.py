@@ -0,0 +1,41 @@
+from django.db import models
+
+class Game(models.Model):
+    """A calendar game (OptimizedMatchParser), keyed by the site's fixture ext_id"""
+    FINISHED = "finished"
+    CANCELLED = "cancelled"
+    LIVE = "live"
+    NOT_STARTED = "notstarted"
+
+    STATUS = [
+        (FINISHED, "Tugagan"),
+        (CANCELLED, "Bekor qilingan"),
+        (LIVE, "Davom etmoqda"),
+        (NOT_STARTED, "Boshlanmagan"),
+    ]
+
+    ext_id = models.CharField(max_length=20, unique=True)
+    # Null while only the match details were ingested, not its calendar day
+    tournament = models.ForeignKey('championat.Tournament', on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='games')
+    date = models.DateField(null=True, blank=True)
+    time = models.CharField(max_length=10, blank=True)
+    home_team = models.CharField(max_length=150, blank=True)
+    away_team = models.CharField(max_length=150, blank=True)
+    home_score = models.PositiveSmallIntegerField(null=True, blank=True)
+    away_score = models.PositiveSmallIntegerField(null=True, blank=True)
+    status = models.CharField(choices=STATUS, max_length=10, blank=True)
+    home_logo = models.URLField(blank=True)
+    away_logo = models.URLField(blank=True)
+    link = models.URLField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date'], name='game_date_idx'),
+            models.Index(fields=['status', 'date'], name='game_status_date_idx'),
+            models.Index(fields=['tournament', 'date'], name='game_tournament_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.home_team} - {self.away_team} ({self.ext_id})"
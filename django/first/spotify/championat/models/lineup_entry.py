@@ -0,0 +1,26 @@
+from django.db import models
+
+class LineupEntry(models.Model):
+    STARTING = "starting_lineup"
+    SUBSTITUTE = "substitutes"
+    COACH = "coach"
+
+    ROLES = [
+        (STARTING, "Asosiy tarkib"),
+        (SUBSTITUTE, "Zaxira"),
+        (COACH, "Murabbiy"),
+    ]
+
+    game = models.ForeignKey('championat.Game', on_delete=models.CASCADE, related_name='lineups')
+    team_side = models.CharField(max_length=4)
+    role = models.CharField(choices=ROLES, max_length=20)
+    player_name = models.CharField(max_length=150)
+    shirt_number = models.PositiveSmallIntegerField(null=True, blank=True)
+    photo_url = models.URLField(blank=True)
+    position_group = models.CharField(max_length=30, blank=True)
+    event_icons = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['game', 'team_side', 'player_name'], name='lineup_entry_player_uniq'),
+        ]
@@ -0,0 +1,24 @@
+from django.db import models
+
+class MatchEvent(models.Model):
+    """One row of a match's events (MatchDetailParser), in page order"""
+    game = models.ForeignKey('championat.Game', on_delete=models.CASCADE, related_name='events')
+    seq = models.PositiveSmallIntegerField()
+    half = models.CharField(max_length=20, blank=True)
+    minute = models.PositiveSmallIntegerField(null=True, blank=True)
+    added_time = models.PositiveSmallIntegerField(null=True, blank=True)
+    event_type = models.CharField(max_length=30)
+    team_side = models.CharField(max_length=4, blank=True)
+    player_name = models.CharField(max_length=150, blank=True)
+    assist = models.CharField(max_length=150, blank=True)
+    player_out = models.CharField(max_length=150, blank=True)
+    score = models.CharField(max_length=10, blank=True)
+
+    class Meta:
+        ordering = ['game', 'seq']
+        constraints = [
+            models.UniqueConstraint(fields=['game', 'seq'], name='match_event_game_seq_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['player_name'], name='match_event_player_idx'),
+        ]
@@ -0,0 +1,7 @@
+from django.db import models
+
+class Tournament(models.Model):
+    name = models.CharField(max_length=150, unique=True)
+
+    def __str__(self):
+        return self.name
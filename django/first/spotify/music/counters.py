@@ -0,0 +1,235 @@
+"""Buffered play counter for Song.listened.
+
+`SongViewSet.listen` used to read the song, bump `listened` and save the
+whole row: two queries per play, and concurrent plays of one song
+overwrote each other's increment. Here a play is appended to an in-process
+buffer and a journal file. A background thread periodically applies the
+totals as `listened = listened + n` updates, one statement per distinct n.
+
+The journal makes the buffer crash safe. Every process writes its own
+`plays-<batch>.journal` and holds an flock on it. At flush time the file
+is renamed to `.flushing`, its totals are applied, and the file is deleted.
+The same transaction inserts a PlayCountFlush row named after the batch.
+When a counter starts, it replays the files no live process holds a lock
+on, such as after a crash or a kill -9. If the PlayCountFlush row for a
+file already exists, that file was applied and is only deleted, so plays
+are counted exactly once.
+
+Settings (all optional):
+
+    PLAY_COUNTER = {
+        'FLUSH_INTERVAL': 2.0,      # seconds between flushes
+        'MAX_PENDING': 5000,        # distinct songs buffered before an early flush
+        'JOURNAL_DIR': BASE_DIR / 'play_journal',
+        'FSYNC': False,             # fsync every play (survives power loss, not just crashes)
+    }
+
+Song.listened (and the `top` listing) lags behind by up to FLUSH_INTERVAL.
+"""
+import atexit
+import logging
+import os
+import threading
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.db import Error, close_old_connections, transaction
+from django.db.models import F
+
+from music.models import Song, PlayCountFlush
+
+try:
+    import fcntl
+except ImportError:
+    # No flock (Windows): every journal in the directory looks abandoned, run a single process
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'FLUSH_INTERVAL': 2.0,
+    'MAX_PENDING': 5000,
+    'JOURNAL_DIR': Path(settings.BASE_DIR) / 'play_journal',
+    'FSYNC': False,
+}
+
+
+def _lock(f):
+    """flock `f` without waiting; False if another process holds it"""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def read_journal(f):
+    """Per-song totals of a journal: one `song_id` or `song_id count` line per entry"""
+    counts = Counter()
+    for line in f:
+        parts = line.split()
+        # A torn last line from a crash mid-write is skipped
+        if parts and line.endswith('\n'):
+            counts[int(parts[0])] += int(parts[1]) if len(parts) > 1 else 1
+    return counts
+
+
+def apply_counts(counts, batch):
+    """listened += n for every song, and the batch's PlayCountFlush marker, in one transaction"""
+    by_count = defaultdict(list)
+    for song_id, n in counts.items():
+        by_count[n].append(song_id)
+    with transaction.atomic():
+        PlayCountFlush.objects.create(batch=batch)
+        # Row locks in pk order first: two processes flushing overlapping songs cannot deadlock
+        list(Song.objects.select_for_update().filter(pk__in=list(counts)).order_by('pk').values_list('pk'))
+        for n, song_ids in by_count.items():
+            Song.objects.filter(pk__in=song_ids).update(listened=F('listened') + n)
+
+
+class PlayCounter:
+    def __init__(self, journal_dir, flush_interval=2.0, max_pending=5000, fsync=False):
+        self.journal_dir = Path(journal_dir)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.fsync = fsync
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # One flush at a time, so flush() from atexit waits for the thread's
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._pending = Counter()
+        self._journal = self._open_journal()
+        self._thread = threading.Thread(target=self._run, name='play-counter', daemon=True)
+        self._thread.start()
+
+    def _open_journal(self):
+        self._batch = uuid.uuid4().hex
+        journal = open(self.journal_dir / f'plays-{self._batch}.journal', 'a', encoding='utf-8')
+        _lock(journal)
+        return journal
+
+    def record(self, song_id, n=1):
+        """Count `n` plays of `song_id`; durable once this returns"""
+        with self._lock:
+            self._journal.write(f'{song_id}\n' if n == 1 else f'{song_id} {n}\n')
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            self._pending[song_id] += n
+            if len(self._pending) >= self.max_pending:
+                self._wake.set()
+
+    def pending(self, song_id):
+        """Plays of `song_id` not flushed to Song.listened yet"""
+        with self._lock:
+            return self._pending[song_id]
+
+    def flush(self):
+        """Apply the buffered plays; returns the number of songs updated"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                counts, self._pending = self._pending, Counter()
+                journal, batch = self._journal, self._batch
+                flushing = Path(journal.name).with_suffix('.flushing')
+                os.rename(journal.name, flushing)
+                self._journal = self._open_journal()
+
+            try:
+                apply_counts(counts, batch)
+            except Error:
+                # Any database error, InterfaceError (closed connection) included
+                logger.exception("Play counts not flushed, keeping %d songs for the next flush", len(counts))
+                with self._lock:
+                    for song_id, n in counts.items():
+                        self._journal.write(f'{song_id} {n}\n')
+                        self._pending[song_id] += n
+                    self._journal.flush()
+                    os.fsync(self._journal.fileno())
+                # As below: removed while the flock is still held
+                os.remove(flushing)
+                journal.close()
+                return 0
+
+            # Holding the flock until the file is gone keeps recover() in other processes off it
+            os.remove(flushing)
+            journal.close()
+            PlayCountFlush.objects.filter(batch=batch).delete()
+            return len(counts)
+
+    def recover(self):
+        """Apply the journals of dead processes; returns the number of journals recovered"""
+        recovered = 0
+        for path in sorted(self.journal_dir.glob('plays-*.*')):
+            if path.suffix not in ('.journal', '.flushing') or path.stem == f'plays-{self._batch}':
+                continue
+            try:
+                f = open(path, encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            with f:
+                if not _lock(f) or not path.exists():
+                    continue
+                batch = path.stem[len('plays-'):]
+                if not PlayCountFlush.objects.filter(pk=batch).exists():
+                    counts = read_journal(f)
+                    if counts:
+                        apply_counts(counts, batch)
+                os.remove(path)
+            PlayCountFlush.objects.filter(pk=batch).delete()
+            recovered += 1
+        if recovered:
+            logger.info("Recovered %d play journals", recovered)
+        return recovered
+
+    def _run(self):
+        try:
+            self.recover()
+        except Error:
+            logger.exception("Play journal recovery failed, retrying at the next start")
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Play counter flush failed")
+            close_old_connections()
+
+    def close(self):
+        self._stopped = True
+        self._wake.set()
+        self._thread.join(timeout=self.flush_interval + 5)
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._journal.close()
+                if not self._pending and os.path.exists(self._journal.name):
+                    os.remove(self._journal.name)
+
+
+_counter = None
+_counter_lock = threading.Lock()
+
+
+def play_counter():
+    """The process-wide PlayCounter, started on first use"""
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                options = {**DEFAULTS, **getattr(settings, 'PLAY_COUNTER', {})}
+                _counter = PlayCounter(options['JOURNAL_DIR'], flush_interval=options['FLUSH_INTERVAL'],
+                                       max_pending=options['MAX_PENDING'], fsync=options['FSYNC'])
+                atexit.register(_counter.close)
+    return _counter
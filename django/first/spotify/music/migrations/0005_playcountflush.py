@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0004_rename_title_artist_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayCountFlush',
+            fields=[
+                ('batch', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
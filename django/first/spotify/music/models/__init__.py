@@ -1,3 +1,4 @@
 from .album import Album
 from .artist import Artist
-from .song import Song
\ No newline at end of file
+from .song import Song
+from .play_count_flush import PlayCountFlush
\ No newline at end of file
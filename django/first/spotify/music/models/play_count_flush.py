@@ -0,0 +1,6 @@
+from django.db import models
+
+class PlayCountFlush(models.Model):
+    """Marks a play journal as applied to Song.listened (music/counters.py), written in the same transaction"""
+    batch = models.CharField(max_length=32, primary_key=True)
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -3,12 +3,13 @@ from rest_framework.response import Response
 
 from music.serializers import SongSerializer, AlbumSerializer, ArtistSerializer
 from music.models import Song, Album, Artist
+from music.counters import play_counter
 
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework import status
-from django.db import transaction
+from rest_framework.generics import get_object_or_404
 from rest_framework import filters
 
 # class SongAPIView(APIView):
@@ -38,10 +39,10 @@ class SongViewSet(ModelViewSet):
 
     @action(detail=True, methods=['POST'])
     def listen(self, request, *arg, **kwargs):
-        song = self.get_object()
-        with transaction.atomic():
-            song.listened +=1
-            song.save()
+        # Only the existence check hits the database, the play itself is buffered (music/counters.py)
+        song = get_object_or_404(self.get_queryset().only('pk'), pk=kwargs['pk'])
+        self.check_object_permissions(request, song)
+        play_counter().record(song.pk)
 
         return Response(status=status.HTTP_204_NO_CONTENT)
     
@@ -34,6 +34,7 @@ ALLOWED_HOSTS = []
 INSTALLED_APPS = [
     'rest_framework',
     'music',
+    'championat',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -87,6 +88,14 @@ DATABASES = {
     }
 }
 
+# Buffered Song.listened counter, see music/counters.py
+PLAY_COUNTER = {
+    'FLUSH_INTERVAL': 2.0,
+    'MAX_PENDING': 5000,
+    'JOURNAL_DIR': BASE_DIR / 'play_journal',
+    'FSYNC': False,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
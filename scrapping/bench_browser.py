@@ -0,0 +1,126 @@
+"""Page load time and Chrome memory: full profile vs. the lean one (browser.py).
+
+    python bench_browser.py https://championat.asia/oz https://championat.asia/oz/game-center/calendar
+    python bench_browser.py --wait-for .news-list -n 5 https://championat.asia/oz
+
+For every URL and profile it measures how long driver.get() blocks, the
+time until the element the scrapers wait for is present, how many
+requests / bytes the page pulled, the JS heap (CDP Performance.getMetrics)
+and, when psutil is installed, the resident memory of the whole Chrome
+process tree.
+"""
+import argparse
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from browser import new_chrome
+
+try:
+    import psutil
+except ImportError:  # RSS column is optional
+    psutil = None
+
+
+# Selector the scrapers wait for, by URL fragment; first match wins
+READY_SELECTORS = [
+    ('/game-center/fixture/lineup/', '.lineup-layout'),
+    ('/game-center/fixture/', '.game-incident-list'),
+    ('/game-center/calendar', '.match-center-list'),
+    ('', '.news-list'),
+]
+
+_RESOURCES_JS = """
+const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+return [entries.length, entries.reduce((total, e) => total + (e.transferSize || 0), 0)];
+"""
+
+PROFILES = {
+    'full': dict(lean=False, persistent_profile=False),
+    'lean': dict(lean=True),
+}
+
+
+def ready_selector(url):
+    for fragment, selector in READY_SELECTORS:
+        if fragment in url:
+            return selector
+
+
+def chrome_rss(driver):
+    """Resident memory of chromedriver's Chrome children, in MiB"""
+    if psutil is None:
+        return None
+    try:
+        process = psutil.Process(driver.service.process.pid)
+        return sum(child.memory_info().rss for child in process.children(recursive=True)) / 2 ** 20
+    except (psutil.Error, AttributeError):
+        return None
+
+
+def measure(driver, url, selector):
+    started = time.perf_counter()
+    driver.get(url)
+    get_seconds = time.perf_counter() - started
+    WebDriverWait(driver, 30, poll_frequency=0.05).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+    ready_seconds = time.perf_counter() - started
+
+    requests, transferred = driver.execute_script(_RESOURCES_JS)
+    metrics = {m['name']: m['value'] for m in driver.execute_cdp_cmd('Performance.getMetrics', {})['metrics']}
+    return {
+        'get': get_seconds,
+        'ready': ready_seconds,
+        'requests': requests,
+        'kib': transferred / 1024,
+        'heap_mib': metrics.get('JSHeapUsedSize', 0) / 2 ** 20,
+        'rss_mib': chrome_rss(driver),
+    }
+
+
+def run(profile, urls, rounds, wait_for):
+    rows = []
+    driver = new_chrome(**PROFILES[profile])
+    try:
+        driver.execute_cdp_cmd('Performance.enable', {})
+        for url in urls:
+            for _ in range(rounds):
+                rows.append((url, measure(driver, url, wait_for or ready_selector(url))))
+    finally:
+        driver.quit()
+    return rows
+
+
+def average(rows, key):
+    values = [row[key] for row in rows if row[key] is not None]
+    return sum(values) / len(values) if values else None
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Full vs lean Chrome profile")
+    arg_parser.add_argument('urls', nargs='*', default=["https://championat.asia/oz"])
+    arg_parser.add_argument('-n', '--rounds', type=int, default=3, help="loads per URL and profile")
+    arg_parser.add_argument('--wait-for', help="CSS selector that marks the page as ready")
+    args = arg_parser.parse_args(argv)
+
+    results = {profile: run(profile, args.urls, args.rounds, args.wait_for) for profile in PROFILES}
+
+    print(f"\n{'profile':<6} {'url':<48} {'get':>6} {'ready':>6} {'reqs':>5} {'KiB':>7} {'heap MiB':>8} {'RSS MiB':>8}")
+    for profile, rows in results.items():
+        for url in args.urls:
+            samples = [sample for row_url, sample in rows if row_url == url]
+            rss = average(samples, 'rss_mib')
+            rss_text = '-' if rss is None else f'{rss:.0f}'
+            print(f"{profile:<6} {url[-48:]:<48} {average(samples, 'get'):>5.2f}s {average(samples, 'ready'):>5.2f}s "
+                  f"{average(samples, 'requests'):>5.0f} {average(samples, 'kib'):>7.0f} "
+                  f"{average(samples, 'heap_mib'):>8.1f} {rss_text:>8}")
+
+    full = average([sample for _, sample in results['full']], 'ready')
+    lean = average([sample for _, sample in results['lean']], 'ready')
+    print(f"\nTime to ready per page: {full:.2f}s -> {lean:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Micro-benchmark: compiled extraction specs vs. the per-field lookups they replaced.
+
+    python bench_extract.py fixtures/ .http_cache/ [-n 200]
+
+Runs both implementations over every news item, calendar row and lineup
+row found in the given HTML files (or directories of them, e.g. an
+http_cache directory), checks they return the same data and prints the
+time per item.
+"""
+import argparse
+import os
+import re
+import time
+
+import extract_spec
+from dom import BASE_URL, absolute_url, element_text, find_all, find_first, inner_html, parse_document
+from html_parsers import LINEUP_ROW, parse_game_row, parse_news_item
+
+
+# Per-field implementations as they were before extract_spec, kept for comparison
+
+def legacy_game_status(cell):
+    cell_html = inner_html(cell)
+
+    if 'matchcenter-sprite-finished' in cell_html:
+        return {"type": "finished", "text": "Tugagan"}
+    elif 'matchcenter-sprite-cancelled' in cell_html:
+        return {"type": "cancelled", "text": "Bekor qilingan"}
+    elif 'color:red' in cell_html:
+        # Live match
+        return {"type": "live", "text": f"Davom etmoqda ({element_text(cell)})"}
+    else:
+        return {"type": "notstarted", "text": "Boshlanmagan"}
+
+
+def legacy_game_logo(cell, base_url):
+    img = find_first(cell, tag='img')
+    if img is None:
+        return None
+    src = absolute_url(img.get('src'), base_url)
+    return src if src and src.startswith('http') else None
+
+
+def legacy_game_link(cell, base_url):
+    link = find_first(cell, tag='a')
+    if link is None or not link.get('href'):
+        return None
+    return absolute_url(link.get('href'), base_url)
+
+
+def legacy_parse_game_row(row, tournament, base_url=BASE_URL):
+    """html_parsers.parse_game_row before the extraction specs"""
+    cells = find_all(row, tag='td')
+    # The link lives in cells[7], rows without it are skipped like in the Selenium parser
+    if len(cells) < 8:
+        return None
+
+    return {
+        'id': row.get('id') or f"game_{int(time.time())}",
+        'tournament': tournament,
+        'time': element_text(cells[0]),
+        'home_team': element_text(cells[2]),
+        'away_team': element_text(cells[6]),
+        'score': element_text(cells[4]),
+        'status': legacy_game_status(cells[1]),
+        'home_logo': legacy_game_logo(cells[3], base_url),
+        'away_logo': legacy_game_logo(cells[5], base_url),
+        'link': legacy_game_link(cells[7], base_url),
+    }
+
+
+def legacy_parse_news_details(element):
+    """html_parsers.parse_news_details before the extraction specs"""
+    desc_block = find_first(element, 'news-description-block')
+    if desc_block is None:
+        return None
+
+    details = {}
+
+    details_div = find_first(desc_block, 'details')
+    if details_div is not None:
+        full_text = [text for text in (element_text(p) for p in find_all(details_div, tag='p')) if text]
+        if full_text:
+            details['full_text'] = '\n\n'.join(full_text)
+
+    tags_div = find_first(desc_block, 'tags')
+    if tags_div is not None:
+        tags = [text for text in (element_text(a) for a in find_all(tags_div, tag='a')) if text]
+        if tags:
+            details['tags'] = tags
+
+    source_link = find_first(desc_block, 'source-link')
+    source_div = find_first(source_link, 'source') if source_link is not None else None
+    if source_div is not None:
+        source_text = element_text(source_div)
+        if ':' in source_text:
+            source = source_text.split(':', 1)[1].strip()
+            if source:
+                details['source'] = source
+
+    return details if details else None
+
+
+def legacy_parse_news_item(element, base_url=BASE_URL):
+    """html_parsers.parse_news_item before the extraction specs"""
+    summary_block = find_first(element, 'news-summary-block')
+    if summary_block is None:
+        return None
+
+    title_elem = find_first(summary_block, 'main-link')
+    if title_elem is None:
+        return None
+    title = element_text(title_elem)
+    url = absolute_url(title_elem.get('href'), base_url)
+
+    # Kept identical to the Selenium parser, which prefixes the already absolute `src`
+    img = find_first(summary_block, tag='img')
+    image_url = base_url + absolute_url(img.get('src'), base_url) if img is not None and img.get('src') else None
+
+    summary_elem = find_first(summary_block, 'summary')
+    summary = element_text(summary_elem) if summary_elem is not None else None
+
+    date_time = None
+    info_elem = find_first(summary_block, 'info')
+    if info_elem is not None:
+        date_match = re.search(r'(\d{1,2}\s+\w+,\s+\d{2}:\d{2})', element_text(info_elem))
+        date_time = date_match.group(1) if date_match else None
+
+    tag_type = find_first(title_elem, 'tag-type')
+    news_type = element_text(tag_type).lower() if tag_type is not None else "oddiy"
+
+    result = {
+        'title': title,
+        'url': url,
+        'summary': summary,
+        'image_url': image_url,
+        'date_time': date_time,
+        'news_type': news_type,
+        'details': legacy_parse_news_details(element)
+    }
+
+    return {k: v for k, v in result.items() if v is not None}
+
+
+def legacy_lineup_row(row, base_url=BASE_URL):
+    cells = find_all(row, tag='td')
+    if len(cells) < 3:
+        return None
+
+    rank_span = find_first(row, 'rank')
+    img = find_first(row, tag='img')
+    return {
+        'player_name': element_text(cells[2]),
+        'shirt_number': element_text(rank_span) if rank_span is not None else '',
+        'photo_url': absolute_url(img.get('src'), base_url) if img is not None else '',
+        'icons': [icon.get('class') for icon in find_all(row, 'sm-event-icon')],
+    }
+
+
+def html_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith('.html'):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def collect(paths):
+    """Elements of each kind found in the given pages"""
+    elements = {'news item': [], 'game row': [], 'lineup row': []}
+    for path in html_files(paths):
+        with open(path, encoding='utf-8') as f:
+            root = parse_document(f.read())
+        elements['news item'].extend(find_all(root, 'news-list-item'))
+        elements['game row'].extend(row for table in find_all(root, 'games-table', tag='table')
+                                    for row in find_all(table, tag='tr'))
+        elements['lineup row'].extend(row for table in find_all(root, 'lineup-table')
+                                      for row in find_all(table, tag='tr'))
+    return elements
+
+
+def timed(func, elements, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        # Every round resolves URLs from scratch, as one crawl of these pages would;
+        # otherwise each link after the first round is a cache hit
+        extract_spec._absolute_url.cache_clear()
+        results = [func(element) for element in elements]
+    return (time.perf_counter() - started) / (rounds * len(elements)), results
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    arg_parser.add_argument('paths', nargs='+', help="HTML files or directories")
+    arg_parser.add_argument('-n', '--rounds', type=int, default=200)
+    args = arg_parser.parse_args(argv)
+
+    implementations = {
+        'news item': (legacy_parse_news_item, parse_news_item),
+        'game row': (lambda row: legacy_parse_game_row(row, 'T'), lambda row: parse_game_row(row, 'T')),
+        'lineup row': (legacy_lineup_row, LINEUP_ROW.extract),
+    }
+
+    print(f"{'kind':<12} {'items':>6} {'per-field':>11} {'spec':>10} {'speedup':>8}  same output")
+    for kind, elements in collect(args.paths).items():
+        if not elements:
+            continue
+        legacy, compiled = implementations[kind]
+        t_legacy, before = timed(legacy, elements, args.rounds)
+        t_spec, after = timed(compiled, elements, args.rounds)
+        print(f"{kind:<12} {len(elements):>6} {t_legacy * 1e6:>9.1f}us {t_spec * 1e6:>8.1f}us "
+              f"{t_legacy / t_spec:>7.2f}x  {before == after}")
+
+
+if __name__ == '__main__':
+    main()
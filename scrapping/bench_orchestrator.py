@@ -0,0 +1,73 @@
+"""Benchmark: orchestrator throughput by number of worker processes.
+
+    python bench_orchestrator.py [-n 2000] [-p 1 2 4 8] [--dir bench_orchestrator]
+
+Fills an HttpCache with the fixture and lineup pages of the offline corpus
+(fixtures/, see record_fixtures.py) under `n` synthetic ext_ids, then
+drains an n-match queue once per process count with `--offline` workers.
+No request leaves the machine, so the run measures parsing, output and
+queue overhead only, and prints matches/s and the speedup over the
+smallest process count.
+"""
+import argparse
+import os
+import shutil
+import time
+
+from http_cache import HttpCache
+from orchestrator import Orchestrator, WorkQueue
+from record_fixtures import FIXTURE_URL, FIXTURES_DIR, LINEUP_URL, load_manifest
+
+
+def build_cache(directory, n):
+    pages = {}
+    for page in load_manifest():
+        if page['kind'] in ('fixture', 'lineup'):
+            with open(os.path.join(FIXTURES_DIR, page['file']), encoding='utf-8') as f:
+                pages.setdefault(page['kind'], []).append(f.read())
+
+    cache = HttpCache(directory)
+    ext_ids = [str(90_000_000 + i) for i in range(n)]
+    for i, ext_id in enumerate(ext_ids):
+        cache.store(FIXTURE_URL.format(ext_id=ext_id), pages['fixture'][i % len(pages['fixture'])], {})
+        cache.store(LINEUP_URL.format(ext_id=ext_id), pages['lineup'][i % len(pages['lineup'])], {})
+    cache.close()
+    return ext_ids
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('-n', type=int, default=2000, help="matches per run")
+    arg_parser.add_argument('-p', '--processes', type=int, nargs='+', default=[1, 2, 4, 8])
+    arg_parser.add_argument('--dir', default='bench_orchestrator')
+    args = arg_parser.parse_args()
+
+    shutil.rmtree(args.dir, ignore_errors=True)
+    cache_dir = os.path.join(args.dir, 'cache')
+    started = time.perf_counter()
+    ext_ids = build_cache(cache_dir, args.n)
+    print(f"Cached {2 * len(ext_ids)} pages in {time.perf_counter() - started:.1f}s ({os.cpu_count()} cores)")
+
+    print(f"\n{'processes':>9} {'seconds':>8} {'matches/s':>10} {'speedup':>8}")
+    baseline = None
+    for processes in args.processes:
+        run_dir = os.path.join(args.dir, f'p{processes}')
+        queue_path = os.path.join(run_dir, 'queue.db')
+        os.makedirs(run_dir)
+        queue = WorkQueue(queue_path)
+        queue.enqueue('match', ext_ids)
+        queue.close()
+
+        started = time.perf_counter()
+        counts = Orchestrator(queue_path, processes, engine='http', threads=1, output_dir=run_dir,
+                              cache=cache_dir, offline=True).run()
+        elapsed = time.perf_counter() - started
+        done = counts.get('match', {}).get('done', 0)
+        rate = done / elapsed
+        baseline = baseline or rate
+        print(f"{processes:>9} {elapsed:>8.2f} {rate:>10.0f} {rate / baseline:>7.2f}x"
+              + (f"  ({args.n - done} not done)" if done != args.n else ""))
+
+
+if __name__ == '__main__':
+    main()
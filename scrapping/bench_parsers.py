@@ -0,0 +1,90 @@
+"""Parser benchmarks over the offline fixture corpus (fixtures/, see record_fixtures.py).
+
+    pytest bench_parsers.py
+    pytest bench_parsers.py --benchmark-autosave          # keep a baseline
+    pytest bench_parsers.py --benchmark-compare --benchmark-compare-fail=mean:10%
+
+Each calendar, match and news page of the corpus is run through its parser
+(OptimizedMatchParser.fetch_games, MatchDetailParser.parse_match,
+ChampionatParser.get_news) with pytest-benchmark. Besides the timings it
+reports pages/sec and the allocations of one run (tracemalloc), and fails
+with a diff when the output no longer matches fixtures/expected/.
+
+Not collected by a plain `pytest` run; pass the file explicitly.
+"""
+import difflib
+import json
+import tracemalloc
+
+import pytest
+
+from record_fixtures import (FixtureFetcher, case_argument, case_name, case_runner, expected_path, load_manifest,
+                             main_pages, normalize)
+
+
+PAGES = main_pages(load_manifest())
+_results = []
+
+
+@pytest.fixture(scope='module', autouse=True)
+def report(request):
+    yield
+    reporter = request.config.pluginmanager.get_plugin('terminalreporter')
+    capture = request.config.pluginmanager.get_plugin('capturemanager')
+    if reporter is None or not _results:
+        return
+    with capture.global_and_fixture_disabled():
+        reporter.write_line("")
+        reporter.write_line(f"{'case':<28} {'pages/run':>9} {'pages/sec':>10} {'retained KiB':>12} "
+                            f"{'peak KiB':>9} {'retained blocks':>15}")
+        for row in _results:
+            reporter.write_line(f"{row['case']:<28} {row['pages']:>9} {row['pages_per_sec']:>10.1f} "
+                                f"{row['retained_kib']:>12.1f} {row['peak_kib']:>9.1f} {row['blocks']:>15}")
+
+
+def measure_allocations(run, argument):
+    """Memory of one run: KiB still allocated afterwards, peak KiB, blocks still allocated"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        run(argument)
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+    return current / 1024, peak / 1024, blocks
+
+
+def output_diff(expected, actual):
+    def dump(data):
+        return json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True).splitlines()
+    return '\n'.join(difflib.unified_diff(dump(expected), dump(actual), 'expected', 'actual', lineterm=''))
+
+
+@pytest.mark.parametrize('page', PAGES, ids=[case_name(page) for page in PAGES])
+def test_parser(benchmark, page):
+    fetcher = FixtureFetcher()
+    run = case_runner(page['kind'], fetcher)
+    argument = case_argument(page)
+
+    # Untimed warm-up run: pages touched per call, and file reads out of the timings
+    run(argument)
+    pages = sum(fetcher.requests.values())
+
+    result = benchmark(run, argument)
+
+    if benchmark.stats is not None:  # None with --benchmark-disable
+        retained, peak, blocks = measure_allocations(run, argument)
+        benchmark.extra_info.update(pages=pages, pages_per_sec=pages / benchmark.stats.stats.mean,
+                                    retained_kib=retained, peak_kib=peak, blocks=blocks)
+        _results.append(dict(benchmark.extra_info, case=case_name(page)))
+
+    try:
+        with open(expected_path(page), encoding='utf-8') as f:
+            expected = json.load(f)
+    except FileNotFoundError:
+        pytest.fail(f"No expected output for {case_name(page)}; run `python record_fixtures.py --update-expected`")
+
+    actual = normalize(result)
+    assert actual == expected, f"{case_name(page)} output changed:\n{output_diff(expected, actual)}"
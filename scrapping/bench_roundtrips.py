@@ -0,0 +1,55 @@
+"""WebDriver round-trips per match: per-element parsing vs page_source snapshot.
+
+    python bench_roundtrips.py 19438666 19438667
+
+Every WebDriver call (find_elements, .text, get_attribute, ...) goes through
+`driver.execute`, so wrapping it counts the JSON-wire requests exactly.
+"""
+import sys
+import time
+from collections import Counter
+
+from futbol_match_details import MatchDetailParser
+
+
+def count_commands(driver):
+    """Wrap driver.execute and return the Counter it fills"""
+    counts = Counter()
+    execute = driver.execute
+
+    def counting_execute(driver_command, params=None):
+        counts[driver_command] += 1
+        return execute(driver_command, params)
+
+    driver.execute = counting_execute
+    return counts
+
+
+def run(ext_ids, snapshot):
+    results = []
+    with MatchDetailParser(headless=True, engine='selenium', snapshot=snapshot) as parser:
+        counts = count_commands(parser.driver)
+        for ext_id in ext_ids:
+            counts.clear()
+            started = time.perf_counter()
+            match_data = parser.parse_match(ext_id)
+            elapsed = time.perf_counter() - started
+            results.append((ext_id, sum(counts.values()), elapsed, match_data))
+    return results
+
+
+def main(ext_ids):
+    before = run(ext_ids, snapshot=False)
+    after = run(ext_ids, snapshot=True)
+
+    print(f"\n{'ext_id':>10} {'per-element':>12} {'snapshot':>9} {'t before':>9} {'t after':>8}  same output")
+    for (ext_id, calls_before, t_before, data_before), (_, calls_after, t_after, data_after) in zip(before, after):
+        print(f"{ext_id:>10} {calls_before:>12} {calls_after:>9} {t_before:>8.2f}s {t_after:>7.2f}s  {data_before == data_after}")
+
+    total_before = sum(r[1] for r in before)
+    total_after = sum(r[1] for r in after)
+    print(f"\nRound-trips per match: {total_before / len(ext_ids):.1f} -> {total_after / len(ext_ids):.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or ["19438666"])
@@ -0,0 +1,133 @@
+"""Benchmark: news_search queries over a large synthetic index.
+
+    python bench_search.py [-n 100000] [--db bench_search.db] [--queries 200]
+
+Builds an index of `n` stories by recombining the words, titles and tags of
+the scraped news dumps (championat_news*.json), then times ranked searches,
+tag- and news_type-filtered searches, counts and facets, and prints the
+median and 95th percentile of each in milliseconds.
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import statistics
+import time
+
+from news_dedup import tokens
+from news_search import NewsIndex
+
+
+NEWS_TYPES = ('oddiy', 'oddiy', 'oddiy', 'foto', 'video')
+
+
+def load_samples():
+    items = []
+    for path in glob.glob('championat_news*.json'):
+        with open(path, encoding='utf-8') as f:
+            items.extend(json.load(f))
+    words, titles, tags = [], [], set()
+    for news_data in items:
+        details = news_data.get('details') or {}
+        words += tokens(news_data.get('summary')) + tokens(details.get('full_text'))
+        titles += [tokens(news_data.get('title'))]
+        tags.update(details.get('tags') or [])
+    if not words:
+        raise SystemExit("No championat_news*.json dumps to build the corpus from")
+    return words, [title for title in titles if title], sorted(tags) or ['Superliga']
+
+
+def synthetic_news(n, words, titles, tags, seed=1):
+    rng = random.Random(seed)
+    # Sampling the scraped token stream keeps the real word frequencies
+    for i in range(n):
+        title = ' '.join(rng.choice(titles) + rng.choices(words, k=3))
+        body = rng.choices(words, k=rng.randint(80, 250))
+        yield {
+            'title': title.capitalize(),
+            'summary': ' '.join(body[:25]),
+            'url': f'https://championat.asia/uz/news/bench-{i}',
+            'date_time': f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} 12:00',
+            'news_type': rng.choice(NEWS_TYPES),
+            'details': {'full_text': ' '.join(body), 'tags': rng.sample(tags, min(len(tags), rng.randint(1, 3)))},
+        }
+
+
+def timed(fn, runs):
+    times = []
+    for args in runs:
+        started = time.perf_counter()
+        fn(*args)
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95) - 1]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('-n', type=int, default=100_000, help="stories in the index")
+    arg_parser.add_argument('--db', default='bench_search.db')
+    arg_parser.add_argument('--queries', type=int, default=200)
+    arg_parser.add_argument('--keep', action='store_true', help="reuse an existing --db instead of rebuilding it")
+    args = arg_parser.parse_args()
+
+    words, titles, tags = load_samples()
+    if not args.keep:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+
+    index = NewsIndex(args.db)
+    if len(index) < args.n:
+        started = time.perf_counter()
+        batch = []
+        for news_data in synthetic_news(args.n, words, titles, tags):
+            batch.append(news_data)
+            if len(batch) == 5000:
+                index.write_many(batch)
+                batch.clear()
+        index.write_many(batch)
+        index.optimize()
+        elapsed = time.perf_counter() - started
+        print(f"Indexed {len(index)} stories in {elapsed:.1f}s ({len(index) / elapsed:.0f}/s)")
+
+    started = time.perf_counter()
+    for news_data in synthetic_news(100, words, titles, tags, seed=2):
+        news_data['url'] += '-live'
+        index.write(news_data)
+    print(f"Incremental write: {(time.perf_counter() - started) * 10:.2f} ms/story")
+
+    rng = random.Random(3)
+    vocabulary = sorted(set(words))
+    one_word = [(rng.choice(vocabulary),) for _ in range(args.queries)]
+    two_words = [(' '.join(rng.sample(vocabulary, 2)),) for _ in range(args.queries)]
+    title_queries = [(' '.join(rng.choice(titles)[:2]),) for _ in range(args.queries)]
+    prefixes = [(rng.choice([w for w in vocabulary if len(w) > 4])[:4],) for _ in range(args.queries)]
+    tag_queries = [(q, [rng.choice(tags)]) for q, in one_word]
+    type_queries = [(q, None, rng.choice(NEWS_TYPES)) for q, in one_word]
+
+    def prefix_search(query):
+        return index.search(query, prefix=True)
+
+    cases = [
+        ('search 1 word', index.search, one_word),
+        ('search 2 words', index.search, two_words),
+        ('search title words', index.search, title_queries),
+        ('search prefix', prefix_search, prefixes),
+        ('search title, prefix', prefix_search, title_queries),
+        ('search + tag', index.search, tag_queries),
+        ('search + news_type', index.search, type_queries),
+        ('tag only', lambda tag: index.search(None, [tag]), [(tag,) for tag in rng.choices(tags, k=args.queries)]),
+        ('count 1 word', index.count, one_word),
+        ('facets 2 words', index.facets, two_words),
+    ]
+    print(f"\n{'query':<22}{'median ms':>10}{'p95 ms':>10}")
+    for name, fn, runs in cases:
+        median, p95 = timed(fn, runs)
+        print(f"{name:<22}{median:>10.2f}{p95:>10.2f}")
+    index.close()
+
+
+if __name__ == '__main__':
+    main()
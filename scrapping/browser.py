@@ -0,0 +1,202 @@
+"""One lean Chrome profile shared by all Selenium scrapers.
+
+The scrapers only read the DOM, so the browser does not need images, media,
+fonts, ads or analytics. new_chrome() starts Chrome with:
+
+- images/notifications/media disabled through profile prefs, and
+  images, fonts, media and known ad/analytics hosts blocked with CDP
+  `Network.setBlockedURLs`
+- page_load_strategy='eager': driver.get returns at DOMContentLoaded, the
+  scrapers' readiness waits (readiness.py) cover the rest
+- a persistent user-data dir, so the HTTP cache (CSS/JS) and cookies stay
+  warm across runs. Chrome locks a profile to one process, so every
+  driver claims its own slot (`profile-0`, `profile-1`, ...) under
+  PROFILE_ROOT and releases it on quit()
+
+    driver = new_chrome()               # lean, headless
+    driver = new_chrome(lean=False)     # the old full-page-load profile
+
+bench_browser.py compares page load time and Chrome memory of both.
+WebDriver round-trips and page loads are counted in metrics.py.
+"""
+import os
+import tempfile
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+from metrics import PAGES, WEBDRIVER_COMMANDS, stage
+
+
+# Same as fetchers.DEFAULT_USER_AGENT (not imported: that module needs `requests`)
+DEFAULT_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+)
+
+PROFILE_ROOT = os.path.join(tempfile.gettempdir(), 'championat-chrome')
+
+# CDP URL patterns (`*` wildcards) that are never fetched in lean mode
+BLOCKED_URLS = [
+    # images, media, fonts
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.mp4', '*.webm', '*.m3u8', '*.mp3',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    # ads, analytics, social widgets
+    '*googletagmanager.com*', '*google-analytics.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*adservice.google.*', '*mc.yandex.ru*', '*an.yandex.ru*', '*yandex.ru/ads*', '*top-fwz1.mail.ru*',
+    '*connect.facebook.net*', '*platform.twitter.com*', '*vk.com/js*', '*adfox*', '*adriver*',
+    '*youtube.com/embed*', '*onesignal.com*',
+]
+
+_LEAN_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.default_content_setting_values.notifications': 2,
+    'profile.default_content_setting_values.media_stream': 2,
+    'profile.default_content_setting_values.geolocation': 2,
+    'profile.default_content_setting_values.popups': 2,
+}
+
+_LEAN_ARGS = [
+    '--blink-settings=imagesEnabled=false',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-features=Translate,MediaRouter,OptimizationHints',
+    '--autoplay-policy=user-gesture-required',
+    '--mute-audio',
+    '--no-first-run',
+]
+
+
+def chrome_options(headless=True, lean=True, user_data_dir=None, user_agent=DEFAULT_USER_AGENT, extra_args=()):
+    options = Options()
+    if headless:
+        options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    if user_agent:
+        options.add_argument(f'--user-agent={user_agent}')
+
+    if lean:
+        options.page_load_strategy = 'eager'
+        options.add_experimental_option('prefs', _LEAN_PREFS)
+        for argument in _LEAN_ARGS:
+            options.add_argument(argument)
+    if user_data_dir:
+        options.add_argument(f'--user-data-dir={user_data_dir}')
+
+    for argument in extra_args:
+        options.add_argument(argument)
+    return options
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        pass
+    return True
+
+
+def claim_profile(root=PROFILE_ROOT):
+    """First free `profile-N` dir under `root`; returns (path, lock file).
+
+    The lock file holds the owner's pid, so slots of crashed runs are reused.
+    """
+    os.makedirs(root, exist_ok=True)
+    slot = 0
+    while True:
+        path = os.path.join(root, f'profile-{slot}')
+        lock = path + '.lock'
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                with open(lock) as f:
+                    owner = int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                owner = 0
+            if owner and not _pid_alive(owner):
+                try:
+                    os.remove(lock)
+                except FileNotFoundError:
+                    pass
+                continue  # retry the same slot
+            slot += 1
+            continue
+
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        return path, lock
+
+
+def release_profile(lock):
+    try:
+        os.remove(lock)
+    except FileNotFoundError:
+        pass
+
+
+class LeanChrome(webdriver.Chrome):
+    """webdriver.Chrome that gives its profile slot back on quit() and counts
+    its round-trips and page loads in metrics"""
+
+    profile_lock = None
+
+    def execute(self, driver_command, params=None):
+        # Every WebDriver call (find_elements, .text, get_attribute, ...) goes through here
+        WEBDRIVER_COMMANDS.inc(command=driver_command)
+        return super().execute(driver_command, params)
+
+    def get(self, url):
+        with stage('navigation'):
+            super().get(url)
+        PAGES.inc(source='selenium')
+
+    def quit(self):
+        try:
+            super().quit()
+        finally:
+            if self.profile_lock:
+                release_profile(self.profile_lock)
+                self.profile_lock = None
+
+
+def block_urls(driver, patterns=BLOCKED_URLS):
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+
+
+def new_chrome(headless=True, lean=True, persistent_profile=True, profile_root=PROFILE_ROOT,
+               user_agent=DEFAULT_USER_AGENT, extra_args=(), blocked_urls=BLOCKED_URLS):
+    """Start Chrome with the shared scraper profile.
+
+    persistent_profile=False starts from a throwaway profile, like before.
+    """
+    path = lock = None
+    if persistent_profile:
+        path, lock = claim_profile(profile_root)
+
+    try:
+        driver = LeanChrome(options=chrome_options(headless, lean, path, user_agent, extra_args))
+    except Exception:
+        if lock:
+            release_profile(lock)
+        raise
+    driver.profile_lock = lock
+
+    if lean and blocked_urls:
+        try:
+            block_urls(driver, blocked_urls)
+        except WebDriverException:
+            # Not a Chromium driver with CDP; the prefs still keep images off
+            pass
+    return driver
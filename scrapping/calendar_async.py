@@ -0,0 +1,171 @@
+"""asyncio-native client for the championat.asia game-center calendar.
+
+Returns the same game dicts as OptimizedMatchParser.get_games, without a
+browser and without blocking the event loop, e.g. from an aiogram handler:
+
+    calendar = AsyncCalendarClient()  # session opens on first request
+
+    @dp.message(Command("games"))
+    async def games(message: Message):
+        games = await calendar.get_games("15/07/2025")
+
+    dp.shutdown.register(calendar.close)
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from crawl_state import game_key
+from fetchers import DEFAULT_USER_AGENT
+from html_parsers import parse_calendar_html
+from resilience import CircuitOpen, Resilience
+
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_URL = "https://championat.asia/oz/game-center/calendar"
+
+
+def iso_date(date: str = None) -> str:
+    """DD/MM/YYYY -> YYYY-MM-DD (bo'sh bo'lsa bugungi kun)"""
+    if not date:
+        date = datetime.now().strftime("%d/%m/%Y")
+    try:
+        return datetime.strptime(date, "%d/%m/%Y").strftime("%Y-%m-%d")
+    except ValueError:
+        return date
+
+
+def calendar_url(date: str = None, sort: str = "any") -> str:
+    """DD/MM/YYYY sanadan kalendar URL"""
+    return f"{CALENDAR_URL}?sort={sort}&date={iso_date(date)}"
+
+
+class AsyncCalendarClient:
+    """Pooled aiohttp session with per-host concurrency limits; retries, the
+    adaptive rate limit and the circuit breaker come from resilience.Resilience"""
+
+    def __init__(self, concurrency: int = 20, per_host: int = 4, rate: float = 5.0, timeout: float = 15,
+                 resilience: Optional[Resilience] = None):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.rate = rate
+        self.timeout = timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.resilience = resilience or Resilience(
+            rate=rate, transient=(asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+        self.failed_dates: List[str] = []
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def open(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host, ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'User-Agent': DEFAULT_USER_AGENT},
+            )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def fetch(self, url: str) -> str:
+        """Sahifani olish, host bo'yicha limitlar bilan"""
+        await self.open()
+        host = urlsplit(url).netloc
+        semaphore = self._host_semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+
+        async def request():
+            async with semaphore:
+                async with self.session.get(url) as response:
+                    response.raise_for_status()
+                    return await response.text(encoding='utf-8', errors='replace')
+
+        return await self.resilience.call_async(url, request)
+
+    async def fetch_games(self, date: str = None, sort: str = "any") -> List[Dict]:
+        """Xatolikni yutmaydigan variant (qayta urinish uchun)"""
+        url = calendar_url(date, sort)
+        page_html = await self.fetch(url)
+        # lxml parsing is CPU work, keep it off the event loop
+        games = await asyncio.to_thread(parse_calendar_html, page_html, url)
+        if games is None:
+            logger.warning(f"match-center-list topilmadi: {url}")
+            return []
+        day = iso_date(date)
+        for game in games:
+            game['date'] = day
+        return games
+
+    async def get_games(self, date: str = None, sort: str = "any") -> List[Dict]:
+        """O'yinlarni olish"""
+        try:
+            return await self.fetch_games(date, sort)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timeout: {calendar_url(date, sort)}")
+            return []
+        except (aiohttp.ClientError, CircuitOpen) as e:
+            logger.error(f"Calendar error: {e}")
+            return []
+
+    async def get_matches_for_date_range(self, start_date: str, end_date: str, sort: str = "any",
+                                         retries: int = 2) -> List[Dict]:
+        """Kunlarni parallel olish; sana tartibida, takrorlarsiz (crawl_state.game_key bo'yicha).
+
+        Har bir so'rov resilience orqali qayta uriniladi; shundan keyin ham
+        olinmagan kunlar yana `retries` marta uriniladi, baribir o'xshamasa
+        self.failed_dates ga yoziladi (bo'sh kun bilan adashtirmaslik uchun).
+        """
+        start = datetime.strptime(start_date, "%d/%m/%Y")
+        end = datetime.strptime(end_date, "%d/%m/%Y")
+        dates = [(start + timedelta(days=i)).strftime("%d/%m/%Y") for i in range((end - start).days + 1)]
+        self.failed_dates = []
+
+        async def fetch_day(date_str):
+            for attempt in range(retries + 1):
+                try:
+                    return await self.fetch_games(date_str, sort)
+                except (asyncio.TimeoutError, aiohttp.ClientError, CircuitOpen) as e:
+                    logger.warning(f"{date_str}: {attempt + 1}-urinish muvaffaqiyatsiz: {e}")
+                    if attempt < retries:
+                        # Ochiq circuit: yopilishini kutamiz
+                        await asyncio.sleep(max(self.resilience.retry.delay(attempt), getattr(e, 'retry_in', 0)))
+            logger.error(f"Olinmagan kun: {date_str}")
+            self.failed_dates.append(date_str)
+            return []
+
+        days = await asyncio.gather(*(fetch_day(date_str) for date_str in dates))
+
+        all_games = []
+        seen_ids = set()
+        for date_str, games in zip(dates, days):
+            for game in games:
+                key = game_key(game, date_str)
+                if key not in seen_ids:
+                    seen_ids.add(key)
+                    all_games.append(game)
+        return all_games
+
+
+async def main():
+    async with AsyncCalendarClient() as client:
+        games = await client.get_matches_for_date_range("15/07/2025", "21/07/2025")
+    for game in games:
+        print(game)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
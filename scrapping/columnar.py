@@ -0,0 +1,353 @@
+"""Columnar (Parquet) export of scraped matches for season-wide analytics.
+
+`match_data` from MatchDetailParser and the calendar games are flattened
+into three typed tables, one row per event / lineup entry / game, all
+keyed by the match `ext_id`:
+
+    <directory>/events/     ext_id, half, minute, added_time, event_type, team_side, player_name, ...
+    <directory>/lineups/    ext_id, team_side, role, player_name, shirt_number, ...
+    <directory>/games/      ext_id, id, date, tournament, time, home_team, away_team, home_score, ...
+    <directory>/matches/    ext_id, written_at: one row per exported match_data
+
+Every run (ColumnarSink) adds one `part-<timestamp>-<uuid>.parquet` file
+to each table directory, so exports accumulate instead of overwriting each
+other; read_table() reads all parts as one pyarrow dataset. A match
+exported again (a live match re-fetched, a conversion re-run) is not
+counted twice: every row carries the `written_at` of its export, and
+read_table() keeps only the rows of the latest export of each ext_id
+(for games, the latest calendar row). Rows are
+buffered and written as one Parquet row group per batch, so a season is
+never held in memory. ColumnarSink.write() takes the same
+records as sinks.JsonLinesSink and can be used in its place.
+
+    python columnar.py matches.jsonl games.jsonl -o season/     # convert JSON Lines dumps
+    python columnar.py --goals season/                          # goals per player
+"""
+import argparse
+import datetime
+import os
+import re
+import time
+import uuid
+
+from crawl_state import ext_id_from_link
+from metrics import stage
+from sinks import read_json_lines
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pc = ds = pq = None
+
+
+_MINUTE_RE = re.compile(r'^\s*(\d+)\s*(?:\+\s*(\d+))?')
+_SCORE_RE = re.compile(r'^\s*(\d+)\s*\D+\s*(\d+)\s*$')
+
+
+def _schemas():
+    categorical = pa.dictionary(pa.int8(), pa.string())
+    written_at = pa.timestamp('ns', tz='UTC')
+    return {
+        'events': pa.schema([
+            ('ext_id', pa.string()),
+            ('seq', pa.int16()),
+            ('half', categorical),
+            ('minute', pa.int16()),
+            ('added_time', pa.int16()),
+            ('event_type', categorical),
+            ('team_side', categorical),
+            ('player_name', pa.string()),
+            ('assist', pa.string()),
+            ('player_out', pa.string()),
+            ('score', pa.string()),
+            ('written_at', written_at),
+        ]),
+        'lineups': pa.schema([
+            ('ext_id', pa.string()),
+            ('team_side', categorical),
+            ('role', categorical),
+            ('position_group', categorical),
+            ('player_name', pa.string()),
+            ('shirt_number', pa.int16()),
+            ('photo_url', pa.string()),
+            ('event_icons', pa.list_(pa.string())),
+            ('written_at', written_at),
+        ]),
+        'games': pa.schema([
+            ('ext_id', pa.string()),
+            ('id', pa.string()),
+            ('date', pa.date32()),
+            ('tournament', pa.string()),
+            ('time', pa.string()),
+            ('home_team', pa.string()),
+            ('away_team', pa.string()),
+            ('home_score', pa.int16()),
+            ('away_score', pa.int16()),
+            ('status', categorical),
+            ('link', pa.string()),
+            ('written_at', written_at),
+        ]),
+        'matches': pa.schema([
+            ('ext_id', pa.string()),
+            ('written_at', written_at),
+        ]),
+    }
+
+
+def _int_or_none(value):
+    value = (value or '').strip()
+    return int(value) if value.isdigit() else None
+
+
+def split_minute(minute):
+    """`45+2` -> (45, 2), `67` -> (67, None), `` -> (None, None)"""
+    match = _MINUTE_RE.match(minute or '')
+    if not match:
+        return None, None
+    return int(match.group(1)), int(match.group(2)) if match.group(2) else None
+
+
+def split_score(score):
+    """`2 - 1` / `2:1` -> (2, 1); not played yet -> (None, None)"""
+    match = _SCORE_RE.match(score or '')
+    if not match:
+        return None, None
+    return int(match.group(1)), int(match.group(2))
+
+
+def event_rows(match_data, written_at=None):
+    ext_id = str(match_data['ext_id'])
+    for seq, event in enumerate(match_data.get('events') or []):
+        minute, added_time = split_minute(event.get('minute'))
+        yield {
+            'ext_id': ext_id,
+            'seq': seq,
+            'half': event.get('half'),
+            'minute': minute,
+            'added_time': added_time,
+            'event_type': event.get('event_type'),
+            'team_side': event.get('team_side'),
+            'player_name': event.get('player_name') or None,
+            'assist': event.get('assist'),
+            'player_out': event.get('player_out'),
+            'score': event.get('score'),
+            'written_at': written_at,
+        }
+
+
+def lineup_rows(match_data, written_at=None):
+    ext_id = str(match_data['ext_id'])
+    for team_key, team_side in (('home_team', 'home'), ('away_team', 'away')):
+        team = match_data.get(team_key) or {}
+        for role in ('starting_lineup', 'substitutes'):
+            for player in team.get(role) or []:
+                yield {
+                    'ext_id': ext_id,
+                    'team_side': team_side,
+                    'role': role,
+                    'position_group': player.get('position_group'),
+                    'player_name': player.get('player_name'),
+                    'shirt_number': _int_or_none(player.get('shirt_number')),
+                    'photo_url': player.get('photo_url') or None,
+                    'event_icons': player.get('event_icons') or [],
+                    'written_at': written_at,
+                }
+        if team.get('coach'):
+            yield {
+                'ext_id': ext_id,
+                'team_side': team_side,
+                'role': 'coach',
+                'position_group': None,
+                'player_name': team['coach'],
+                'shirt_number': None,
+                'photo_url': None,
+                'event_icons': [],
+                'written_at': written_at,
+            }
+
+
+def game_row(game, written_at=None):
+    home_score, away_score = split_score(game.get('score'))
+    return {
+        'ext_id': ext_id_from_link(game.get('link')),
+        'id': str(game['id']),
+        'date': datetime.date.fromisoformat(game['date']) if game.get('date') else None,
+        'tournament': game.get('tournament'),
+        'time': game.get('time'),
+        'home_team': game.get('home_team'),
+        'away_team': game.get('away_team'),
+        'home_score': home_score,
+        'away_score': away_score,
+        'status': (game.get('status') or {}).get('type'),
+        'link': game.get('link'),
+        'written_at': written_at,
+    }
+
+
+class ColumnarSink:
+    """Buffers flattened rows and writes them to this run's part file of each table, in row groups"""
+
+    def __init__(self, directory, batch_rows=10000, compression='zstd'):
+        if pa is None:
+            raise RuntimeError("Parquet export needs the `pyarrow` package")
+
+        self.directory = directory
+        self.batch_rows = batch_rows
+        self.compression = compression
+        self.schemas = _schemas()
+        self.rows = {table: 0 for table in self.schemas}
+        self.records = 0
+
+        self._buffers = {table: [] for table in self.schemas}
+        self._writers = {}
+        self._written_at = 0
+        self.part = f"part-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex}.parquet"
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, table):
+        return os.path.join(self.directory, table, self.part)
+
+    def _next_written_at(self):
+        """Nanosecond export time, strictly increasing within the run so a later write always wins"""
+        self._written_at = max(time.time_ns(), self._written_at + 1)
+        return self._written_at
+
+    def write_match(self, match_data):
+        written_at = self._next_written_at()
+        with stage('serialization'):
+            self._add('events', event_rows(match_data, written_at))
+            self._add('lineups', lineup_rows(match_data, written_at))
+            self._add('matches', [{'ext_id': str(match_data['ext_id']), 'written_at': written_at}])
+        self.records += 1
+
+    def write_game(self, game):
+        with stage('serialization'):
+            self._add('games', [game_row(game, self._next_written_at())])
+        self.records += 1
+
+    def write(self, record):
+        """A match_data dict (has `events`) or a calendar game"""
+        if 'events' in record:
+            self.write_match(record)
+        else:
+            self.write_game(record)
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def _add(self, table, rows):
+        buffer = self._buffers[table]
+        buffer.extend(rows)
+        if len(buffer) >= self.batch_rows:
+            self._flush(table)
+
+    def _flush(self, table):
+        buffer = self._buffers[table]
+        if not buffer:
+            return
+        schema = self.schemas[table]
+        batch = pa.Table.from_pylist(buffer, schema=schema)
+        if table not in self._writers:
+            os.makedirs(os.path.dirname(self.path(table)), exist_ok=True)
+            self._writers[table] = pq.ParquetWriter(self.path(table), schema, compression=self.compression)
+        self._writers[table].write_table(batch)
+        self.rows[table] += len(buffer)
+        buffer.clear()
+
+    def flush(self):
+        for table in self.schemas:
+            self._flush(table)
+
+    def close(self):
+        self.flush()
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _dataset(directory, table):
+    return ds.dataset(os.path.join(directory, table), schema=_schemas()[table], format='parquet')
+
+
+def latest_exports(directory, table):
+    """ext_id -> written_at of its latest export, as a table (ext_id, latest).
+
+    Matches are versioned by the `matches` table, not by their own rows, so
+    a re-export without events still hides the events of the earlier one.
+    """
+    source = 'games' if table == 'games' else 'matches'
+    if not os.path.isdir(os.path.join(directory, source)):
+        return None
+    versions = _dataset(directory, source).to_table(columns=['ext_id', 'written_at'],
+                                                    filter=ds.field('ext_id').is_valid())
+    return versions.group_by('ext_id').aggregate([('written_at', 'max')]).rename_columns(['ext_id', 'latest'])
+
+
+def read_table(directory, table, columns=None, filters=None, latest=True):
+    """All part files of `table` under `directory`; filters in pq.read_table's list-of-tuples form.
+
+    latest=False also returns the rows of earlier exports of a match.
+    Rows without ext_id or written_at (parts from before it was recorded)
+    are always kept.
+    """
+    dataset = _dataset(directory, table)
+    expression = pq.filters_to_expression(filters) if filters else None
+    versions = latest_exports(directory, table) if latest and table != 'matches' else None
+    if versions is None:
+        return dataset.to_table(columns=columns, filter=expression)
+
+    wanted = columns or dataset.schema.names
+    rows = dataset.to_table(columns=list(dict.fromkeys([*wanted, 'ext_id', 'written_at'])), filter=expression)
+    # Joined on the keys only: Arrow joins cannot carry list columns such as event_icons
+    keys = pa.table({'ext_id': rows['ext_id'], 'written_at': rows['written_at'],
+                     'row': pa.array(range(rows.num_rows), pa.int64())})
+    keys = keys.join(versions, 'ext_id', join_type='left outer')
+    current = pc.or_kleene(pc.or_kleene(keys['latest'].is_null(), keys['written_at'].is_null()),
+                           pc.equal(keys['written_at'], keys['latest']))
+    kept = keys.filter(current)['row']
+    return rows.take(kept.take(pc.sort_indices(kept))).select(wanted)
+
+
+def goals_by_player(directory):
+    """Goals per player across every match in `directory` (latest export of each), most first"""
+    events = read_table(directory, 'events', columns=['player_name', 'event_type', 'ext_id'],
+                        filters=[('event_type', '=', 'goal')])
+    counts = events.group_by('player_name').aggregate([('ext_id', 'count'), ('ext_id', 'count_distinct')])
+    counts = counts.rename_columns(['player_name', 'goals', 'matches'])
+    return counts.sort_by([('goals', 'descending'), ('player_name', 'ascending')])
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="JSON Lines matches/games -> Parquet tables")
+    arg_parser.add_argument('files', nargs='*', help="JSON Lines files written by the scrapers")
+    arg_parser.add_argument('-o', '--output', default='parquet', help="output directory")
+    arg_parser.add_argument('--batch-rows', type=int, default=10000, help="rows per Parquet row group")
+    arg_parser.add_argument('--goals', metavar='DIR', help="print goals per player from an exported directory")
+    args = arg_parser.parse_args(argv)
+
+    if args.goals:
+        for row in goals_by_player(args.goals).slice(0, 20).to_pylist():
+            print(f"{row['goals']:>4}  {row['player_name']} ({row['matches']} matches)")
+        return
+
+    with ColumnarSink(args.output, batch_rows=args.batch_rows) as sink:
+        for path in args.files:
+            sink.write_many(read_json_lines(path))
+
+    for table, count in sink.rows.items():
+        if count:
+            print(f"{sink.path(table)}: {count} rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+
+# How long a fetched match stays fresh, by its calendar status (seconds).
+# None means never refetch.
+DEFAULT_REFRESH = {
+    'finished': None,
+    'cancelled': None,
+    'live': 60,
+    'notstarted': 6 * 60 * 60,
+    'unknown': 60 * 60,
+}
+
+_EXT_ID_RE = re.compile(r'/fixture/(\d+)')
+
+
+def ext_id_from_link(link):
+    """`.../game-center/fixture/19438666` -> '19438666'"""
+    if not link:
+        return None
+    match = _EXT_ID_RE.search(link)
+    return match.group(1) if match else None
+
+
+def game_key(game, date):
+    """Identity of a calendar row: its ext_id, or (date, tournament, time, teams) without a link.
+
+    game['id'] is no good for this: rows without an id get `game_<unix seconds>`,
+    shared by every row read in the same second.
+    """
+    return ext_id_from_link(game.get('link')) or (
+        date, game.get('tournament'), game.get('time'), game.get('home_team'), game.get('away_team'))
+
+
+def day_status(games):
+    """Overall status of a calendar day, so whole past days can be skipped too"""
+    types = {game.get('status', {}).get('type', 'unknown') for game in games}
+    if 'live' in types:
+        return 'live'
+    if types and types <= {'finished', 'cancelled'}:
+        return 'finished'
+    return 'notstarted'
+
+
+def news_key(news_data):
+    """Identity of a news item: its URL, or a hash of the title when it has none"""
+    if news_data.get('url'):
+        return news_data['url']
+    return 'title:' + hashlib.sha1(news_data.get('title', '').encode('utf-8')).hexdigest()
+
+
+def content_hash(data):
+    """Stable hash of a parsed payload, used to tell if a refetch changed anything"""
+    payload = json.dumps(data, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class CrawlState:
+    """SQLite index of what was already scraped.
+
+    One row per key (game `id` or `ext_id`) with its last known status, the
+    time it was last fetched, the status it had at that time and a hash of
+    the parsed content. A match fetched while live is fetched once more
+    after the calendar reports it finished.
+    """
+
+    def __init__(self, path='crawl_state.db', refresh=None):
+        self.path = path
+        self.refresh = dict(DEFAULT_REFRESH, **(refresh or {}))
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('pragma journal_mode=wal')
+        self.create_tables()
+
+    def create_tables(self):
+        with self._lock:
+            self.conn.execute('''
+                create table if not exists crawl_state (
+                    key varchar(64) primary key,
+                    status varchar(20),
+                    fetched_at real,
+                    fetched_status varchar(20),
+                    content_hash varchar(40)
+                )
+            ''')
+            self.conn.execute('''
+                create table if not exists news_seen (
+                    key text primary key,
+                    seen_at real not null
+                )
+            ''')
+            self.conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self.conn.execute('''
+                select status, fetched_at, fetched_status, content_hash from crawl_state where key = ?
+            ''', (str(key),)).fetchone()
+        if row is None:
+            return None
+        return {
+            'status': row[0] or 'unknown',
+            'fetched_at': row[1],
+            'fetched_status': row[2] or 'unknown',
+            'content_hash': row[3],
+        }
+
+    def should_fetch(self, key, now=None):
+        """False while the last fetch of `key` is still fresh for its status"""
+        entry = self.get(key)
+        if entry is None or entry['fetched_at'] is None:
+            return True
+
+        interval = self.refresh.get(entry['status'], self.refresh['unknown'])
+        if interval is None:
+            # Final status: one more fetch if it wasn't final when we fetched
+            return entry['fetched_status'] != entry['status']
+        return (now or time.time()) - entry['fetched_at'] >= interval
+
+    def set_status(self, key, status):
+        """Remember the latest calendar status without touching fetch info"""
+        with self._lock:
+            self.conn.execute('''
+                insert into crawl_state (key, status) values (?, ?)
+                on conflict(key) do update set status = excluded.status
+            ''', (str(key), status))
+            self.conn.commit()
+
+    def mark_fetched(self, key, data=None, status=None, now=None):
+        """Record a fetch; returns True if the content changed since last time"""
+        new_hash = content_hash(data) if data is not None else None
+        previous = self.get(key)
+
+        with self._lock:
+            self.conn.execute('''
+                insert into crawl_state (key, status, fetched_at, fetched_status, content_hash)
+                values (?, ?, ?, ?, ?)
+                on conflict(key) do update set
+                    status = coalesce(excluded.status, crawl_state.status),
+                    fetched_at = excluded.fetched_at,
+                    fetched_status = coalesce(excluded.status, crawl_state.status),
+                    content_hash = coalesce(excluded.content_hash, crawl_state.content_hash)
+            ''', (str(key), status, now or time.time(), status, new_hash))
+            self.conn.commit()
+
+        return previous is None or previous['content_hash'] != new_hash
+
+    def record_games(self, games):
+        """Store calendar statuses of `get_games` results, by game id and ext_id"""
+        rows = []
+        for game in games:
+            status = game.get('status', {}).get('type', 'unknown')
+            rows.append((str(game['id']), status))
+            ext_id = ext_id_from_link(game.get('link'))
+            if ext_id:
+                rows.append((ext_id, status))
+
+        with self._lock:
+            self.conn.executemany('''
+                insert into crawl_state (key, status) values (?, ?)
+                on conflict(key) do update set status = excluded.status
+            ''', rows)
+            self.conn.commit()
+
+    def has_news(self, key):
+        with self._lock:
+            return self.conn.execute('select 1 from news_seen where key = ?', (key,)).fetchone() is not None
+
+    def mark_news(self, key, now=None):
+        with self._lock:
+            self.conn.execute('insert or ignore into news_seen (key, seen_at) values (?, ?)', (key, now or time.time()))
+            self.conn.commit()
+
+    def filter_stale(self, keys, now=None):
+        """Keys that need fetching, in their original order"""
+        return [key for key in keys if self.should_fetch(key, now)]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,89 @@
+"""lxml DOM helpers that mirror the WebDriver calls the scrapers were written against"""
+from urllib.parse import urljoin
+
+from lxml import html as lxml_html
+
+
+BASE_URL = "https://championat.asia"
+
+# Block-level tags that WebDriver's `.text` renders on their own line
+_BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'div', 'dl', 'dd', 'dt', 'fieldset',
+    'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr',
+    'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'tr', 'ul',
+}
+_SKIP_TAGS = {'script', 'style', 'noscript', 'template'}
+
+# championat.asia renders these inline spans on a separate line (e.g. the assist
+# under a goal scorer), so `.text` returns them after a newline
+_NEWLINE_CLASSES = ('gray',)
+
+
+def parse_document(page_html):
+    """Parse an HTML page (or fragment) into an lxml tree"""
+    if isinstance(page_html, str):
+        page_html = page_html.encode('utf-8')
+    return lxml_html.document_fromstring(page_html)
+
+
+def has_class(class_name):
+    """XPath predicate matching a whole CSS class token, like `.class_name`"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def find_all(element, class_name=None, tag='*'):
+    """Descendants by tag and/or class, same as WebDriver's find_elements"""
+    if class_name:
+        return element.xpath(f".//{tag}[{has_class(class_name)}]")
+    return element.xpath(f".//{tag}")
+
+
+def find_first(element, class_name=None, tag='*'):
+    found = find_all(element, class_name, tag)
+    return found[0] if found else None
+
+
+def element_text(element):
+    """Approximate WebDriver's rendered `.text` for an lxml element"""
+    parts = []
+
+    def walk(node):
+        # Comments and processing instructions only contribute their tail
+        tag = node.tag if isinstance(node.tag, str) else None
+        if tag in _SKIP_TAGS:
+            return
+
+        block = False
+        if tag:
+            classes = (node.get('class') or '').split()
+            block = tag in _BLOCK_TAGS or any(name in classes for name in _NEWLINE_CLASSES)
+
+        if tag == 'br' or block:
+            parts.append('\n')
+        if tag and node.text:
+            parts.append(node.text)
+        for child in node:
+            walk(child)
+            if child.tail:
+                parts.append(child.tail)
+        if block:
+            parts.append('\n')
+
+    walk(element)
+    lines = (' '.join(line.split()) for line in ''.join(parts).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def inner_html(element):
+    """Serialized children of an element, like `get_attribute('innerHTML')`"""
+    content = element.text or ''
+    for child in element:
+        content += lxml_html.tostring(child, encoding='unicode')
+    return content
+
+
+def absolute_url(value, base_url=BASE_URL):
+    """Resolve an attribute the way the DOM `src`/`href` properties do"""
+    if value is None:
+        return None
+    return urljoin(base_url, value)
@@ -0,0 +1,439 @@
+"""Player and team entity index built from scraped matches.
+
+MatchDetailParser emits players as free strings per match (name, shirt
+number, photo URL) and events name players only by `player_name`. This
+index gives them stable ids across matches:
+
+- a team is keyed by the site id in its logo URL (`/upload/teams/665.png`),
+  else by its normalized name
+- a player is keyed by the site id in its photo URL
+  (`/upload/players/3361.jpg`), else by its normalized name
+- an event's player, assist and player_out names are resolved against the
+  lineup of the same match and side first, then against every name a
+  player was seen under. A name several players share goes to the one who
+  played for the match's team on that side, else it stays unresolved
+
+Names and URLs are interned in `strings`, so each distinct one is stored
+once. `event_players` is clustered by (player_id, ext_id, seq), so all
+events of one player are a single index range read, without opening a
+match file. Re-indexing a match replaces its rows. Calendar games fill in
+which teams played a match, in whatever order games and matches arrive.
+
+    index = EntityIndex('entities.db')
+    index.write(match_data)    # or a calendar game; same records as sinks.JsonLinesSink
+    player, = index.find_players('Pablo Solari')
+    index.player_events(player['id'], event_type='goal')
+
+    python entity_index.py build matches.jsonl games.jsonl --db entities.db
+    python entity_index.py player "Solari"
+"""
+import argparse
+import re
+import sqlite3
+import threading
+import time
+
+from crawl_state import ext_id_from_link
+
+
+ROLES = ('starting_lineup', 'substitutes')
+# Which name of an event refers to whom
+EVENT_PLAYER_FIELDS = (('player_name', 'player'), ('assist', 'assist'), ('player_out', 'player_out'))
+
+_PLAYER_SITE_ID_RE = re.compile(r'/upload/players/(\d+)')
+_TEAM_SITE_ID_RE = re.compile(r'/upload/teams/(\d+)')
+_APOSTROPHES = str.maketrans({'‘': "'", '’': "'", 'ʻ': "'", 'ʼ': "'", '`': "'"})
+
+
+def normalize_name(name):
+    """`  Abbosbek  Iskanderov ` -> `abbosbek iskanderov`; O‘/O' spellings agree"""
+    return ' '.join((name or '').translate(_APOSTROPHES).split()).casefold()
+
+
+def site_id(url, pattern):
+    match = pattern.search(url or '')
+    return int(match.group(1)) if match else None
+
+
+class EntityIndex:
+    """SQLite index of teams, players, their appearances and events"""
+
+    def __init__(self, path='entities.db'):
+        self.path = path
+        self.stats = {'matches': 0, 'games': 0, 'players': 0, 'teams': 0, 'unresolved': 0}
+        self._strings = {}
+        self._players = {}
+        self._teams = {}
+        self._names = set()
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('pragma journal_mode=wal')
+        self.conn.execute('pragma synchronous=normal')
+        self.create_tables()
+
+    def create_tables(self):
+        with self._lock:
+            self.conn.executescript('''
+                create table if not exists strings (
+                    id integer primary key,
+                    value text not null unique
+                );
+
+                create table if not exists teams (
+                    id integer primary key,
+                    key text not null unique,
+                    site_id integer,
+                    name_id integer references strings (id),
+                    logo_id integer references strings (id)
+                );
+
+                create table if not exists players (
+                    id integer primary key,
+                    key text not null unique,
+                    site_id integer,
+                    name_id integer references strings (id),
+                    photo_id integer references strings (id)
+                );
+
+                -- Every spelling a player was seen under, to resolve event names
+                create table if not exists player_names (
+                    name text not null,
+                    player_id integer not null references players (id),
+                    primary key (name, player_id)
+                ) without rowid;
+
+                create table if not exists matches (
+                    ext_id text primary key,
+                    home_team_id integer references teams (id),
+                    away_team_id integer references teams (id),
+                    indexed_at real
+                );
+
+                create table if not exists appearances (
+                    player_id integer not null references players (id),
+                    ext_id text not null,
+                    team_side varchar(4) not null,
+                    role varchar(20) not null,
+                    shirt_number integer,
+                    position_group_id integer references strings (id),
+                    primary key (player_id, ext_id)
+                ) without rowid;
+                create index if not exists appearances_match on appearances (ext_id);
+
+                create table if not exists events (
+                    ext_id text not null,
+                    seq integer not null,
+                    event_type varchar(30),
+                    minute varchar(10),
+                    half varchar(20),
+                    team_side varchar(4),
+                    score varchar(10),
+                    primary key (ext_id, seq)
+                ) without rowid;
+
+                create table if not exists event_players (
+                    player_id integer not null references players (id),
+                    ext_id text not null,
+                    seq integer not null,
+                    role varchar(10) not null,
+                    primary key (player_id, ext_id, seq, role)
+                ) without rowid;
+                create index if not exists event_players_match on event_players (ext_id);
+            ''')
+            self.conn.commit()
+
+    # Interning and ids; callers hold self._lock
+
+    def _intern(self, value):
+        if not value:
+            return None
+        string_id = self._strings.get(value)
+        if string_id is None:
+            self.conn.execute('insert or ignore into strings (value) values (?)', (value,))
+            string_id, = self.conn.execute('select id from strings where value = ?', (value,)).fetchone()
+            self._strings[value] = string_id
+        return string_id
+
+    def _entity(self, table, cache, key, site, name, url, url_column):
+        entity_id = cache.get(key)
+        if entity_id is None:
+            row = self.conn.execute(f'select id from {table} where key = ?', (key,)).fetchone()
+            if row is None:
+                entity_id = self.conn.execute(f'''
+                    insert into {table} (key, site_id, name_id, {url_column}) values (?, ?, ?, ?) returning id
+                ''', (key, site, self._intern(name), self._intern(url))).fetchone()[0]
+                self.stats[table] += 1
+            else:
+                entity_id = row[0]
+                # Known from an earlier run: keep the spelling and picture seen now
+                self.conn.execute(f'''
+                    update {table} set name_id = coalesce(?, name_id), {url_column} = coalesce(?, {url_column})
+                    where id = ?
+                ''', (self._intern(name), self._intern(url), entity_id))
+            cache[key] = entity_id
+        return entity_id
+
+    def _team_id(self, name, logo_url=None):
+        site = site_id(logo_url, _TEAM_SITE_ID_RE)
+        normalized = normalize_name(name)
+        if site is None and not normalized:
+            return None
+        key = f'site:{site}' if site is not None else f'name:{normalized}'
+        return self._entity('teams', self._teams, key, site, (name or '').strip(), logo_url, 'logo_id')
+
+    def _player_id(self, name, photo_url=None):
+        site = site_id(photo_url, _PLAYER_SITE_ID_RE)
+        normalized = normalize_name(name)
+        if site is None and not normalized:
+            return None
+        key = f'site:{site}' if site is not None else f'name:{normalized}'
+        player_id = self._entity('players', self._players, key, site, (name or '').strip(), photo_url, 'photo_id')
+        if normalized and (normalized, player_id) not in self._names:
+            self.conn.execute('insert or ignore into player_names (name, player_id) values (?, ?)',
+                              (normalized, player_id))
+            self._names.add((normalized, player_id))
+        return player_id
+
+    def _namesakes(self, normalized, ext_id=None, team_side=None):
+        """Up to two ids of players seen under `normalized`; with `team_side`, only those who
+        have played for the team on that side of match `ext_id`"""
+        if team_side is None:
+            rows = self.conn.execute('select player_id from player_names where name = ? limit 2', (normalized,))
+        else:
+            rows = self.conn.execute(f'''
+                select distinct names.player_id from player_names names
+                join appearances on appearances.player_id = names.player_id
+                join matches on matches.ext_id = appearances.ext_id
+                where names.name = ? and case appearances.team_side
+                    when 'home' then matches.home_team_id else matches.away_team_id end
+                    = (select {team_side}_team_id from matches where ext_id = ?)
+                limit 2
+            ''', (normalized, ext_id))
+        return [player_id for player_id, in rows]
+
+    def _resolve(self, name, ext_id, team_side, lineup):
+        """Player id of an event name: this match's lineup, then the only player known under that
+        spelling (or the only one of them who played for this team), else a new player.
+
+        A name several players share that the team does not tell apart is
+        left unresolved (None): better no player than the wrong one.
+        """
+        normalized = normalize_name(name)
+        if not normalized:
+            return None
+        player_id = lineup.get((team_side, normalized)) or lineup.get((None, normalized))
+        if player_id is not None:
+            return player_id
+
+        candidates = self._namesakes(normalized)
+        if len(candidates) > 1 and team_side in ('home', 'away'):
+            candidates = self._namesakes(normalized, ext_id, team_side) or candidates
+        if len(candidates) == 1:
+            return candidates[0]
+        self.stats['unresolved'] += 1
+        return None if candidates else self._player_id(name)
+
+    # Writing
+
+    def write_game(self, game):
+        """Calendar game: which teams played the match"""
+        ext_id = ext_id_from_link(game.get('link'))
+        if not ext_id:
+            return
+        with self._lock:
+            home_id = self._team_id(game.get('home_team'), game.get('home_logo'))
+            away_id = self._team_id(game.get('away_team'), game.get('away_logo'))
+            self.conn.execute('''
+                insert into matches (ext_id, home_team_id, away_team_id) values (?, ?, ?)
+                on conflict (ext_id) do update set
+                    home_team_id = coalesce(excluded.home_team_id, home_team_id),
+                    away_team_id = coalesce(excluded.away_team_id, away_team_id)
+            ''', (ext_id, home_id, away_id))
+            self.conn.commit()
+        self.stats['games'] += 1
+
+    def write_match(self, match_data):
+        """MatchDetailParser.parse_match() result; replaces what was indexed for the match"""
+        ext_id = str(match_data['ext_id'])
+        with self._lock:
+            for table in ('appearances', 'events', 'event_players'):
+                self.conn.execute(f'delete from {table} where ext_id = ?', (ext_id,))
+
+            lineup = {}
+            appearances = []
+            for team_key, team_side in (('home_team', 'home'), ('away_team', 'away')):
+                team = match_data.get(team_key) or {}
+                for role in ROLES:
+                    for player in team.get(role) or []:
+                        player_id = self._player_id(player.get('player_name'), player.get('photo_url'))
+                        if player_id is None:
+                            continue
+                        normalized = normalize_name(player.get('player_name'))
+                        lineup[(team_side, normalized)] = lineup[(None, normalized)] = player_id
+                        shirt_number = (player.get('shirt_number') or '').strip()
+                        appearances.append((player_id, ext_id, team_side, role,
+                                            int(shirt_number) if shirt_number.isdigit() else None,
+                                            self._intern(player.get('position_group'))))
+            self.conn.executemany('''
+                insert or replace into appearances (player_id, ext_id, team_side, role, shirt_number, position_group_id)
+                values (?, ?, ?, ?, ?, ?)
+            ''', appearances)
+
+            events, event_players = [], set()
+            for seq, event in enumerate(match_data.get('events') or []):
+                team_side = event.get('team_side')
+                events.append((ext_id, seq, event.get('event_type'), event.get('minute'), event.get('half'),
+                               team_side, event.get('score')))
+                for field, role in EVENT_PLAYER_FIELDS:
+                    player_id = self._resolve(event.get(field), ext_id, team_side, lineup)
+                    if player_id is not None:
+                        event_players.add((player_id, ext_id, seq, role))
+            self.conn.executemany('''
+                insert into events (ext_id, seq, event_type, minute, half, team_side, score)
+                values (?, ?, ?, ?, ?, ?, ?)
+            ''', events)
+            self.conn.executemany('insert into event_players (player_id, ext_id, seq, role) values (?, ?, ?, ?)',
+                                  sorted(event_players))
+
+            self.conn.execute('''
+                insert into matches (ext_id, indexed_at) values (?, ?)
+                on conflict (ext_id) do update set indexed_at = excluded.indexed_at
+            ''', (ext_id, time.time()))
+            self.conn.commit()
+        self.stats['matches'] += 1
+
+    def write(self, record):
+        """A match_data dict (has `events`) or a calendar game"""
+        if 'events' in record:
+            self.write_match(record)
+        else:
+            self.write_game(record)
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    # Lookups
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            cursor = self.conn.execute(sql, params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def player(self, player_id):
+        rows = self._query('''
+            select p.id, p.site_id, name.value as name, photo.value as photo_url from players p
+            left join strings name on name.id = p.name_id
+            left join strings photo on photo.id = p.photo_id
+            where p.id = ?
+        ''', (player_id,))
+        return rows[0] if rows else None
+
+    def find_players(self, name):
+        """Players seen under `name`; a name without an exact match is searched as a substring"""
+        normalized = normalize_name(name)
+        rows = self._query('select player_id from player_names where name = ?', (normalized,))
+        if not rows:
+            rows = self._query('select distinct player_id from player_names where name like ? order by player_id',
+                               (f'%{normalized}%',))
+        return [self.player(row['player_id']) for row in rows]
+
+    def team(self, team_id):
+        rows = self._query('''
+            select t.id, t.site_id, name.value as name, logo.value as logo_url from teams t
+            left join strings name on name.id = t.name_id
+            left join strings logo on logo.id = t.logo_id
+            where t.id = ?
+        ''', (team_id,))
+        return rows[0] if rows else None
+
+    def player_events(self, player_id, event_type=None, role=None):
+        """Every event involving the player, in match and minute order"""
+        sql = '''
+            select ep.ext_id, ep.seq, ep.role, e.event_type, e.minute, e.half, e.team_side, e.score
+            from event_players ep join events e on e.ext_id = ep.ext_id and e.seq = ep.seq
+            where ep.player_id = ?
+        '''
+        params = [player_id]
+        if event_type:
+            sql += ' and e.event_type = ?'
+            params.append(event_type)
+        if role:
+            sql += ' and ep.role = ?'
+            params.append(role)
+        return self._query(sql + ' order by ep.ext_id, ep.seq', params)
+
+    def player_matches(self, player_id):
+        """Matches the player was in a lineup for, with the team he played for when known"""
+        return self._query('''
+            select a.ext_id, a.team_side, a.role, a.shirt_number, pg.value as position_group,
+                   case a.team_side when 'home' then m.home_team_id else m.away_team_id end as team_id
+            from appearances a
+            left join matches m on m.ext_id = a.ext_id
+            left join strings pg on pg.id = a.position_group_id
+            where a.player_id = ?
+            order by a.ext_id
+        ''', (player_id,))
+
+    def team_players(self, team_id):
+        """Players who appeared for the team, with how many matches"""
+        return self._query('''
+            select a.player_id, count(*) as matches from appearances a
+            join matches m on m.ext_id = a.ext_id
+            where (a.team_side = 'home' and m.home_team_id = ?) or (a.team_side = 'away' and m.away_team_id = ?)
+            group by a.player_id order by matches desc, a.player_id
+        ''', (team_id, team_id))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Player and team index of scraped matches")
+    arg_parser.add_argument('--db', default='entities.db', help="index file")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="index match and calendar game records")
+    build.add_argument('files', nargs='+', help="JSON Lines files (or match_<ext_id>.json files)")
+
+    player = commands.add_parser('player', help="a player's matches and events")
+    player.add_argument('name')
+    player.add_argument('--type', dest='event_type', help="only this event_type (goal, yellow_card, ...)")
+    args = arg_parser.parse_args(argv)
+
+    with EntityIndex(args.db) as index:
+        if args.command == 'build':
+            import json
+            from sinks import read_json_lines
+            started = time.perf_counter()
+            for path in args.files:
+                if path.endswith('.json'):
+                    with open(path, encoding='utf-8') as f:
+                        data = json.load(f)
+                    index.write_many(data if isinstance(data, list) else [data])
+                else:
+                    index.write_many(read_json_lines(path))
+            print(f"{index.stats} in {time.perf_counter() - started:.1f}s")
+            return
+
+        players = index.find_players(args.name)
+        if not players:
+            print(f"No player named {args.name!r}")
+        for player in players:
+            matches = index.player_matches(player['id'])
+            print(f"#{player['id']} {player['name']} (site id {player['site_id']}), {len(matches)} matches")
+            for event in index.player_events(player['id'], args.event_type):
+                print(f"  {event['ext_id']} {event['minute']:>5}' {event['event_type']:<20} {event['role']:<10}"
+                      f" {event['score'] or ''}")
+
+
+if __name__ == '__main__':
+    main()
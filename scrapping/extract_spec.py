@@ -0,0 +1,271 @@
+"""Declarative extraction specs, compiled once and run in a single DOM traversal.
+
+A Spec maps output keys to Fields; each Field names where the value lives
+(selector), what to take from the matched node (extract) and how to clean
+it up (post). Specs are built at import time, which compiles every
+selector; extracting an element then walks its subtree once and feeds each
+node to all field matchers at the same time, instead of running one XPath
+search (and one XPath compilation) per field:
+
+    NEWS_TITLE = Spec({
+        'title': Field('.main-link'),
+        'url': Field('.main-link', 'url:href'),
+        'news_type': Field('.main-link .tag-type', post=str.lower, default="oddiy"),
+    })
+    NEWS_TITLE.extract(item_element)
+
+Selectors are a small CSS subset: `tag`, `.class`, `tag.class.other`,
+separated by spaces for descendants, `:nth(n)` for the n-th match in
+document order (1-based, `td:nth(3)` is the third cell of a row), or `.`
+for the element itself. Anything starting with `(` or `/` or `./` is
+compiled as raw XPath and evaluated on its own, for conditions the CSS
+subset cannot express.
+
+extract is one of:
+    text        rendered text of the node (WebDriver `.text`)
+    html        inner HTML
+    attr:name   attribute value, None if missing
+    url:name    attribute resolved against the base URL, None if missing or empty
+    element     the node itself, for post-processors that need it
+    exists      True / False
+"""
+import re
+from functools import lru_cache
+
+from lxml import etree
+
+from dom import BASE_URL, absolute_url, element_text, inner_html
+
+
+# urljoin costs as much as the rest of a small field; the same logos (and the
+# lazy-load placeholder) come back on every calendar page
+_absolute_url = lru_cache(maxsize=4096)(absolute_url)
+
+_STEP_RE = re.compile(r'^([\w-]*)((?:\.[\w-]+)*)(?::nth\((\d+)\))?$')
+
+
+class _Step:
+    __slots__ = ('tag', 'classes', 'nth')
+
+    def __init__(self, token):
+        match = _STEP_RE.match(token)
+        if not match:
+            raise ValueError(f"Unsupported selector step {token!r}")
+        tag, classes, nth = match.groups()
+        self.tag = tag or None
+        self.classes = frozenset(classes.split('.')[1:])
+        self.nth = int(nth) if nth else None
+
+
+def compile_selector(selector):
+    """CSS subset -> list of steps, '.' -> [], raw XPath -> etree.XPath"""
+    selector = selector.strip()
+    if selector == '.':
+        return []
+    if selector.startswith(('(', '/', './')):
+        return etree.XPath(selector)
+    return [_Step(token) for token in selector.split()]
+
+
+class Field:
+    def __init__(self, selector='.', extract='text', post=None, default=None, many=False, required=False):
+        """
+        post: callable (or tuple of callables) applied to a found value; for
+              many=True it gets the whole list. A None result ends the chain.
+        default: value when nothing matched or post returned None; a callable
+                 is called each time.
+        required: the whole Spec extracts to None when this field is None.
+        """
+        self.selector = selector
+        self.extract = extract
+        self.post = post if isinstance(post, tuple) else ((post,) if post else ())
+        self.default = default
+        self.many = many
+        self.required = required
+
+        kind, _, self.attribute = extract.partition(':')
+        if kind not in ('text', 'html', 'attr', 'url', 'element', 'exists'):
+            raise ValueError(f"Unknown extract {extract!r}")
+        self.kind = kind
+        self.matcher = compile_selector(selector)
+
+    def _value(self, node, base_url):
+        if self.kind == 'text':
+            return element_text(node)
+        if self.kind == 'html':
+            return inner_html(node)
+        if self.kind == 'attr':
+            return node.get(self.attribute)
+        if self.kind == 'url':
+            value = node.get(self.attribute)
+            return _absolute_url(value, base_url) if value else None
+        return node
+
+    def _finish(self, value):
+        for post in self.post:
+            if value is None:
+                break
+            value = post(value)
+        return value
+
+    def resolve(self, nodes, base_url=BASE_URL):
+        """Field value from the nodes its selector matched"""
+        if self.kind == 'exists':
+            return bool(nodes)
+        if self.many:
+            value = self._finish([self._value(node, base_url) for node in nodes])
+        else:
+            value = self._finish(self._value(nodes[0], base_url)) if nodes else None
+
+        if value is None:
+            return self.default() if callable(self.default) else self.default
+        return value
+
+
+class _TrieNode:
+    """Selector steps shared by several fields; `fields` end at this node"""
+    __slots__ = ('branches', 'fields')
+
+    def __init__(self):
+        self.branches = []
+        self.fields = []
+
+    def branch(self, step):
+        for branch in self.branches:
+            if branch.tag == step.tag and branch.classes == step.classes:
+                return branch
+        branch = _Branch(step.tag, step.classes)
+        self.branches.append(branch)
+        return branch
+
+
+class _Branch:
+    """One tag/class test; `:nth()` variants of it share a single match counter"""
+    __slots__ = ('tag', 'classes', 'any', 'by_nth')
+
+    def __init__(self, tag, classes):
+        self.tag = tag
+        self.classes = classes
+        self.any = None
+        self.by_nth = {}
+
+
+class Spec:
+    """Ordered fields extracted from one element into a dict"""
+
+    def __init__(self, fields, when=None):
+        """when: selector that must match for the element to be extracted at all"""
+        self.fields = dict(fields)
+        self.when = Field(when, 'exists') if when else None
+
+        # Every CSS-subset selector goes into one trie, matched by a single traversal
+        self._root = _TrieNode()
+        self._walked = {}
+        matchers = ([self.when] if self.when else []) + list(self.fields.values())
+        for i, field in enumerate(matchers):
+            if not isinstance(field.matcher, list) or not field.matcher:
+                continue
+            node = self._root
+            for step in field.matcher:
+                branch = node.branch(step)
+                if step.nth is None:
+                    branch.any = node = branch.any or _TrieNode()
+                else:
+                    node = branch.by_nth.setdefault(step.nth, _TrieNode())
+            node.fields.append(i)
+            self._walked[i] = not field.many
+        self._stop_early = all(self._walked.values())
+
+        # `when` is checked first, before any field value is computed
+        self._plan = list(self.fields.items())
+        if self.when is not None:
+            self._plan.insert(0, (None, self.when))
+
+    def _walk(self, element):
+        """One pass over the subtree of `element`; returns matched nodes per field index"""
+        single = self._walked
+        found = {i: [] for i in single}
+        counts = {}
+        remaining = [len(single)]
+        stop_early = self._stop_early
+
+        def visit(node, active):
+            for child in node:
+                tag = child.tag
+                if not isinstance(tag, str):
+                    continue  # comments, processing instructions
+                classes = None
+                child_active = active
+
+                for trie in active:
+                    for branch in trie.branches:
+                        if branch.tag is not None and branch.tag != tag:
+                            continue
+                        if branch.classes:
+                            if classes is None:
+                                classes = set((child.get('class') or '').split())
+                            if not branch.classes <= classes:
+                                continue
+
+                        targets = [branch.any] if branch.any else []
+                        if branch.by_nth:
+                            counts[branch] = position = counts.get(branch, 0) + 1
+                            if position in branch.by_nth:
+                                targets.append(branch.by_nth[position])
+
+                        for target in targets:
+                            for i in target.fields:
+                                if single[i] and found[i]:
+                                    continue
+                                found[i].append(child)
+                                if single[i]:
+                                    remaining[0] -= 1
+                                    if stop_early and not remaining[0]:
+                                        # Every field has its node, the rest of the subtree is irrelevant
+                                        return True
+                            if target.branches:
+                                if child_active is active:
+                                    child_active = list(active)
+                                child_active.append(target)
+
+                if visit(child, child_active):
+                    return True
+            return False
+
+        if single:
+            visit(element, [self._root])
+        return found
+
+    def extract(self, element, base_url=BASE_URL):
+        found = self._walk(element)
+
+        result = {}
+        for i, (key, field) in enumerate(self._plan):
+            if i in found:
+                nodes = found[i]
+            elif not field.matcher:  # '.'
+                nodes = [element]
+            else:
+                nodes = field.matcher(element)
+                if not isinstance(nodes, list):
+                    nodes = [element] if nodes else []
+
+            if key is None:  # the `when` guard
+                if not nodes:
+                    return None
+                continue
+            value = field.resolve(nodes, base_url)
+            if value is None and field.required:
+                return None
+            result[key] = value
+        return result
+
+    def extract_all(self, elements, base_url=BASE_URL):
+        results = (self.extract(element, base_url) for element in elements)
+        return [result for result in results if result is not None]
+
+
+def non_empty(values):
+    """Drop empty strings from a many=True list; None if nothing is left"""
+    values = [value for value in values if value]
+    return values or None
@@ -0,0 +1,101 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import CacheMiss
+from metrics import PAGES, stage
+from resilience import Resilience
+
+
+DEFAULT_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+)
+
+
+class HttpFetcher:
+    """Browserless page fetcher on a pooled keep-alive requests.Session"""
+
+    def __init__(self, pool_size=10, timeout=15, user_agent=DEFAULT_USER_AGENT, cache=None, resilience=None):
+        """cache: optional http_cache.HttpCache shared by every parser using this fetcher
+        resilience: resilience.Resilience for retries, rate limits and circuit breaking
+                    (default: a new one; False sends every request exactly once)"""
+        self.timeout = timeout
+        self.cache = cache
+        if resilience is None:
+            resilience = Resilience(transient=(requests.Timeout, requests.ConnectionError))
+        self.resilience = resilience or None
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': user_agent,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'uz,ru;q=0.9,en;q=0.8',
+        })
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @property
+    def offline(self):
+        """Replaying from the cache only; callers must not fall back to a browser"""
+        return self.cache is not None and self.cache.offline
+
+    def get(self, url):
+        """Fetch a page and return its decoded HTML"""
+        if self.cache is None:
+            return self._decode(self._request(url))
+
+        entry = self.cache.lookup(url)
+        if entry and (entry['fresh'] or self.cache.offline):
+            self.cache.record('hit', url)
+            if not self.cache.offline:
+                # A replay never stores, so nothing is evicted; skip the write (shared by processes)
+                self.cache.touch(url)
+            PAGES.inc(source='cache')
+            return entry['body']
+        if self.cache.offline:
+            self.cache.record('miss', url)
+            raise CacheMiss(f"Not cached (offline mode): {url}")
+
+        response = self._request(url, self.cache.conditional_headers(entry))
+        if response.status_code == 304 and entry:
+            self.cache.record('revalidated', url)
+            self.cache.touch(url, refreshed=True)
+            PAGES.inc(source='cache')
+            return entry['body']
+
+        self.cache.record('miss', url)
+        body = self._decode(response)
+        self.cache.store(url, body, response.headers)
+        return body
+
+    def _request(self, url, headers=None):
+        with stage('navigation'):
+            if self.resilience is None:
+                response = self._send(url, headers)
+            else:
+                response = self.resilience.call(url, lambda: self._send(url, headers))
+        if response.status_code != 304:
+            PAGES.inc(source='http')
+        return response
+
+    def _send(self, url, headers=None):
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _decode(response):
+        if response.encoding is None or response.encoding.lower() == 'iso-8859-1':
+            # championat.asia serves UTF-8 without always declaring it
+            response.encoding = 'utf-8'
+        return response.text
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,138 +1,184 @@
 # OPTIMIZED MATCH PARSER - championat/services/match_parser.py
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+import atexit
 import json
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
-import threading
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from browser import new_chrome
+from crawl_state import day_status, game_key
+from metrics import ITEMS, stage
+from pool import BlockingPool
+from resilience import RetryPolicy
+from sinks import JsonLinesSink
+
+try:
+    from html_parsers import parse_calendar_html
+except ImportError:  # lxml o'rnatilmagan: faqat Selenium
+    parse_calendar_html = None
 
 
 logger = logging.getLogger(__name__)
 
 
-class MatchParserPool:
-    """WebDriver pool bilan parser"""
+class MatchParserPool(BlockingPool):
+    """WebDriver pool bilan parser.
+
+    Bo'sh driver bo'lmasa get_driver() kutadi (None qaytarmaydi), driverlar
+    max_uses marta yoki max_age soniyadan keyin qayta yaratiladi, berishdan
+    oldin esa tirikligi tekshiriladi.
+    """
 
-    def __init__(self, pool_size=2):
+    def __init__(self, pool_size=2, max_uses=50, max_age=30 * 60, acquire_timeout=120):
+        super().__init__(
+            factory=self._create_driver,
+            size=pool_size,
+            close=self._quit_driver,
+            check=self._is_alive,
+            max_uses=max_uses,
+            max_age=max_age,
+        )
         self.pool_size = pool_size
-        self.drivers = []
-        self.available_drivers = []
-        self.lock = threading.Lock()
+        self.acquire_timeout = acquire_timeout
         self.base_url = "https://championat.asia/oz/game-center/calendar"
 
     def _create_driver(self):
-        """Yangi driver yaratish"""
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--disable-web-security')
-        options.add_argument('--allow-running-insecure-content')
-        return webdriver.Chrome(options=options)
-
-    def get_driver(self):
-        """Pool dan driver olish"""
-        with self.lock:
-            if self.available_drivers:
-                return self.available_drivers.pop()
-            elif len(self.drivers) < self.pool_size:
-                driver = self._create_driver()
-                self.drivers.append(driver)
-                return driver
-            else:
-                # Kutish
-                return None
+        """Yangi driver yaratish (umumiy yengil profil)"""
+        return new_chrome(extra_args=('--disable-web-security', '--allow-running-insecure-content'))
 
-    def return_driver(self, driver):
-        """Driver ni poolga qaytarish"""
-        with self.lock:
-            self.available_drivers.append(driver)
+    @staticmethod
+    def _quit_driver(driver):
+        driver.quit()
 
-    def close_all(self):
-        """Barcha driverlarni yopish"""
-        with self.lock:
-            for driver in self.drivers:
-                try:
-                    driver.quit()
-                except:
-                    pass
-            self.drivers.clear()
-            self.available_drivers.clear()
+    @staticmethod
+    def _is_alive(driver):
+        """Driver va brauzer javob beryaptimi"""
+        try:
+            driver.execute_script("return 1")
+            return True
+        except WebDriverException:
+            return False
+
+    def get_driver(self, timeout=None):
+        """Pool dan driver olish (bo'sh driver bo'lguncha kutadi)"""
+        return self.acquire(self.acquire_timeout if timeout is None else timeout)
+
+    def return_driver(self, driver, broken=False):
+        """Driver ni poolga qaytarish"""
+        if broken:
+            self.discard(driver)
+        else:
+            self.release(driver)
 
 
 # Global pool
 parser_pool = MatchParserPool()
+atexit.register(parser_pool.close_all)
 
 
 class OptimizedMatchParser:
-    def __init__(self, use_pool=True):
+    def __init__(self, use_pool=True, driver=None, fetcher=None):
+        """fetcher (fetchers.HttpFetcher) berilsa kalendar brauzersiz, HTTP
+        orqali olinadi va driver umuman ochilmaydi"""
         self.base_url = "https://championat.asia/oz/game-center/calendar"
         self.use_pool = use_pool
-        self.driver = None
+        self.fetcher = fetcher
+        if fetcher is not None and parse_calendar_html is None:
+            raise RuntimeError("HTTP rejimi uchun lxml kerak")
+        # Tashqaridan berilgan driverni yopish/qaytarish chaqiruvchining ishi
+        self.driver = driver
+        self._external_driver = driver is not None
+        self.failed_dates = []
+        self.skipped_dates = []
+        # Kun darajasidagi qayta urinishlar orasidagi jitterli kutish
+        self.retry = RetryPolicy(base=1.0)
 
     def __enter__(self):
+        if self._external_driver or self.fetcher is not None:
+            return self
         if self.use_pool:
+            # Pool to'liq bo'lsa bo'shagan driverni kutamiz, ortiqcha Chrome ochmaymiz
             self.driver = parser_pool.get_driver()
-            if not self.driver:
-                # Pool to'liq bo'lsa, yangi driver yaratish
-                self.driver = self._create_single_driver()
         else:
             self.driver = self._create_single_driver()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._external_driver:
+            return
         if self.use_pool and self.driver:
-            parser_pool.return_driver(self.driver)
+            broken = exc_type is not None and issubclass(exc_type, WebDriverException)
+            parser_pool.return_driver(self.driver, broken=broken)
         elif self.driver:
             self.driver.quit()
+        self.driver = None
 
     def _create_single_driver(self):
         """Yakka driver yaratish"""
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--window-size=1920,1080')
-        return webdriver.Chrome(options=options)
+        return new_chrome()
 
     def get_games(self, date: str = None, sort: str = "any") -> List[Dict]:
         """O'yinlarni olish (optimized)"""
-        if not self.driver:
+        if not self.driver and self.fetcher is None:
             return []
 
-        if not date:
-            date = datetime.now().strftime("%d/%m/%Y")
-
-        url_date = self._convert_date_format(date)
-        url = f"{self.base_url}?sort={sort}&date={url_date}"
-
         try:
-            # Timeout qisqartirish
-            self.driver.set_page_load_timeout(15)
-            self.driver.get(url)
+            return self.fetch_games(date, sort)
+        except TimeoutException:
+            logger.warning(f"Timeout: {self._calendar_url(date, sort)}")
+            return []
+        except Exception as e:
+            logger.error(f"Parser error: {e}")
+            return []
 
-            # Sahifa yuklanishini kutish
+    def _calendar_url(self, date: str = None, sort: str = "any") -> str:
+        if not date:
+            date = datetime.now().strftime("%d/%m/%Y")
+        return f"{self.base_url}?sort={sort}&date={self._convert_date_format(date)}"
+
+    def fetch_games(self, date: str = None, sort: str = "any") -> List[Dict]:
+        """get_games bilan bir xil, lekin xatolikni yutmaydi (qayta urinish uchun).
+
+        Har bir o'yinga kalendar kuni 'date' (YYYY-MM-DD) sifatida qo'shiladi.
+        """
+        url = self._calendar_url(date, sort)
+
+        if self.fetcher is not None:
+            page_html = self.fetcher.get(url)
+            with stage('extraction'):
+                games = parse_calendar_html(page_html, url)
+            if games is not None:
+                ITEMS.inc(len(games), kind='game')
+                return self._with_date(games, date)
+            if self.driver is None or self.fetcher.offline:
+                raise ValueError(f"match-center-list topilmadi: {url}")
+
+        # Timeout qisqartirish
+        self.driver.set_page_load_timeout(15)
+        self.driver.get(url)
+
+        # Sahifa yuklanishini kutish
+        with stage('wait'):
             WebDriverWait(self.driver, 8).until(
                 EC.presence_of_element_located((By.CLASS_NAME, "match-center-list"))
             )
 
-            return self._parse_games_optimized()
+        with stage('extraction'):
+            games = self._parse_games_optimized()
+        ITEMS.inc(len(games), kind='game')
+        return self._with_date(games, date)
 
-        except TimeoutException:
-            logger.warning(f"Timeout: {url}")
-            return []
-        except Exception as e:
-            logger.error(f"Parser error: {e}")
-            return []
+    def _with_date(self, games: List[Dict], date: str = None) -> List[Dict]:
+        day = self._convert_date_format(date or datetime.now().strftime("%d/%m/%Y"))
+        for game in games:
+            game['date'] = day
+        return games
 
     def _convert_date_format(self, date: str) -> str:
         """DD/MM/YYYY -> YYYY-MM-DD"""
@@ -248,27 +294,139 @@ class OptimizedMatchParser:
             pass
         return None
 
-    def get_matches_for_date_range(self, start_date: str, end_date: str) -> List[Dict]:
-        """Bir necha kunlik ma'lumotlarni olish"""
-        all_games = []
+    def get_matches_for_date_range(self, start_date: str, end_date: str, workers: int = 1,
+                                   retries: int = 2, sort: str = "any", state=None) -> List[Dict]:
+        """Bir necha kunlik ma'lumotlarni olish.
+
+        workers > 1 bo'lsa kunlar alohida driver poolida parallel olinadi.
+        Natija sana tartibida, takroriy o'yinlar (havoladagi ext_id bo'yicha) olib tashlangan.
+        Muvaffaqiyatsiz kunlar qayta uriniladi, baribir o'xshamasa
+        self.failed_dates ga yoziladi va qolgan kunlar davom etadi.
 
+        state (crawl_state.CrawlState) berilsa, hali yangi bo'lgan kunlar
+        (masalan, barcha o'yinlari tugagan va olingan kunlar) o'tkazib
+        yuboriladi va self.skipped_dates ga yoziladi; qaytgan ro'yxatda faqat
+        shu safar olingan kunlar bo'ladi.
+        """
         start = datetime.strptime(start_date, "%d/%m/%Y")
         end = datetime.strptime(end_date, "%d/%m/%Y")
+        dates = [(start + timedelta(days=i)).strftime("%d/%m/%Y") for i in range((end - start).days + 1)]
+
+        self.failed_dates = []
+        self.skipped_dates = []
+        games_by_date = {}
+
+        if state is not None:
+            self.skipped_dates = [d for d in dates if not state.should_fetch(self._date_key(d))]
+            dates = [d for d in dates if d not in self.skipped_dates]
+
+        if workers <= 1:
+            for date_str in dates:
+                games_by_date[date_str] = self._fetch_day(date_str, sort, retries)
+        elif self.fetcher is not None:
+            # HTTP rejimida driver kerak emas, umumiy sessiya yetarli
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(self._fetch_day, date_str, sort, retries): date_str for date_str in dates}
+                for future in as_completed(futures):
+                    games_by_date[futures[future]] = future.result()
+        else:
+            day_pool = MatchParserPool(pool_size=workers)
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {
+                        executor.submit(self._fetch_day_pooled, day_pool, date_str, sort, retries): date_str
+                        for date_str in dates
+                    }
+                    for future in as_completed(futures):
+                        games_by_date[futures[future]] = future.result()
+            finally:
+                day_pool.close_all()
+
+        if state is not None:
+            for date_str in dates:
+                if date_str in self.failed_dates:
+                    continue
+                games = games_by_date.get(date_str, [])
+                state.record_games(games)
+                state.mark_fetched(self._date_key(date_str), games, status=day_status(games))
+
+        return self._merge_days(dates, games_by_date)
+
+    @staticmethod
+    def _date_key(date_str: str) -> str:
+        return f"date:{date_str}"
+
+    def _fetch_day(self, date_str: str, sort: str, retries: int) -> List[Dict]:
+        """Bitta kun, o'z driverimiz bilan, qayta urinishlar bilan"""
+        for attempt in range(retries + 1):
+            try:
+                return self.fetch_games(date_str, sort)
+            except Exception as e:
+                logger.warning(f"{date_str}: {attempt + 1}-urinish muvaffaqiyatsiz: {e}")
+                if attempt < retries:
+                    self._retry_sleep(attempt, e)
+
+        self.failed_dates.append(date_str)
+        return []
+
+    def _retry_sleep(self, attempt: int, error: Exception):
+        """Jitterli kutish; host circuiti ochiq bo'lsa (resilience.CircuitOpen) yopilguncha"""
+        self.retry.sleep(attempt, getattr(error, 'retry_in', None))
+
+    def _fetch_day_pooled(self, day_pool: MatchParserPool, date_str: str, sort: str, retries: int) -> List[Dict]:
+        """Bitta kun, pooldagi driver bilan; buzilgan driver har urinishda almashtiriladi"""
+        for attempt in range(retries + 1):
+            driver = None
+            broken = False
+            try:
+                driver = day_pool.get_driver()
+                return OptimizedMatchParser(driver=driver).fetch_games(date_str, sort)
+            except Exception as e:
+                broken = isinstance(e, WebDriverException) and not isinstance(e, TimeoutException)
+                logger.warning(f"{date_str}: {attempt + 1}-urinish muvaffaqiyatsiz: {e}")
+            finally:
+                # get_driver() xato bersa qaytaradigan driver yo'q
+                if driver is not None:
+                    day_pool.return_driver(driver, broken=broken)
+
+            if attempt < retries:
+                self.retry.sleep(attempt)
+
+        self.failed_dates.append(date_str)
+        return []
+
+    def _merge_days(self, dates: List[str], games_by_date: Dict[str, List[Dict]]) -> List[Dict]:
+        """Sana tartibida birlashtirish, o'yin havolasidagi ext_id bo'yicha takrorlarni olib tashlash.
+
+        Qatorda id bo'lmasa game['id'] vaqtdan yasaladi (game_<soniya>) va bir
+        soniyada o'qilgan o'yinlar uchun bir xil chiqadi; havolasiz o'yin
+        sana, vaqt va jamoalari bo'yicha taqqoslanadi.
+        """
+        all_games = []
+        seen_ids = set()
 
-        current = start
-        while current <= end:
-            date_str = current.strftime("%d/%m/%Y")
-            games = self.get_games(date=date_str)
-            all_games.extend(games)
-            current += timedelta(days=1)
+        for date_str in dates:
+            for game in games_by_date.get(date_str, []):
+                key = game_key(game, date_str)
+                if key in seen_ids:
+                    continue
+                seen_ids.add(key)
+                all_games.append(game)
+
+        if self.failed_dates:
+            self.failed_dates.sort(key=lambda d: datetime.strptime(d, "%d/%m/%Y"))
+            logger.error(f"Olinmagan kunlar: {', '.join(self.failed_dates)}")
 
         return all_games
 
 
 # Alias eski kodlar uchun
 if __name__ == '__main__':
-    with OptimizedMatchParser() as parser:
-        matches = parser.get_matches_for_date_range("15/07/2025", "15/09/2025")
-
-    for match in matches:
-        print(match)
\ No newline at end of file
+    # `with` ishlatilmaydi: workers > 1 kunlarni o'z driver poolida oladi, global pooldan Chrome kerak emas
+    parser = OptimizedMatchParser()
+    matches = parser.get_matches_for_date_range("15/07/2025", "15/09/2025", workers=4)
+
+    with JsonLinesSink("matches.jsonl") as sink:
+        for match in matches:
+            sink.write(match)
+            print(match)
\ No newline at end of file
@@ -1,19 +1,81 @@
+import argparse
+import logging
 import time
 import json
-from selenium import webdriver
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import re
 
+from browser import new_chrome
+from crawl_state import CrawlState
+from http_cache import HttpCache
+from metrics import ITEMS, REGISTRY, add_metrics_arguments, finish_metrics, metrics_from_args, stage
+from pool import BlockingPool
+from readiness import Readiness, TimingReport
+from resilience import CircuitOpen, Resilience
+from sinks import add_sink_arguments, sink_from_args
+
+try:
+    from html_parsers import parse_events_html, parse_fixture_status, parse_lineups_html
+except ImportError:  # lxml not installed: per-element Selenium parsing only
+    parse_events_html = parse_fixture_status = parse_lineups_html = None
+
+try:
+    from fetchers import HttpFetcher
+except ImportError:  # requests not installed: only the Selenium engine is available
+    HttpFetcher = None
+
+HTML_PARSING = parse_events_html is not None
+
+ENGINES = ('http', 'selenium')
+
+logger = logging.getLogger(__name__)
+
 
 class MatchDetailParser:
-    def __init__(self, headless=False):
+    base_url = "https://championat.asia/oz/game-center/fixture"
+
+    def __init__(self, headless=False, engine=None, fetcher=None, snapshot=None, timing=None, resilience=None):
+        """engine='http' fetches static HTML over a pooled session and only starts
+        Chrome when a page can't be parsed without it; engine='selenium' always
+        drives the browser.
+
+        snapshot=True makes the Selenium path read `driver.page_source` once per
+        page and parse it in-process instead of querying every row and cell
+        over WebDriver.
+
+        timing: readiness.TimingReport to collect page waits into (can be
+        shared between parsers).
+
+        resilience: resilience.Resilience for the http engine's requests and
+        the browser's navigation (default: the fetcher's, or a new one)."""
         self.driver = None
         self.wait = None
-        self.setup_driver(headless)
+        self.readiness = None
+        self.timing = timing or TimingReport()
+        self.headless = headless
+        self.snapshot = HTML_PARSING if snapshot is None else snapshot
+        if self.snapshot and not HTML_PARSING:
+            raise RuntimeError("Snapshot parsing needs `lxml` installed")
+        self.engine = engine or ('http' if HttpFetcher and HTML_PARSING else 'selenium')
+        if self.engine not in ENGINES:
+            raise ValueError(f"Unknown engine {self.engine!r}, expected one of {ENGINES}")
+
+        self.fetcher = fetcher
+        self._owns_fetcher = False
+        if self.engine == 'http':
+            if HttpFetcher is None or not HTML_PARSING:
+                raise RuntimeError("The http engine needs `requests` and `lxml` installed")
+            if self.fetcher is None:
+                self.fetcher = HttpFetcher(resilience=resilience)
+                self._owns_fetcher = True
+        # The browser goes through the same rate limiter and circuit breaker as the http engine
+        self.resilience = resilience or getattr(self.fetcher, 'resilience', None) or Resilience()
+        if self.engine != 'http':
+            self.setup_driver(headless)
 
         # Event type mappings based on CSS classes
         self.event_type_mapping = {
@@ -25,22 +87,34 @@ class MatchDetailParser:
         }
 
     def setup_driver(self, headless=False):
-        """Setup Chrome driver with options"""
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument(
-            '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-
-        self.driver = webdriver.Chrome(options=chrome_options)
+        """Start Chrome with the shared lean profile (browser.new_chrome)"""
+        self.driver = new_chrome(headless=headless)
         self.wait = WebDriverWait(self.driver, 15)
+        self.readiness = Readiness(self.driver, report=self.timing)
+
+    def _ensure_driver(self):
+        """Start Chrome on first use (the http engine only needs it as a fallback)"""
+        if self.driver is None:
+            self.setup_driver(self.headless)
+
+    def _fetch_html(self, url):
+        """Fetch a page with the http engine.
+
+        Request errors are raised, not answered with the browser: a 404,
+        retries used up or an open circuit (resilience.CircuitOpen) would
+        only send Chrome to the same failing host.
+        """
+        return self.fetcher.get(url)
+
+    def _navigate(self, url):
+        """driver.get under the host's rate limiter and circuit breaker"""
+        self.resilience.call(url, lambda: self.driver.get(url))
 
     def parse_match(self, ext_id):
-        """Parse match details for given ext_id"""
+        """Parse match details for given ext_id; None on failure.
+
+        resilience.CircuitOpen is raised instead: the match was not tried,
+        callers should back off rather than count it as failed."""
         try:
             match_data = {
                 'ext_id': ext_id,
@@ -57,29 +131,83 @@ class MatchDetailParser:
             lineups_data = self.parse_lineups(ext_id)
             match_data.update(lineups_data)
 
+            ITEMS.inc(kind='match')
             return match_data
 
+        except CircuitOpen:
+            raise
         except Exception as e:
-            print(f"Error parsing match {ext_id}: {str(e)}")
+            logger.error("Error parsing match %s: %s", ext_id, e)
             return None
 
     def parse_events(self, ext_id):
         """Parse match events from events section"""
-        main_url = f"https://championat.asia/oz/game-center/fixture/{ext_id}"
+        main_url = f"{self.base_url}/{ext_id}"
+
+        if self.engine == 'http':
+            page_html = self._fetch_html(main_url)
+            with stage('extraction'):
+                events = parse_events_html(page_html, self.event_type_mapping)
+            if events is not None:
+                logger.debug("Total events parsed: %d", len(events))
+                ITEMS.inc(len(events), kind='event')
+                return events
+            if self.fetcher.offline:
+                return []
+            logger.info("Events not available over HTTP for %s, falling back to Selenium", ext_id)
+
+        return self._parse_events_browser(main_url)
+
+    def parse_live(self, ext_id):
+        """Events and status ({'type', 'text'}) of a fixture, from one page load (live_tracker.py).
+
+        The status is read from the fixture's own header, so a match is known
+        to be over even when no calendar lists it any more.
+        """
+        main_url = f"{self.base_url}/{ext_id}"
+
+        if self.engine == 'http':
+            page_html = self._fetch_html(main_url)
+            with stage('extraction'):
+                events = parse_events_html(page_html, self.event_type_mapping)
+                status = parse_fixture_status(page_html)
+            if events is not None or self.fetcher.offline:
+                return events or [], status
+            logger.info("Events not available over HTTP for %s, falling back to Selenium", ext_id)
+
+        events = self._parse_events_browser(main_url)
+        if HTML_PARSING and self.driver is not None:
+            return events, parse_fixture_status(self.driver.page_source)
+        return events, {"type": "unknown", "text": "Noma'lum"}
+
+    def _parse_events_browser(self, main_url):
+        """Incidents of a fixture page loaded in Chrome"""
+        self._ensure_driver()
+        logger.debug("Loading main page: %s", main_url)
+        self._navigate(main_url)
 
         try:
-            self.driver.get(main_url)
-            print(f"Loading main page: {main_url}")
-            time.sleep(3)
 
-            # Wait for the events container to be present
+            # Wait for the events container, then for the incidents requests to settle
             try:
-                events_container = self.wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".game-incident-list"))
+                events_container = self.readiness.wait(
+                    'events_container',
+                    EC.presence_of_element_located((By.CSS_SELECTOR, ".game-incident-list")),
+                    budget=3,
                 )
             except TimeoutException:
-                print("Events container not found")
+                logger.warning("Events container not found: %s", main_url)
                 return []
+            self.readiness.network_idle('events_network_idle')
+
+            if self.snapshot:
+                # One round-trip for the whole DOM, the rest is parsed locally
+                page_source = self.driver.page_source
+                with stage('extraction'):
+                    events = parse_events_html(page_source, self.event_type_mapping) or []
+                logger.debug("Total events parsed: %d", len(events))
+                ITEMS.inc(len(events), kind='event')
+                return events
 
             # Make sure the events are visible
             self.driver.execute_script("""
@@ -89,83 +217,91 @@ class MatchDetailParser:
                     eventsList.style.visibility = 'visible';
                 }
             """)
-            time.sleep(1)
+            # The style change is synchronous, nothing to wait for
+            self.timing.record('events_visible', 0.0, budget=1)
 
             # Find the events table
             try:
                 incidents_table = events_container.find_element(By.CSS_SELECTOR, ".incidents-table")
             except NoSuchElementException:
-                print("Incidents table not found")
+                logger.warning("Incidents table not found: %s", main_url)
                 return []
 
-            events = []
-            current_half = None
+            with stage('extraction'):
+                events = self._parse_incident_rows(incidents_table)
+            logger.debug("Total events parsed: %d", len(events))
+            ITEMS.inc(len(events), kind='event')
+            return events
 
-            # Get all rows from the table
-            rows = incidents_table.find_elements(By.TAG_NAME, "tr")
-            print(f"Found {len(rows)} rows in incidents table")
+        except Exception as e:
+            logger.error("Error parsing events: %s", e)
+            return []
 
-            for row_index, row in enumerate(rows):
-                try:
-                    # Check if this is a half separator
-                    separator = row.find_elements(By.CSS_SELECTOR, ".table-separator")
-                    if separator:
-                        current_half = separator[0].text.strip()
-                        print(f"Half separator found: {current_half}")
-                        continue
+    def _parse_incident_rows(self, incidents_table):
+        """Events from the incidents table, one WebDriver query per row and cell"""
+        events = []
+        current_half = None
 
-                    # Get all cells in the row
-                    cells = row.find_elements(By.TAG_NAME, "td")
-                    if len(cells) < 5:  # Should have 5 columns based on HTML
-                        continue
+        # Get all rows from the table
+        rows = incidents_table.find_elements(By.TAG_NAME, "tr")
+        logger.debug("Found %d rows in incidents table", len(rows))
 
-                    # Get minute from the green cell (index 2)
-                    minute_cell = cells[2]
-                    if "green" not in minute_cell.get_attribute("class"):
-                        continue
+        for row_index, row in enumerate(rows):
+            try:
+                # Check if this is a half separator
+                separator = row.find_elements(By.CSS_SELECTOR, ".table-separator")
+                if separator:
+                    current_half = separator[0].text.strip()
+                    logger.debug("Half separator found: %s", current_half)
+                    continue
 
-                    minute = minute_cell.text.strip().replace("'", "")
-                    if not minute:
-                        continue
+                # Get all cells in the row
+                cells = row.find_elements(By.TAG_NAME, "td")
+                if len(cells) < 5:  # Should have 5 columns based on HTML
+                    continue
 
-                    print(f"Processing row {row_index + 1}: minute {minute}")
-
-                    # Check left side (home team) - cell index 0 and 1
-                    left_cell = cells[0]  # Player info
-                    left_icon_cell = cells[1]  # Event icon
-
-                    if left_cell.text.strip():  # If there's content in left cell
-                        event_icon = left_icon_cell.find_elements(By.CSS_SELECTOR, ".sm-event-icon")
-                        if event_icon:
-                            event_data = self._parse_event_from_cells(left_cell, event_icon[0], minute, current_half,
-                                                                      "home")
-                            if event_data:
-                                events.append(event_data)
-                                print(f"  Home event: {event_data['event_type']} - {event_data['player_name']}")
-
-                    # Check right side (away team) - cell index 3 and 4
-                    right_icon_cell = cells[3]  # Event icon
-                    right_cell = cells[4]  # Player info
-
-                    if right_cell.text.strip():  # If there's content in right cell
-                        event_icon = right_icon_cell.find_elements(By.CSS_SELECTOR, ".sm-event-icon")
-                        if event_icon:
-                            event_data = self._parse_event_from_cells(right_cell, event_icon[0], minute, current_half,
-                                                                      "away")
-                            if event_data:
-                                events.append(event_data)
-                                print(f"  Away event: {event_data['event_type']} - {event_data['player_name']}")
-
-                except Exception as e:
-                    print(f"Error parsing row {row_index + 1}: {str(e)}")
+                # Get minute from the green cell (index 2)
+                minute_cell = cells[2]
+                if "green" not in minute_cell.get_attribute("class"):
                     continue
 
-            print(f"Total events parsed: {len(events)}")
-            return events
+                minute = minute_cell.text.strip().replace("'", "")
+                if not minute:
+                    continue
 
-        except Exception as e:
-            print(f"Error parsing events: {str(e)}")
-            return []
+                logger.debug("Processing row %d: minute %s", row_index + 1, minute)
+
+                # Check left side (home team) - cell index 0 and 1
+                left_cell = cells[0]  # Player info
+                left_icon_cell = cells[1]  # Event icon
+
+                if left_cell.text.strip():  # If there's content in left cell
+                    event_icon = left_icon_cell.find_elements(By.CSS_SELECTOR, ".sm-event-icon")
+                    if event_icon:
+                        event_data = self._parse_event_from_cells(left_cell, event_icon[0], minute, current_half,
+                                                                  "home")
+                        if event_data:
+                            events.append(event_data)
+                            logger.debug("  Home event: %s - %s", event_data['event_type'], event_data['player_name'])
+
+                # Check right side (away team) - cell index 3 and 4
+                right_icon_cell = cells[3]  # Event icon
+                right_cell = cells[4]  # Player info
+
+                if right_cell.text.strip():  # If there's content in right cell
+                    event_icon = right_icon_cell.find_elements(By.CSS_SELECTOR, ".sm-event-icon")
+                    if event_icon:
+                        event_data = self._parse_event_from_cells(right_cell, event_icon[0], minute, current_half,
+                                                                  "away")
+                        if event_data:
+                            events.append(event_data)
+                            logger.debug("  Away event: %s - %s", event_data['event_type'], event_data['player_name'])
+
+            except Exception as e:
+                logger.warning("Error parsing row %d: %s", row_index + 1, e)
+                continue
+
+        return events
 
     def _parse_event_from_cells(self, player_cell, icon_element, minute, half, team_side):
         """Parse event data from player cell and icon element"""
@@ -186,8 +322,7 @@ class MatchDetailParser:
             if not cell_text:
                 return None
 
-            print(f"    Parsing cell text: '{cell_text}'")
-            print(f"    Event type: {event_type}")
+            logger.debug("    Parsing cell text: %r, event type: %s", cell_text, event_type)
 
             # Initialize variables
             player_name = ""
@@ -257,122 +392,150 @@ class MatchDetailParser:
             return event_data
 
         except Exception as e:
-            print(f"    Error parsing event cell: {str(e)}")
+            logger.warning("    Error parsing event cell: %s", e)
             return None
 
     def parse_lineups(self, ext_id):
         """Parse team lineups from lineup section"""
-        lineups_url = f"https://championat.asia/oz/game-center/fixture/lineup/load/{ext_id}"
+        lineups_url = f"{self.base_url}/lineup/load/{ext_id}"
+
+        if self.engine == 'http':
+            page_html = self._fetch_html(lineups_url)
+            with stage('extraction'):
+                teams_data = parse_lineups_html(page_html, self.event_type_mapping, lineups_url)
+            if teams_data is not None:
+                return teams_data
+            if self.fetcher.offline:
+                return {'home_team': {}, 'away_team': {}}
+            logger.info("Lineups not available over HTTP for %s, falling back to Selenium", ext_id)
+
+        self._ensure_driver()
+        self._navigate(lineups_url)
 
         try:
-            self.driver.get(lineups_url)
-            time.sleep(3)
 
             # Wait for lineup container to load
-            lineup_container = self.wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".lineup-layout"))
+            lineup_container = self.readiness.wait(
+                'lineup_container',
+                EC.presence_of_element_located((By.CSS_SELECTOR, ".lineup-layout")),
+                budget=3,
             )
+            self.readiness.network_idle('lineup_network_idle')
 
-            # Find both team lineups
-            lineup_sections = lineup_container.find_elements(By.CSS_SELECTOR, ".lineup")
+            if self.snapshot:
+                page_source = self.driver.page_source
+                with stage('extraction'):
+                    teams_data = parse_lineups_html(page_source, self.event_type_mapping, lineups_url)
+                return teams_data or {'home_team': {}, 'away_team': {}}
 
-            teams_data = {'home_team': {}, 'away_team': {}}
-            team_keys = ['home_team', 'away_team']
+            with stage('extraction'):
+                return self._parse_lineup_sections(lineup_container)
 
-            for i, lineup_section in enumerate(lineup_sections[:2]):
-                team_key = team_keys[i]
-                team_data = {
-                    'coach': '',
-                    'starting_lineup': [],
-                    'substitutes': []
-                }
+        except TimeoutException:
+            logger.warning("Timeout loading lineups for match %s", ext_id)
+            return {'home_team': {}, 'away_team': {}}
+        except Exception as e:
+            logger.error("Error parsing lineups: %s", e)
+            return {'home_team': {}, 'away_team': {}}
+
+    def _parse_lineup_sections(self, lineup_container):
+        """Both teams' lineups, one WebDriver query per row and cell"""
+        # Find both team lineups
+        lineup_sections = lineup_container.find_elements(By.CSS_SELECTOR, ".lineup")
+
+        teams_data = {'home_team': {}, 'away_team': {}}
+        team_keys = ['home_team', 'away_team']
+
+        for i, lineup_section in enumerate(lineup_sections[:2]):
+            team_key = team_keys[i]
+            team_data = {
+                'coach': '',
+                'starting_lineup': [],
+                'substitutes': []
+            }
 
-                # Parse each position group
-                separators = lineup_section.find_elements(By.CSS_SELECTOR, ".lineup-separator")
-                tables = lineup_section.find_elements(By.CSS_SELECTOR, ".lineup-table")
-
-                current_section = None
-
-                for j, table in enumerate(tables):
-                    if j < len(separators):
-                        section_name = separators[j].text.strip().lower()
-                        current_section = section_name
-
-                    # Parse players in this table
-                    rows = table.find_elements(By.TAG_NAME, "tr")
-
-                    for row in rows:
-                        try:
-                            cells = row.find_elements(By.TAG_NAME, "td")
-                            if len(cells) < 3:
-                                continue
-
-                            # Extract player data
-                            shirt_number = ''
-                            photo_url = ''
-                            player_name = ''
-                            event_icons = []
-
-                            # Get shirt number
-                            rank_span = row.find_elements(By.CSS_SELECTOR, ".rank")
-                            if rank_span:
-                                shirt_number = rank_span[0].text.strip()
-
-                            # Get photo URL
-                            img_elements = row.find_elements(By.TAG_NAME, "img")
-                            if img_elements:
-                                photo_url = img_elements[0].get_attribute('src')
-
-                            # Get player name
-                            if len(cells) >= 3:
-                                player_name = cells[2].text.strip()
-
-                            # Get event icons
-                            icon_elements = row.find_elements(By.CSS_SELECTOR, ".sm-event-icon")
-                            for icon in icon_elements:
-                                icon_classes = icon.get_attribute('class')
-                                for class_name, event_name in self.event_type_mapping.items():
-                                    if class_name in icon_classes:
-                                        event_icons.append(event_name)
-
-                            if not player_name:
-                                continue
-
-                            player_data = {
-                                'player_name': player_name,
-                                'shirt_number': shirt_number,
-                                'photo_url': photo_url,
-                                'event_icons': event_icons,
-                                'position_group': current_section
-                            }
-
-                            # Categorize player
-                            if current_section == 'murabbiy':  # Coach
-                                team_data['coach'] = player_name
-                            elif 'zaxira' in current_section.lower():  # Substitutes
-                                team_data['substitutes'].append(player_data)
-                            else:  # Starting lineup
-                                team_data['starting_lineup'].append(player_data)
-
-                        except Exception as e:
-                            print(f"Error parsing player row: {str(e)}")
+            # Parse each position group
+            separators = lineup_section.find_elements(By.CSS_SELECTOR, ".lineup-separator")
+            tables = lineup_section.find_elements(By.CSS_SELECTOR, ".lineup-table")
+
+            current_section = None
+
+            for j, table in enumerate(tables):
+                if j < len(separators):
+                    section_name = separators[j].text.strip().lower()
+                    current_section = section_name
+
+                # Parse players in this table
+                rows = table.find_elements(By.TAG_NAME, "tr")
+
+                for row in rows:
+                    try:
+                        cells = row.find_elements(By.TAG_NAME, "td")
+                        if len(cells) < 3:
                             continue
 
-                teams_data[team_key] = team_data
+                        # Extract player data
+                        shirt_number = ''
+                        photo_url = ''
+                        player_name = ''
+                        event_icons = []
+
+                        # Get shirt number
+                        rank_span = row.find_elements(By.CSS_SELECTOR, ".rank")
+                        if rank_span:
+                            shirt_number = rank_span[0].text.strip()
+
+                        # Get photo URL
+                        img_elements = row.find_elements(By.TAG_NAME, "img")
+                        if img_elements:
+                            photo_url = img_elements[0].get_attribute('src')
+
+                        # Get player name
+                        if len(cells) >= 3:
+                            player_name = cells[2].text.strip()
+
+                        # Get event icons
+                        icon_elements = row.find_elements(By.CSS_SELECTOR, ".sm-event-icon")
+                        for icon in icon_elements:
+                            icon_classes = icon.get_attribute('class')
+                            for class_name, event_name in self.event_type_mapping.items():
+                                if class_name in icon_classes:
+                                    event_icons.append(event_name)
+
+                        if not player_name:
+                            continue
 
-            return teams_data
+                        player_data = {
+                            'player_name': player_name,
+                            'shirt_number': shirt_number,
+                            'photo_url': photo_url,
+                            'event_icons': event_icons,
+                            'position_group': current_section
+                        }
+
+                        # Categorize player
+                        if current_section == 'murabbiy':  # Coach
+                            team_data['coach'] = player_name
+                        elif 'zaxira' in current_section.lower():  # Substitutes
+                            team_data['substitutes'].append(player_data)
+                        else:  # Starting lineup
+                            team_data['starting_lineup'].append(player_data)
+
+                    except Exception as e:
+                        logger.warning("Error parsing player row: %s", e)
+                        continue
 
-        except TimeoutException:
-            print(f"Timeout loading lineups for match {ext_id}")
-            return {'home_team': {}, 'away_team': {}}
-        except Exception as e:
-            print(f"Error parsing lineups: {str(e)}")
-            return {'home_team': {}, 'away_team': {}}
+            teams_data[team_key] = team_data
+
+        return teams_data
 
     def close(self):
-        """Close the browser"""
+        """Close the browser and the HTTP session"""
         if self.driver:
             self.driver.quit()
+            self.driver = None
+        if self.fetcher is not None and self._owns_fetcher:
+            self.fetcher.close()
 
     def __enter__(self):
         return self
@@ -381,35 +544,235 @@ class MatchDetailParser:
         self.close()
 
 
+class CrawlStats:
+    """Per-match latency and overall throughput of a crawl"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.latencies = []
+        self.failed = 0
+
+    def record(self, seconds, ok=True):
+        self.latencies.append(seconds)
+        if not ok:
+            self.failed += 1
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+
+        def percentile(p):
+            return latencies[min(count - 1, int(p * count))] if count else 0.0
+
+        return {
+            'matches': count,
+            'failed': self.failed,
+            'elapsed': elapsed,
+            'throughput': count / elapsed if elapsed else 0.0,
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'max': latencies[-1] if count else 0.0,
+        }
+
+
+def has_lineups(match_data):
+    """Both teams' starting lineups were parsed"""
+    return all((match_data.get(team_key) or {}).get('starting_lineup') for team_key in ('home_team', 'away_team'))
+
+
+def is_complete(match_data):
+    """Events and both teams' lineups were parsed; a failed or timed-out page load leaves them empty"""
+    return bool(match_data.get('events')) and has_lineups(match_data)
+
+
+def record_fetch(state, ext_id, match_data):
+    """state.mark_fetched(), unless that would keep a bad result; True if recorded.
+
+    Only matches the calendar gave a status (futbol_match.py with the same
+    state file) are recorded: without one a match counts as 'unknown' and
+    would be refetched every hour forever. A finished match is only recorded
+    once is_complete(), otherwise an empty load would be its final data.
+    """
+    entry = state.get(ext_id)
+    if entry is None or entry['status'] == 'unknown':
+        logger.warning("Match %s has no calendar status, not recorded in the crawl state", ext_id)
+        return False
+    if entry['status'] == 'finished' and not is_complete(match_data):
+        logger.warning("Match %s is finished but its events or lineups are empty, will refetch", ext_id)
+        return False
+    state.mark_fetched(ext_id, match_data)
+    return True
+
+
+def parse_matches(ext_ids, workers=4, engine=None, headless=True, acquire_timeout=None, stats=None, state=None,
+                  fetcher=None, timing=None):
+    """Parse many matches on a pool of `workers` parsers.
+
+    Yields (ext_id, match_data, seconds) as soon as each match finishes, in
+    completion order; match_data is None when parsing failed.
+
+    With a crawl_state.CrawlState, ext_ids that are still fresh (finished
+    and already fetched, or refreshed recently) are skipped, and successful
+    fetches are recorded (see record_fetch).
+
+    A `fetcher` (e.g. with an HttpCache) is shared by all http-engine workers.
+    """
+    if state is not None:
+        ext_ids = state.filter_stale(ext_ids)
+
+    # One rate limit and circuit per host for all workers
+    resilience = None if fetcher is not None and fetcher.resilience is not None else Resilience()
+    parser_pool = BlockingPool(
+        lambda: MatchDetailParser(headless=headless, engine=engine, fetcher=fetcher, timing=timing,
+                                  resilience=resilience),
+        size=workers,
+        close=lambda parser: parser.close(),
+    )
+
+    def work(ext_id):
+        with parser_pool.lease(acquire_timeout) as parser:
+            started = time.perf_counter()
+            try:
+                match_data = parser.parse_match(ext_id)
+            except CircuitOpen as e:
+                logger.error("Match %s not fetched: %s", ext_id, e)
+                match_data = None
+            return ext_id, match_data, time.perf_counter() - started
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(work, ext_id) for ext_id in ext_ids]
+        for future in as_completed(futures):
+            ext_id, match_data, seconds = future.result()
+            if state is not None and match_data is not None:
+                record_fetch(state, ext_id, match_data)
+            if stats is not None:
+                stats.record(seconds, ok=match_data is not None)
+            yield ext_id, match_data, seconds
+    finally:
+        # Stop queued matches if the consumer bails out early
+        executor.shutdown(wait=True, cancel_futures=True)
+        parser_pool.close_all()
+
+
+def print_match_summary(match_data):
+    ext_id = match_data['ext_id']
+    print(f"\nMatch {ext_id} Summary:")
+    print(f"Total events: {len(match_data['events'])}")
+    print(f"Home team starting lineup: {len(match_data['home_team'].get('starting_lineup', []))}")
+    print(f"Away team starting lineup: {len(match_data['away_team'].get('starting_lineup', []))}")
+
+    # Print all events
+    print(f"\nAll events:")
+    for i, event in enumerate(match_data['events'], 1):
+        assist_info = f" (Assist: {event['assist']})" if event.get('assist') else ""
+        score_info = f" Score: {event['score']}" if event.get('score') else ""
+        sub_info = f" (Out: {event['player_out']})" if event.get('player_out') else ""
+        print(
+            f"  {i}. {event['minute']}' ({event['half']}) - {event['event_type']} - {event['player_name']} ({event['team_side']}){assist_info}{score_info}{sub_info}")
+
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Parse championat.asia match details")
+    arg_parser.add_argument('ext_ids', nargs='*', help="match ext_ids to parse")
+    arg_parser.add_argument('-f', '--file', help="file with one ext_id per line")
+    arg_parser.add_argument('-w', '--workers', type=int, default=4, help="parallel parsers (default: 4)")
+    arg_parser.add_argument('--engine', choices=ENGINES, help="fetch engine (default: http when available)")
+    arg_parser.add_argument('-o', '--output',
+                            help="stream every match to this JSON Lines file instead of match_<ext_id>.json")
+    arg_parser.add_argument('--parquet', metavar='DIR', help="also write events/lineups Parquet tables to DIR")
+    arg_parser.add_argument('--entities', metavar='DB', help="also index players, teams and events in this SQLite file")
+    arg_parser.add_argument('--cache', help="HTTP cache directory shared by all workers (http engine)")
+    arg_parser.add_argument('--offline', action='store_true', help="replay pages from --cache only")
+    arg_parser.add_argument('--state', help="crawl state SQLite file; skips matches that are still fresh")
+    arg_parser.add_argument('--show-browser', action='store_true', help="run Chrome with a window")
+    add_sink_arguments(arg_parser)
+    add_metrics_arguments(arg_parser)
+    return arg_parser.parse_args(argv)
+
+
 # Usage example
-def main():
-    ext_id = "19438666"
-
-    with MatchDetailParser(headless=False) as parser:
-        match_data = parser.parse_match(ext_id)
-
-        if match_data:
-            # Save to JSON file
-            with open(f'match_{ext_id}.json', 'w', encoding='utf-8') as f:
-                json.dump(match_data, f, ensure_ascii=False, indent=2)
-
-            print(f"Match data saved to match_{ext_id}.json")
-            print(f"\nMatch {ext_id} Summary:")
-            print(f"Total events: {len(match_data['events'])}")
-            print(f"Home team starting lineup: {len(match_data['home_team'].get('starting_lineup', []))}")
-            print(f"Away team starting lineup: {len(match_data['away_team'].get('starting_lineup', []))}")
-
-            # Print all events
-            print(f"\nAll events:")
-            for i, event in enumerate(match_data['events'], 1):
-                assist_info = f" (Assist: {event['assist']})" if event.get('assist') else ""
-                score_info = f" Score: {event['score']}" if event.get('score') else ""
-                sub_info = f" (Out: {event['player_out']})" if event.get('player_out') else ""
-                print(
-                    f"  {i}. {event['minute']}' ({event['half']}) - {event['event_type']} - {event['player_name']} ({event['team_side']}){assist_info}{score_info}{sub_info}")
-        else:
-            print("Failed to parse match data")
+def main(argv=None):
+    args = parse_args(argv)
+    metrics_server = metrics_from_args(args)
+
+    ext_ids = list(args.ext_ids)
+    if args.file:
+        with open(args.file, encoding='utf-8') as f:
+            ext_ids.extend(line.strip() for line in f if line.strip())
+    if not ext_ids:
+        ext_ids = ["19438666"]
+
+    stats = CrawlStats()
+    timing = TimingReport()
+    state = CrawlState(args.state) if args.state else None
+
+    fetcher = None
+    if args.cache or args.offline:
+        if HttpFetcher is None:
+            raise SystemExit("--cache needs `requests` and `lxml` installed")
+        cache = HttpCache(args.cache or '.http_cache', offline=args.offline)
+        fetcher = HttpFetcher(pool_size=args.workers, cache=cache)
+
+    output = sink_from_args(args.output, args) if args.output else None
+    columns = None
+    if args.parquet:
+        from columnar import ColumnarSink
+        columns = ColumnarSink(args.parquet)
+    entities = None
+    if args.entities:
+        from entity_index import EntityIndex
+        entities = EntityIndex(args.entities)
+    try:
+        for ext_id, match_data, seconds in parse_matches(
+                ext_ids, workers=args.workers, engine=args.engine, headless=not args.show_browser,
+                stats=stats, state=state, fetcher=fetcher, timing=timing):
+            if not match_data:
+                logger.warning("Failed to parse match data for %s (%.2fs)", ext_id, seconds)
+                continue
+
+            if columns:
+                columns.write_match(match_data)
+            if entities:
+                entities.write_match(match_data)
+            if output:
+                output.write(match_data)
+                logger.info("Match %s written to %s (%.2fs)", ext_id, args.output, seconds)
+            else:
+                with stage('serialization'), open(f'match_{ext_id}.json', 'w', encoding='utf-8') as f:
+                    json.dump(match_data, f, ensure_ascii=False, indent=2)
+                logger.info("Match data saved to match_%s.json (%.2fs)", ext_id, seconds)
+
+            if len(ext_ids) == 1:
+                print_match_summary(match_data)
+    finally:
+        if output:
+            output.close()
+        if columns:
+            columns.close()
+        if entities:
+            print(f"Entities: {entities.stats}")
+            entities.close()
+        if state is not None:
+            state.close()
+        if fetcher is not None:
+            print(f"HTTP cache: {fetcher.cache.summary()}")
+            fetcher.close()
+            fetcher.cache.close()
+        finish_metrics(args, metrics_server)
+
+    if timing.waits:
+        timing.print_report()
+
+    summary = stats.summary()
+    if state is not None:
+        print(f"Skipped {len(ext_ids) - summary['matches']} of {len(ext_ids)} matches that are still fresh")
+    print(f"\n{summary['matches']} matches ({summary['failed']} failed) in {summary['elapsed']:.1f}s, "
+          f"{summary['throughput']:.2f} matches/s, "
+          f"latency p50 {summary['p50']:.2f}s / p95 {summary['p95']:.2f}s / max {summary['max']:.2f}s")
+    print(f"Metrics: {REGISTRY.summary()}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,59 +1,360 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 import json
+import logging
 import re
-import time
+
+from browser import new_chrome
+from crawl_state import CrawlState, news_key
+from metrics import ITEMS, REGISTRY, add_metrics_arguments, finish_metrics, metrics_from_args, stage
+from readiness import Readiness, TimingReport
+from resilience import Resilience
+from sinks import add_sink_arguments, sink_from_args
+
+
+try:
+    from html_parsers import next_page_url, parse_document, parse_news_details, parse_news_html, parse_news_page
+except ImportError:  # lxml o'rnatilmagan: faqat Selenium
+    parse_news_html = None
+
+
+logger = logging.getLogger(__name__)
+
+# Hamma "load-item" tugmalarini bir round-tripda bosish; arguments[0] dagi
+# havolali (takroriy) yangiliklar ochilmaydi
+_EXPAND_ALL_JS = """
+var skip = new Set(arguments[0] || []);
+var clicked = 0;
+document.querySelectorAll('.news-list .news-list-item').forEach(function (item) {
+    var btn = item.querySelector('.load-item');
+    var link = item.querySelector('.main-link');
+    if (btn && !btn.classList.contains('loaded') && !(link && skip.has(link.href))) {
+        btn.click();
+        clicked++;
+    }
+});
+return clicked;
+"""
+
+_NEWS_COUNT_JS = "return document.querySelectorAll('.news-list .news-list-item').length;"
+
+# Hali matni yuklanmagan yangiliklar soni (arguments[0] dagilardan tashqari)
+_PENDING_DETAILS_JS = """
+var skip = new Set(arguments[0] || []);
+var pending = 0;
+document.querySelectorAll('.news-list .news-list-item').forEach(function (item) {
+    var btn = item.querySelector('.load-item');
+    var link = item.querySelector('.main-link');
+    if (link && skip.has(link.href)) {
+        return;
+    }
+    if (btn && !btn.classList.contains('loaded') && !item.querySelector('.news-description-block .details p')) {
+        pending++;
+    }
+});
+return pending;
+"""
 
 
 class ChampionatParser:
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, fetcher=None, dedup=None):
+        """fetcher (fetchers.HttpFetcher) berilsa sahifa brauzersiz olinadi,
+        Chrome faqat kerak bo'lib qolsa ishga tushiriladi.
+
+        dedup (news_dedup.NewsDedup) berilsa avval ko'rilgan yoki biroz
+        tahrirlangan yangiliklar qaytarilmaydi: sarlavha + qisqa tavsif
+        bo'yicha takrorlarning detallari umuman ochilmaydi, qolganlari
+        detallari bilan (sarlavha + to'liq matn) yana tekshiriladi."""
         self.base_url = "https://championat.asia"
-        self.driver = self._setup_driver(headless)
-        self.wait = WebDriverWait(self.driver, 10)
+        self.headless = headless
+        self.fetcher = fetcher
+        # Brauzer ham fetcher bilan bir xil tezlik cheklovi va circuit breaker orqali
+        self.resilience = getattr(fetcher, 'resilience', None) or Resilience()
+        self.dedup = dedup
+        self.duplicates = 0
+        self.driver = None
+        self.wait = None
+        self.readiness = None
+        self.timing = TimingReport()
+        if fetcher is None:
+            self._ensure_driver()
+
+    def _ensure_driver(self):
+        """Driverni birinchi kerak bo'lganda yaratish"""
+        if self.driver is None:
+            self.driver = self._setup_driver(self.headless)
+            self.wait = WebDriverWait(self.driver, 10)
+            self.readiness = Readiness(self.driver, report=self.timing)
 
     def _setup_driver(self, headless):
-        """Chrome driver sozlash"""
-        options = Options()
-        if headless:
-            options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--window-size=1920,1080")
-        return webdriver.Chrome(options=options)
-
-    def get_news(self, url="https://championat.asia/oz"):
-        """Yangiliklar olish"""
+        """Chrome driver (umumiy yengil profil, browser.new_chrome)"""
+        return new_chrome(headless=headless)
+
+    def _navigate(self, url):
+        """driver.get host tezlik cheklovi va circuit breaker (resilience) orqali"""
+        self.resilience.call(url, lambda: self.driver.get(url))
+
+    def get_news(self, url="https://championat.asia/oz", batch_details=True):
+        """Yangiliklar olish.
+
+        batch_details=True: hamma detallar bir vaqtda ochiladi va bitta
+        page_source dan o'qiladi (har yangilik uchun alohida kutish yo'q).
+        HTTP rejimida statik HTMLda yo'q detallar parallel yuklanadi.
+        """
+        if self.fetcher is not None and parse_news_html is not None:
+            # So'rov xatolari (404, urinishlar tugagan, CircuitOpen) yutilmaydi: brauzer
+            # o'sha hostga yana murojaat qilardi. Selenium faqat sahifa o'qilmasa
+            page_html = self.fetcher.get(url)
+            with stage('extraction'):
+                pairs = parse_news_page(page_html, self.base_url)
+            if pairs is not None:
+                return self._drop_reposts(self._fill_details_parallel(self._drop_repeats(pairs)))
+            logger.info("news-list statik HTMLda yo'q, Seleniumga o'tamiz")
+            if self.fetcher.offline:
+                return []
+
+        self._ensure_driver()
+        self._navigate(url)
         try:
-            self.driver.get(url)
-            time.sleep(2)
-
-            news_list = self.wait.until(
-                EC.presence_of_element_located((By.CLASS_NAME, "news-list"))
+            news_list = self.readiness.wait(
+                'news_list',
+                EC.presence_of_element_located((By.CLASS_NAME, "news-list")),
+                budget=2,
+                initial_timeout=10,
             )
 
+            if batch_details and parse_news_html is not None:
+                fresh_keys = None
+                if self.dedup is not None:
+                    # Takrorlarni detallar ochilishidan oldin aniqlash
+                    pairs = parse_news_page(self.driver.page_source, self.base_url) or []
+                    fresh_keys = {news_key(news_data) for news_data, _ in self._drop_repeats(pairs)}
+                    skip = [news_data['url'] for news_data, _ in pairs
+                            if news_data.get('url') and news_key(news_data) not in fresh_keys]
+                    self._expand_all_details(skip)
+                else:
+                    self._expand_all_details()
+                page_source = self.driver.page_source
+                with stage('extraction'):
+                    news_items = parse_news_html(page_source, self.base_url) or []
+                if fresh_keys is not None:
+                    news_items = self._drop_reposts([news_data for news_data in news_items
+                                                     if news_key(news_data) in fresh_keys])
+                ITEMS.inc(len(news_items), kind='news')
+                return news_items
+
             elements = news_list.find_elements(By.CLASS_NAME, "news-list-item")
             news_items = []
 
-            for element in elements:
-                try:
-                    news_data = self._parse_news_item(element)
-                    if news_data:
-                        news_items.append(news_data)
-                except Exception as e:
-                    print(f"Yangilik parsing xatolik: {e}")
-                    continue
-
+            with stage('extraction'):
+                for element in elements:
+                    try:
+                        news_data = self._parse_news_item(element)
+                        if news_data:
+                            news_items.append(news_data)
+                    except Exception as e:
+                        logger.warning("Yangilik parsing xatolik: %s", e)
+                        continue
+
+            news_items = self._drop_reposts(news_items)
+            ITEMS.inc(len(news_items), kind='news')
             return news_items
 
         except Exception as e:
-            print(f"Umumiy xatolik: {e}")
+            logger.error("Umumiy xatolik: %s", e)
             return []
 
+    def iter_news(self, url="https://championat.asia/oz", max_pages=None, state=None,
+                  page_url="https://championat.asia/oz/news?page={page}"):
+        """Yangiliklarni yangisidan eskisiga qarab generator sifatida berish.
+
+        HTTP rejimida sahifalar (sahifadagi "next" havolasi, bo'lmasa page_url
+        shabloni) bo'yicha, Selenium rejimida cheksiz scroll orqali yuradi.
+        state (crawl_state.CrawlState) da bor yangilikka yetganda to'xtaydi,
+        shuning uchun odatda faqat eng yangi sahifa o'qiladi. Har bir
+        yangilik qabul qilingach state ga yoziladi.
+        """
+        if parse_news_html is None:
+            # lxml yo'q: faqat birinchi sahifa
+            for news_data in self.get_news(url, batch_details=False):
+                if state is not None and state.has_news(news_key(news_data)):
+                    return
+                yield news_data
+                if state is not None:
+                    state.mark_news(news_key(news_data))
+            return
+
+        if self.fetcher is not None:
+            pages = self._iter_pages_http(url, page_url, max_pages)
+        else:
+            pages = self._iter_pages_scroll(url, max_pages)
+
+        yielded = set()
+        for pairs in pages:
+            fresh = []
+            reached_seen = False
+            for news_data, detail_url in pairs:
+                key = news_key(news_data)
+                if key in yielded:
+                    continue
+                if state is not None and state.has_news(key):
+                    reached_seen = True
+                    break
+                fresh.append((news_data, detail_url))
+
+            # Detallar faqat yangi va takror bo'lmagan yangiliklar uchun olinadi
+            fresh = self._drop_repeats(fresh)
+            if self.fetcher is not None:
+                self._fill_details_parallel(fresh)
+            fresh_items = self._drop_reposts([news_data for news_data, _ in fresh])
+
+            ITEMS.inc(len(fresh_items), kind='news')
+            for news_data in fresh_items:
+                key = news_key(news_data)
+                yielded.add(key)
+                yield news_data
+                if state is not None:
+                    state.mark_news(key)
+
+            if reached_seen or not fresh:
+                return
+
+    def _iter_pages_http(self, url, page_url, max_pages):
+        page = 1
+        # Sahifada "next" havolasi bo'lsa shablon ishlatilmaydi
+        linked = False
+        while url and (max_pages is None or page <= max_pages):
+            try:
+                page_html = self.fetcher.get(url)
+            except Exception as e:
+                if page == 1:
+                    raise
+                logger.warning("%d-sahifa olinmadi, to'xtaymiz: %s", page, e)
+                return
+
+            with stage('extraction'):
+                pairs = parse_news_page(page_html, self.base_url)
+            if not pairs:
+                return
+            yield pairs
+
+            page += 1
+            next_url = next_page_url(page_html, self.base_url)
+            linked = linked or next_url is not None
+            url = next_url or (None if linked else page_url.format(page=page))
+
+    def _iter_pages_scroll(self, url, max_pages):
+        """Cheksiz scroll: har safar faqat yangi qo'shilgan yangiliklarni beradi"""
+        self._ensure_driver()
+        self._navigate(url)
+        self.readiness.wait(
+            'news_list',
+            EC.presence_of_element_located((By.CLASS_NAME, "news-list")),
+            budget=2,
+            initial_timeout=10,
+        )
+
+        consumed = 0
+        rounds = 0
+        while max_pages is None or rounds < max_pages:
+            skip = ()
+            if self.dedup is not None:
+                # Takroriy yangiliklarning detallari ochilmaydi (iter_news ularni baribir tashlab yuboradi)
+                pairs = parse_news_page(self.driver.page_source, self.base_url) or []
+                skip = [news_data['url'] for news_data, _ in pairs[consumed:]
+                        if news_data.get('url') and self.dedup.find(news_data, 'summary') is not None]
+            self._expand_all_details(skip)
+            page_source = self.driver.page_source
+            with stage('extraction'):
+                pairs = parse_news_page(page_source, self.base_url) or []
+            yield pairs[consumed:]
+            consumed = len(pairs)
+            rounds += 1
+
+            count = self.driver.execute_script(_NEWS_COUNT_JS)
+            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            grew = self.readiness.wait(
+                'news_scroll',
+                lambda driver: driver.execute_script(_NEWS_COUNT_JS) > count,
+                initial_timeout=10,
+                required=False,
+            )
+            if not grew:
+                return
+
+    def _expand_all_details(self, skip_urls=()):
+        """Barcha detallarni (skip_urls dagilardan tashqari) bir vaqtda ochib,
+        bitta kutish bilan yuklanishini kutish"""
+        skip_urls = list(skip_urls)
+        clicked = self.driver.execute_script(_EXPAND_ALL_JS, skip_urls)
+        if clicked:
+            self.readiness.wait(
+                'news_details_batch',
+                lambda driver: driver.execute_script(_PENDING_DETAILS_JS, skip_urls) == 0,
+                budget=clicked,
+                initial_timeout=10,
+                required=False,
+            )
+
+    def _is_repeat(self, news_data):
+        """Sarlavha + qisqa tavsif bo'yicha avval ko'rilgan yangilikmi (detallarsiz)"""
+        if self.dedup is None:
+            return False
+        duplicate_of = self.dedup.find(news_data, 'summary')
+        if duplicate_of is None:
+            return False
+        self.duplicates += 1
+        logger.debug("Takroriy yangilik: %s (%s)", news_data.get('title'), duplicate_of)
+        return True
+
+    def _drop_repeats(self, pairs):
+        """(item, detail_url) juftlaridan takroriy yangiliklarni olib tashlash"""
+        if self.dedup is None:
+            return pairs
+        return [(news_data, detail_url) for news_data, detail_url in pairs if not self._is_repeat(news_data)]
+
+    def _drop_reposts(self, news_items):
+        """Detallari olingan yangiliklarni to'liq matn bo'yicha tekshirish;
+        yangilari dedup indeksiga qo'shiladi"""
+        if self.dedup is None:
+            return news_items
+        unique = []
+        for news_data in news_items:
+            duplicate_of = self.dedup.find(news_data, 'content')
+            if duplicate_of is not None:
+                self.duplicates += 1
+                logger.debug("Qayta chop etilgan yangilik: %s (%s)", news_data.get('title'), duplicate_of)
+                continue
+            self.dedup.add(news_data)
+            unique.append(news_data)
+        return unique
+
+    def _fill_details_parallel(self, pairs, workers=8):
+        """Statik HTMLda detali yo'q yangiliklar uchun detal endpointlarini parallel olish"""
+        missing = [(news_data, detail_url) for news_data, detail_url in pairs
+                   if detail_url and 'details' not in news_data]
+
+        def load(detail_url):
+            try:
+                page_html = self.fetcher.get(detail_url)
+                with stage('extraction'):
+                    return parse_news_details(parse_document(page_html))
+            except Exception as e:
+                logger.warning("Details olishda xatolik (%s): %s", detail_url, e)
+                return None
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for (news_data, _), details in zip(missing, executor.map(load, [url for _, url in missing])):
+                    if details:
+                        news_data['details'] = details
+
+        return [news_data for news_data, _ in pairs]
+
     def _parse_news_item(self, element):
         """Bitta yangilik elementini parsing"""
         try:
@@ -62,6 +363,7 @@ class ChampionatParser:
             # Asosiy ma'lumotlar
             title_elem = summary_block.find_element(By.CLASS_NAME, "main-link")
             title = title_elem.text.strip()
+            url = title_elem.get_attribute("href")
 
             # Rasm URL
             try:
@@ -92,12 +394,17 @@ class ChampionatParser:
             except NoSuchElementException:
                 pass
 
+            # Takroriy yangilik: detallar ochilmaydi
+            if self._is_repeat({'title': title, 'url': url, 'summary': summary}):
+                return None
+
             # Detaillarni olish
             details = self._get_details(element)
 
             # Faqat kerakli fieldlar qaytarish
             result = {
                 'title': title,
+                'url': url,
                 'summary': summary,
                 'image_url': image_url,
                 'date_time': date_time,
@@ -109,7 +416,7 @@ class ChampionatParser:
             return {k: v for k, v in result.items() if v is not None}
 
         except Exception as e:
-            print(f"Element parsing xatolik: {e}")
+            logger.warning("Element parsing xatolik: %s", e)
             return None
 
     def _get_details(self, element):
@@ -121,7 +428,14 @@ class ChampionatParser:
             load_btn = element.find_element(By.CLASS_NAME, "load-item")
             if "loaded" not in load_btn.get_attribute("class"):
                 self.driver.execute_script("arguments[0].click();", load_btn)
-                time.sleep(1)
+                # Tugma "loaded" bo'lguncha yoki matn paydo bo'lguncha kutish
+                self.readiness.wait(
+                    'news_details',
+                    lambda driver: self._details_loaded(element, load_btn),
+                    budget=1,
+                    initial_timeout=5,
+                    required=False,
+                )
 
             # Description block
             desc_block = element.find_element(By.CLASS_NAME, "news-description-block")
@@ -163,10 +477,17 @@ class ChampionatParser:
                 pass
 
         except Exception as e:
-            print(f"Details olishda xatolik: {e}")
+            logger.warning("Details olishda xatolik: %s", e)
 
         return details if details else None
 
+    @staticmethod
+    def _details_loaded(element, load_btn):
+        """Detail matni yuklandimi"""
+        if "loaded" in (load_btn.get_attribute("class") or ""):
+            return True
+        return bool(element.find_elements(By.CSS_SELECTOR, ".news-description-block .details p"))
+
     def save_json(self, news_items, filename="championat_news.json"):
         """JSON saqlaish"""
         try:
@@ -183,17 +504,23 @@ class ChampionatParser:
         print("=" * 50)
 
         for i, news in enumerate(news_items, 1):
-            print(f"{i}. {news['title']}")
-            if news.get('date_time'):
-                print(f"   Sana: {news['date_time']}")
-            if news.get('details', {}).get('tags'):
-                print(f"   Teglar: {', '.join(news['details']['tags'])}")
-            print("-" * 50)
+            self.print_item(i, news)
+
+    @staticmethod
+    def print_item(i, news):
+        """Bitta yangilik qatorlari"""
+        print(f"{i}. {news['title']}")
+        if news.get('date_time'):
+            print(f"   Sana: {news['date_time']}")
+        if news.get('details', {}).get('tags'):
+            print(f"   Teglar: {', '.join(news['details']['tags'])}")
+        print("-" * 50)
 
     def close(self):
         """Driver yopish"""
-        if hasattr(self, 'driver'):
+        if getattr(self, 'driver', None) is not None:
             self.driver.quit()
+            self.driver = None
 
     def __del__(self):
         self.close()
@@ -201,30 +528,79 @@ class ChampionatParser:
 
 # Foydalanish
 def main():
-    parser = ChampionatParser(headless=True)
-
+    arg_parser = argparse.ArgumentParser(description="championat.asia yangiliklari")
+    arg_parser.add_argument('--cache', help="HTTP kesh papkasi (brauzersiz rejim)")
+    arg_parser.add_argument('--offline', action='store_true', help="faqat keshdan o'qish")
+    arg_parser.add_argument('--pages', type=int, default=1, help="nechta sahifa/scroll o'qilsin (0 = cheksiz)")
+    arg_parser.add_argument('--state', help="crawl state SQLite fayli; ko'rilgan yangilikka yetganda to'xtaydi")
+    arg_parser.add_argument('-o', '--output', default="championat_news.jsonl", help="JSON Lines fayl")
+    arg_parser.add_argument('--dedup', help="news_dedup SQLite fayli; takroriy va biroz o'zgartirilgan "
+                                            "yangiliklar tashlab yuboriladi")
+    arg_parser.add_argument('--index', help="news_search SQLite fayli; har bir yangilik qidiruv indeksiga "
+                                            "darhol qo'shiladi")
+    add_sink_arguments(arg_parser)
+    add_metrics_arguments(arg_parser)
+    args = arg_parser.parse_args()
+    metrics_server = metrics_from_args(args)
+
+    state = CrawlState(args.state) if args.state else None
+
+    fetcher = None
+    if args.cache or args.offline:
+        from fetchers import HttpFetcher
+        from http_cache import HttpCache
+        fetcher = HttpFetcher(cache=HttpCache(args.cache or '.http_cache', offline=args.offline))
+
+    dedup = None
+    if args.dedup:
+        from news_dedup import NewsDedup
+        dedup = NewsDedup(args.dedup)
+
+    index = None
+    if args.index:
+        from news_search import NewsIndex
+        index = NewsIndex(args.index)
+
+    parser = ChampionatParser(headless=True, fetcher=fetcher, dedup=dedup)
+
+    sink = sink_from_args(args.output, args)
     try:
         print("Yangiliklar olinmoqda...")
-        news_items = parser.get_news()
-
-        if news_items:
-            # Xulosani chop etish
-            parser.print_summary(news_items)
-
-            # JSON saqlaish
-            parser.save_json(news_items)
-
-            # Birinchi yangilik namunasi
-            print("\n=== BIRINCHI YANGILIK NAMUNASI ===")
-            print(json.dumps(news_items[0], ensure_ascii=False, indent=2))
-
+        print(f"\n=== CHAMPIONAT.ASIA YANGILIKLARI ===")
+        for i, news_data in enumerate(parser.iter_news(max_pages=args.pages or None, state=state), 1):
+            # Har bir yangilik darhol faylga yoziladi
+            sink.write(news_data)
+            if index is not None:
+                index.write(news_data)
+            if args.verbose:
+                parser.print_item(i, news_data)
+
+        if sink.records:
+            print(f"✓ {sink.records} yangilik {', '.join(sink.files) or args.output} ga saqlandi")
         else:
             print("Yangiliklar topilmadi!")
 
     except Exception as e:
         print(f"Xatolik: {e}")
     finally:
+        sink.close()
+        if parser.timing.waits:
+            parser.timing.print_report()
         parser.close()
+        if state is not None:
+            state.close()
+        if dedup is not None:
+            print(f"Takroriy yangiliklar: {parser.duplicates} ({dedup.stats})")
+            dedup.close()
+        if index is not None:
+            print(f"Qidiruv indeksi: {len(index)} yangilik ({args.index})")
+            index.close()
+        if fetcher is not None:
+            print(f"HTTP kesh: {fetcher.cache.summary()}")
+            fetcher.close()
+            fetcher.cache.close()
+        finish_metrics(args, metrics_server)
+        print(f"Metrikalar: {REGISTRY.summary()}")
 
 
 if __name__ == "__main__":
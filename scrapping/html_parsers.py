@@ -0,0 +1,409 @@
+import re
+import time
+
+from lxml import etree
+
+from dom import BASE_URL, absolute_url, element_text, find_all, find_first, has_class, parse_document
+from extract_spec import Field, Spec, non_empty
+
+
+def classify_event(icon_classes, event_type_mapping):
+    """Map `.sm-event-icon` classes to an event type name"""
+    for class_name, event_name in event_type_mapping.items():
+        if class_name in icon_classes:
+            return event_name
+    return "unknown"
+
+
+def build_event(event_type, cell_text, minute, half, team_side, score_text=None, gray_text=None):
+    """Build an event dict from the already extracted player cell contents"""
+    player_name = ""
+    assist = None
+    score = None
+    player_out = None
+
+    if event_type == "goal":
+        # For goals: "Marquinhos 1-0\n(Nail Umyarov )"
+        if score_text is not None:
+            score = score_text.strip()
+
+        if gray_text is not None:
+            assist = gray_text.strip().replace('(', '').replace(')', '').strip()
+
+        lines = cell_text.split('\n')
+        if lines:
+            player_name = lines[0].strip()
+            # Remove score from player name if it exists
+            player_name = re.sub(r'\s+\d+-\d+$', '', player_name).strip()
+
+    elif event_type == "substitution":
+        # For substitution: "Daniil Khlusevich\n(Pablo Solari)"
+        lines = cell_text.split('\n')
+        if len(lines) >= 2:
+            if gray_text is not None:
+                player_out = gray_text.strip().replace('(', '').replace(')', '').strip()
+
+            # For substitution, we'll create an event for the player coming in
+            player_name = lines[0].strip()
+
+    else:
+        # For cards and other events: just the player name
+        lines = cell_text.split('\n')
+        if lines:
+            player_name = lines[0].strip()
+
+    event_data = {
+        'minute': minute,
+        'half': half,
+        'event_type': event_type,
+        'player_name': player_name,
+        'team_side': team_side,
+        'assist': assist,
+        'score': score,
+        'details': cell_text
+    }
+
+    if event_type == "substitution" and player_out:
+        event_data['player_out'] = player_out
+
+    return event_data
+
+
+def _parse_event_cell(player_cell, icon_element, minute, half, team_side, event_type_mapping):
+    cell_text = element_text(player_cell)
+    if not cell_text:
+        return None
+
+    event_type = classify_event(icon_element.get('class') or '', event_type_mapping)
+
+    score_span = find_first(player_cell, 'score')
+    gray_span = find_first(player_cell, 'gray')
+
+    return build_event(
+        event_type, cell_text, minute, half, team_side,
+        score_text=element_text(score_span) if score_span is not None else None,
+        gray_text=element_text(gray_span) if gray_span is not None else None,
+    )
+
+
+def parse_events_html(page_html, event_type_mapping):
+    """Extract the incidents table of a fixture page.
+
+    Returns None when the page has no `.game-incident-list` (e.g. it is
+    rendered client side), so callers can fall back to a real browser.
+    """
+    root = parse_document(page_html)
+
+    events_container = find_first(root, 'game-incident-list')
+    if events_container is None:
+        return None
+
+    incidents_table = find_first(events_container, 'incidents-table')
+    if incidents_table is None:
+        return []
+
+    events = []
+    current_half = None
+
+    for row in find_all(incidents_table, tag='tr'):
+        separator = find_first(row, 'table-separator')
+        if separator is not None:
+            current_half = element_text(separator)
+            continue
+
+        cells = find_all(row, tag='td')
+        if len(cells) < 5:
+            continue
+
+        # Minute lives in the green cell (index 2)
+        if "green" not in (cells[2].get('class') or ''):
+            continue
+
+        minute = element_text(cells[2]).replace("'", "")
+        if not minute:
+            continue
+
+        # Home team: cells 0 (player) and 1 (icon); away team: cells 4 and 3
+        for player_cell, icon_cell, team_side in ((cells[0], cells[1], "home"), (cells[4], cells[3], "away")):
+            icon = find_first(icon_cell, 'sm-event-icon')
+            if icon is None:
+                continue
+            event_data = _parse_event_cell(player_cell, icon, minute, current_half, team_side, event_type_mapping)
+            if event_data:
+                events.append(event_data)
+
+    return events
+
+
+LINEUP_ROW = Spec({
+    'player_name': Field('td:nth(3)'),
+    'shirt_number': Field('.rank', default=''),
+    'photo_url': Field('img', 'url:src', default=''),
+    'icons': Field('.sm-event-icon', 'attr:class', many=True),
+}, when='td:nth(3)')
+
+
+def empty_lineups():
+    return {'home_team': {}, 'away_team': {}}
+
+
+def parse_lineups_html(page_html, event_type_mapping, base_url=BASE_URL):
+    """Extract both team lineups from the `/fixture/lineup/load/{ext_id}` fragment.
+
+    Returns None when the fragment has no `.lineup-layout`.
+    """
+    root = parse_document(page_html)
+
+    lineup_container = find_first(root, 'lineup-layout')
+    if lineup_container is None:
+        return None
+
+    teams_data = empty_lineups()
+    team_keys = ['home_team', 'away_team']
+
+    for team_key, lineup_section in zip(team_keys, find_all(lineup_container, 'lineup')):
+        team_data = {
+            'coach': '',
+            'starting_lineup': [],
+            'substitutes': []
+        }
+
+        separators = find_all(lineup_section, 'lineup-separator')
+        tables = find_all(lineup_section, 'lineup-table')
+        current_section = None
+
+        for j, table in enumerate(tables):
+            if j < len(separators):
+                current_section = element_text(separators[j]).lower()
+
+            for row in find_all(table, tag='tr'):
+                row_data = LINEUP_ROW.extract(row, base_url)
+                if row_data is None:
+                    continue
+
+                player_name = row_data['player_name']
+                event_icons = []
+                for icon_classes in row_data['icons']:
+                    for class_name, event_name in event_type_mapping.items():
+                        if class_name in (icon_classes or ''):
+                            event_icons.append(event_name)
+
+                if not player_name or current_section is None:
+                    continue
+
+                player_data = {
+                    'player_name': player_name,
+                    'shirt_number': row_data['shirt_number'],
+                    'photo_url': row_data['photo_url'],
+                    'event_icons': event_icons,
+                    'position_group': current_section
+                }
+
+                if current_section == 'murabbiy':  # Coach
+                    team_data['coach'] = player_name
+                elif 'zaxira' in current_section:  # Substitutes
+                    team_data['substitutes'].append(player_data)
+                else:  # Starting lineup
+                    team_data['starting_lineup'].append(player_data)
+
+        teams_data[team_key] = team_data
+
+    return teams_data
+
+
+def _game_status(cell, finished, cancelled):
+    if finished:
+        return {"type": "finished", "text": "Tugagan"}
+    elif cancelled:
+        return {"type": "cancelled", "text": "Bekor qilingan"}
+    elif _LIVE_MARKER(cell):
+        # Live match
+        return {"type": "live", "text": f"Davom etmoqda ({element_text(cell)})"}
+    else:
+        return {"type": "notstarted", "text": "Boshlanmagan"}
+
+
+_LIVE_MINUTE_RE = re.compile(r"^\d+(\+\d+)?'?$")
+
+
+def parse_fixture_status(page_html):
+    """Status of a fixture page, from its header (`.game-score .game-status`).
+
+    The same signals as a calendar row's status: the finished/cancelled
+    sprites or texts, and a red (live) marker or a running minute. A page
+    without the header is 'unknown'.
+    """
+    root = parse_document(page_html)
+    score = find_first(root, 'game-score')
+    if score is None:
+        return {"type": "unknown", "text": "Noma'lum"}
+    status = find_first(score, 'game-status')
+    text = element_text(status) if status is not None else ''
+    if find_first(score, 'matchcenter-sprite-finished') is not None or text == 'Tugagan':
+        return {"type": "finished", "text": "Tugagan"}
+    if find_first(score, 'matchcenter-sprite-cancelled') is not None or text == 'Bekor qilingan':
+        return {"type": "cancelled", "text": "Bekor qilingan"}
+    if _LIVE_MARKER(score) or text.startswith('Davom etmoqda') or _LIVE_MINUTE_RE.match(text):
+        return {"type": "live", "text": f"Davom etmoqda ({text})" if _LIVE_MINUTE_RE.match(text) else text}
+    return {"type": "notstarted", "text": "Boshlanmagan"}
+
+
+def _http_only(url):
+    return url if url.startswith('http') else None
+
+
+_LIVE_MARKER = etree.XPath("boolean(.//*[contains(@style, 'color:red')])")
+
+# Rows without the link cell (cells[7]) are skipped like in the Selenium parser
+GAME_ROW = Spec({
+    'id': Field('.', 'attr:id'),
+    'time': Field('td:nth(1)'),
+    'home_team': Field('td:nth(3)'),
+    'away_team': Field('td:nth(7)'),
+    'score': Field('td:nth(5)'),
+    'status_cell': Field('td:nth(2)', 'element'),
+    'finished': Field('td:nth(2) .matchcenter-sprite-finished', 'exists'),
+    'cancelled': Field('td:nth(2) .matchcenter-sprite-cancelled', 'exists'),
+    'home_logo': Field('td:nth(4) img', 'url:src', post=_http_only),
+    'away_logo': Field('td:nth(6) img', 'url:src', post=_http_only),
+    'link': Field('td:nth(8) a', 'url:href'),
+}, when='td:nth(8)')
+
+
+def parse_game_row(row, tournament, base_url=BASE_URL):
+    """Same dict as OptimizedMatchParser._parse_game_row_fast, from an lxml <tr>"""
+    game = GAME_ROW.extract(row, base_url)
+    if game is None:
+        return None
+
+    return {
+        'id': game['id'] or f"game_{int(time.time())}",
+        'tournament': tournament,
+        'time': game['time'],
+        'home_team': game['home_team'],
+        'away_team': game['away_team'],
+        'score': game['score'],
+        'status': _game_status(game['status_cell'], game['finished'], game['cancelled']),
+        'home_logo': game['home_logo'],
+        'away_logo': game['away_logo'],
+        'link': game['link'],
+    }
+
+
+def parse_calendar_html(page_html, base_url=BASE_URL):
+    """Extract all games of a game-center calendar page.
+
+    Returns None when the page has no `.match-center-list`.
+    """
+    root = parse_document(page_html)
+    if find_first(root, 'match-center-list') is None:
+        return None
+
+    tournaments = [element_text(element) for element in find_all(root, 'tourney-name')]
+
+    games = []
+    for i, table in enumerate(find_all(root, 'games-table', tag='table')):
+        tournament = tournaments[i] if i < len(tournaments) else "Unknown"
+        for row in find_all(table, tag='tr'):
+            game = parse_game_row(row, tournament, base_url)
+            if game:
+                games.append(game)
+
+    return games
+
+
+def _news_date(info_text):
+    date_match = re.search(r'(\d{1,2}\s+\w+,\s+\d{2}:\d{2})', info_text)
+    return date_match.group(1) if date_match else None
+
+
+def _news_source(source_text):
+    if ':' not in source_text:
+        return None
+    return source_text.split(':', 1)[1].strip() or None
+
+
+NEWS_DETAILS = Spec({
+    'full_text': Field('.news-description-block .details p', many=True, post=(non_empty, '\n\n'.join)),
+    'tags': Field('.news-description-block .tags a', many=True, post=non_empty),
+    'source': Field('.news-description-block .source-link .source', post=_news_source),
+}, when='.news-description-block')
+
+NEWS_ITEM = Spec({
+    'title': Field('.news-summary-block .main-link', required=True),
+    'url': Field('.news-summary-block .main-link', 'url:href'),
+    'summary': Field('.news-summary-block .summary'),
+    'image_url': Field('.news-summary-block img', 'url:src'),
+    'date_time': Field('.news-summary-block .info', post=_news_date),
+    'news_type': Field('.news-summary-block .main-link .tag-type', post=str.lower, default="oddiy"),
+}, when='.news-summary-block')
+
+
+def parse_news_details(element):
+    """full_text / tags / source of an already expanded news item, or None"""
+    details = NEWS_DETAILS.extract(element)
+    if details is None:
+        return None
+    details = {k: v for k, v in details.items() if v is not None}
+    return details if details else None
+
+
+def parse_news_item(element, base_url=BASE_URL):
+    """Same dict as ChampionatParser._parse_news_item, from an lxml `.news-list-item`"""
+    result = NEWS_ITEM.extract(element, base_url)
+    if result is None:
+        return None
+
+    if result['image_url']:
+        # Kept identical to the Selenium parser, which prefixes the already absolute `src`
+        result['image_url'] = base_url + result['image_url']
+    result['details'] = parse_news_details(element)
+
+    return {k: v for k, v in result.items() if v is not None}
+
+
+def news_detail_url(element, base_url=BASE_URL):
+    """Endpoint the `.load-item` button loads the description from, if it names one"""
+    load_btn = find_first(element, 'load-item')
+    if load_btn is None:
+        return None
+    for attribute in ('data-url', 'data-href', 'href'):
+        value = (load_btn.get(attribute) or '').strip()
+        if value and not value.startswith(('#', 'javascript:')):
+            return absolute_url(value, base_url)
+    return None
+
+
+def next_page_url(page_html, base_url=BASE_URL):
+    """Link to the next (older) page of a paginated list, if the page has one"""
+    root = parse_document(page_html) if isinstance(page_html, (str, bytes)) else page_html
+    links = root.xpath(
+        f"//a[@rel='next'] | //*[{has_class('pagination')}]//*[{has_class('next')}]/descendant-or-self::a"
+    )
+    for link in links:
+        href = (link.get('href') or '').strip()
+        if href and not href.startswith(('#', 'javascript:')):
+            return absolute_url(href, base_url)
+    return None
+
+
+def parse_news_page(page_html, base_url=BASE_URL):
+    """(item, detail_url) pairs of the page `.news-list`, or None if there is none"""
+    root = parse_document(page_html)
+
+    news_list = find_first(root, 'news-list')
+    if news_list is None:
+        return None
+
+    pairs = []
+    for element in find_all(news_list, 'news-list-item'):
+        news_data = parse_news_item(element, base_url)
+        if news_data:
+            pairs.append((news_data, news_detail_url(element, base_url)))
+    return pairs
+
+
+def parse_news_html(page_html, base_url=BASE_URL):
+    """All items of the page `.news-list`, or None if there is none"""
+    pairs = parse_news_page(page_html, base_url)
+    return None if pairs is None else [news_data for news_data, _ in pairs]
@@ -0,0 +1,201 @@
+"""On-disk HTTP response cache for championat.asia pages.
+
+Bodies are stored as files, metadata in a small SQLite index. Fresh entries
+(younger than the TTL of their URL class) are served without a request;
+stale ones are revalidated with If-None-Match / If-Modified-Since. With
+offline=True nothing goes to the network and pages are replayed from disk.
+
+    python http_cache.py [cache_dir]      # print cache size and hit/miss stats
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+
+# (url class, pattern, TTL seconds); first match wins
+URL_CLASSES = [
+    ('lineup', re.compile(r'/game-center/fixture/lineup/load/'), 6 * 60 * 60),
+    ('fixture', re.compile(r'/game-center/fixture/\d+'), 10 * 60),
+    ('calendar', re.compile(r'/game-center/calendar'), 5 * 60),
+    ('news_list', re.compile(r'championat\.asia/oz(/news)?/?(\?.*)?$'), 2 * 60),
+]
+DEFAULT_TTL = 10 * 60
+
+
+class CacheMiss(LookupError):
+    """Offline mode and the URL is not in the cache"""
+
+
+class HttpCache:
+    def __init__(self, directory='.http_cache', max_bytes=512 * 1024 * 1024, ttls=None, offline=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = ttls or {}
+        self.offline = offline
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, 'index.db'), check_same_thread=False)
+        self.conn.execute('pragma journal_mode=wal')
+        self.conn.execute('''
+            create table if not exists responses (
+                url text primary key,
+                url_class varchar(20) not null,
+                filename varchar(64) not null,
+                etag text,
+                last_modified text,
+                stored_at real not null,
+                accessed_at real not null,
+                size integer not null
+            )
+        ''')
+        self.conn.execute('create index if not exists responses_accessed on responses (accessed_at)')
+        self.conn.commit()
+
+    @staticmethod
+    def url_class(url):
+        for name, pattern, _ in URL_CLASSES:
+            if pattern.search(url):
+                return name
+        return 'other'
+
+    def ttl(self, url_class):
+        if url_class in self.ttls:
+            return self.ttls[url_class]
+        for name, _, ttl in URL_CLASSES:
+            if name == url_class:
+                return ttl
+        return DEFAULT_TTL
+
+    def lookup(self, url):
+        """Cached entry for `url` with its body, or None"""
+        with self._lock:
+            row = self.conn.execute('''
+                select url_class, filename, etag, last_modified, stored_at from responses where url = ?
+            ''', (url,)).fetchone()
+        if row is None:
+            return None
+
+        url_class, filename, etag, last_modified, stored_at = row
+        try:
+            with open(os.path.join(self.directory, filename), encoding='utf-8') as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+
+        return {
+            'url_class': url_class,
+            'body': body,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresh': time.time() - stored_at < self.ttl(url_class),
+        }
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record(self, event, url):
+        """Count a hit / miss / revalidated / stored event, overall and per URL class"""
+        with self._lock:
+            self.stats[event] += 1
+            self.stats[f'{self.url_class(url)}.{event}'] += 1
+
+    def touch(self, url, refreshed=False):
+        """Mark as recently used; refreshed=True also restarts its TTL (after a 304)"""
+        now = time.time()
+        with self._lock:
+            if refreshed:
+                self.conn.execute('update responses set accessed_at = ?, stored_at = ? where url = ?', (now, now, url))
+            else:
+                self.conn.execute('update responses set accessed_at = ? where url = ?', (now, url))
+            self.conn.commit()
+
+    def store(self, url, body, headers):
+        filename = hashlib.sha1(url.encode('utf-8')).hexdigest() + '.html'
+        path = os.path.join(self.directory, filename)
+        # A temp file of its own: threads or processes storing the same URL must not share one
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        now = time.time()
+        with self._lock:
+            self.conn.execute('''
+                insert or replace into responses
+                    (url, url_class, filename, etag, last_modified, stored_at, accessed_at, size)
+                values (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (url, self.url_class(url), filename, headers.get('ETag'), headers.get('Last-Modified'),
+                  now, now, os.path.getsize(path)))
+            self.conn.commit()
+        self.record('stored', url)
+        self.evict()
+
+    def total_bytes(self):
+        with self._lock:
+            return self.conn.execute('select coalesce(sum(size), 0) from responses').fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            total = self.conn.execute('select coalesce(sum(size), 0) from responses').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            evicted = []
+            for url, filename, size in self.conn.execute(
+                    'select url, filename, size from responses order by accessed_at'):
+                if total <= self.max_bytes:
+                    break
+                evicted.append((url, filename))
+                total -= size
+
+            self.conn.executemany('delete from responses where url = ?', [(url,) for url, _ in evicted])
+            self.conn.commit()
+            self.stats['evicted'] += len(evicted)
+
+        for _, filename in evicted:
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except FileNotFoundError:
+                pass
+
+    def summary(self):
+        with self._lock:
+            entries = self.conn.execute('select count(*) from responses').fetchone()[0]
+        lookups = self.stats['hit'] + self.stats['revalidated'] + self.stats['miss']
+        hit_rate = (self.stats['hit'] + self.stats['revalidated']) / lookups if lookups else 0.0
+        return {'entries': entries, 'bytes': self.total_bytes(), 'hit_rate': hit_rate, **self.stats}
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+if __name__ == '__main__':
+    cache = HttpCache(sys.argv[1] if len(sys.argv) > 1 else '.http_cache')
+    with cache._lock:
+        rows = cache.conn.execute('''
+            select url_class, count(*), sum(size) from responses group by url_class order by url_class
+        ''').fetchall()
+    for url_class, count, size in rows:
+        print(f"{url_class:>10}: {count} pages, {size / 1024:.0f} KiB")
+    print(f"{'total':>10}: {cache.total_bytes() / 1024:.0f} KiB")
+    cache.close()
@@ -0,0 +1,65 @@
+"""Convert the old pretty-printed JSON array dumps to JSON Lines.
+
+    python json2jsonl.py championat_news.json championat_news_selenium.json
+    python json2jsonl.py championat_news.json -o news.jsonl --compress gzip
+
+An existing output is not touched unless --append is given: the sinks
+append, and converting the same dump twice would store every record twice.
+"""
+import argparse
+import glob
+import json
+import os
+
+from sinks import COMPRESSIONS, add_sink_arguments, sink_from_args
+
+
+def convert(src, sink):
+    """Append every record of the JSON array in `src` to `sink`, returns the count"""
+    with open(src, encoding='utf-8') as f:
+        records = json.load(f)
+    if isinstance(records, dict):
+        records = [records]
+
+    sink.write_many(records)
+    return len(records)
+
+
+def existing_outputs(path, args):
+    """Files the sink for `path` would append to, or (rotating) add chunks next to"""
+    suffix = COMPRESSIONS[args.compress]
+    if args.rotate_mb or args.rotate_daily:
+        base, ext = os.path.splitext(path)
+        return sorted(glob.glob(f"{glob.escape(base)}-*{ext or '.jsonl'}{suffix}"))
+    return [path + suffix] if os.path.exists(path + suffix) else []
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="JSON array -> JSON Lines")
+    arg_parser.add_argument('files', nargs='+', help="JSON files holding an array (or a single object)")
+    arg_parser.add_argument('-o', '--output', help="one combined output file (default: <file>.jsonl next to each)")
+    arg_parser.add_argument('--append', action='store_true', help="add to existing output files")
+    add_sink_arguments(arg_parser)
+    args = arg_parser.parse_args()
+
+    outputs = [args.output] if args.output else [os.path.splitext(src)[0] + '.jsonl' for src in args.files]
+    existing = [path for output in outputs for path in existing_outputs(output, args)]
+    if existing and not args.append:
+        arg_parser.error(f"{', '.join(existing)} already exists; converting again would duplicate its records "
+                         f"(remove it, or pass --append)")
+
+    if args.output:
+        with sink_from_args(args.output, args) as sink:
+            for src in args.files:
+                print(f"{src}: {convert(src, sink)} records")
+        print(f"-> {', '.join(sink.files)}")
+        return
+
+    for src in args.files:
+        with sink_from_args(os.path.splitext(src)[0] + '.jsonl', args) as sink:
+            count = convert(src, sink)
+        print(f"{src}: {count} records -> {', '.join(sink.files) or '(empty)'}")
+
+
+if __name__ == '__main__':
+    main()
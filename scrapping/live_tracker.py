@@ -0,0 +1,333 @@
+"""Live match tracking: poll only live fixtures and push event deltas.
+
+Instead of re-running MatchDetailParser.parse_match (events + lineups) for
+a live game, the tracker re-reads only the incidents table, diffs it with
+the previous snapshot and notifies subscribers of new, changed and
+removed (e.g. a goal cancelled by VAR) events.
+
+Each match is polled on its own adaptive interval: right after a change it
+is polled every `min_interval` seconds, every quiet poll stretches the
+interval by `backoff` up to `max_interval`. The calendar is re-read every
+`calendar_interval` seconds to pick up games that went live and to stop
+tracking finished ones (after one last poll).
+
+Every poll also reads the fixture's own status, so a match stops being
+tracked once it is finished or cancelled, or is no longer live after it
+was, even without a calendar (ext_ids given on the command line) or when
+the calendar no longer lists it (a game still running at midnight drops
+off today's calendar). A match found through the calendar that is
+missing from a later calendar read is wound down as well.
+
+    tracker = LiveTracker()
+    tracker.subscribe(print, event_types={'goal', 'red_card'})
+    tracker.run()                       # until tracker.stop()
+
+    python live_tracker.py              # today's live games
+    python live_tracker.py 19438666 -o live.jsonl
+"""
+import argparse
+import heapq
+import logging
+import threading
+import time
+from collections import Counter
+
+from crawl_state import ext_id_from_link
+from metrics import add_metrics_arguments, finish_metrics, metrics_from_args
+
+
+logger = logging.getLogger(__name__)
+
+TRACKED_EVENTS = ('goal', 'red_card', 'second_yellow_card', 'yellow_card', 'substitution')
+
+
+def event_keys(events):
+    """Stable identity for each event: type, side, half and minute, numbered
+    when several identical ones share a minute"""
+    seen = Counter()
+    keyed = {}
+    for event in events:
+        base = (event.get('event_type'), event.get('team_side'), event.get('half'), event.get('minute'))
+        seen[base] += 1
+        keyed[base + (seen[base],)] = event
+    return keyed
+
+
+def diff_events(previous, current):
+    """Changes between two incident snapshots, in match order"""
+    before = event_keys(previous)
+    after = event_keys(current)
+
+    changes = []
+    for key, event in after.items():
+        if key not in before:
+            changes.append({'change': 'new', 'event': event})
+        elif before[key] != event:
+            changes.append({'change': 'changed', 'event': event, 'previous': before[key]})
+    for key, event in before.items():
+        if key not in after:
+            changes.append({'change': 'removed', 'event': event})
+    return changes
+
+
+class TrackedMatch:
+    def __init__(self, ext_id, interval):
+        self.ext_id = ext_id
+        self.interval = interval
+        self.events = None
+        self.polls = 0
+        self.finishing = False
+        self.status = None
+        self.was_live = False
+        # Found through the calendar: wound down when the calendar stops listing it
+        self.from_calendar = False
+
+
+class LiveTracker:
+    def __init__(self, parser=None, calendar=None, min_interval=10.0, max_interval=120.0, backoff=1.5,
+                 calendar_interval=60.0, event_types=TRACKED_EVENTS):
+        """
+        parser: MatchDetailParser used for the incidents table and status (default: http engine, no cache)
+        calendar: OptimizedMatchParser used to discover live games (default: http, no cache);
+                  None together with explicit track() calls disables discovery
+        event_types: event types diffed at all; subscribers can narrow it further
+        """
+        if parser is None:
+            from futbol_match_details import MatchDetailParser
+            parser = MatchDetailParser(engine='http')
+        self.parser = parser
+        self.calendar = calendar
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.calendar_interval = calendar_interval
+        self.event_types = set(event_types)
+
+        self.matches = {}
+        self.stats = Counter()
+        self._subscribers = []
+        self._queue = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def subscribe(self, callback, event_types=None, ext_ids=None):
+        """callback(change) for every change; change = {'ext_id', 'change', 'event'[, 'previous']}
+        plus {'change': 'finished'} when a match stops being tracked"""
+        self._subscribers.append((callback, set(event_types) if event_types else None,
+                                  {str(ext_id) for ext_id in ext_ids} if ext_ids else None))
+
+    def _emit(self, change):
+        event_type = change.get('event', {}).get('event_type')
+        for callback, event_types, ext_ids in self._subscribers:
+            if ext_ids is not None and change['ext_id'] not in ext_ids:
+                continue
+            if event_types is not None and event_type is not None and event_type not in event_types:
+                continue
+            try:
+                callback(change)
+            except Exception:
+                logger.exception("Subscriber failed on %s", change)
+
+    def track(self, ext_id, due=None, from_calendar=False):
+        ext_id = str(ext_id)
+        with self._lock:
+            if ext_id in self.matches:
+                return
+            match = self.matches[ext_id] = TrackedMatch(ext_id, self.min_interval)
+            match.from_calendar = from_calendar
+            heapq.heappush(self._queue, (due or time.monotonic(), ext_id))
+        logger.info("Tracking %s", ext_id)
+
+    def untrack(self, ext_id):
+        """Finish a match after one last poll"""
+        match = self.matches.get(str(ext_id))
+        if match is not None:
+            match.finishing = True
+
+    def refresh_live(self, games):
+        """Start tracking live games and wind down finished ones, from get_games results.
+
+        Matches found through the calendar that it no longer lists are wound
+        down too; an empty calendar (a failed read) untracks nothing.
+        """
+        listed = set()
+        for game in games:
+            ext_id = ext_id_from_link(game.get('link'))
+            if not ext_id:
+                continue
+            listed.add(ext_id)
+            status = game.get('status', {}).get('type')
+            if status == 'live':
+                self.track(ext_id, from_calendar=True)
+            elif ext_id in self.matches and status in ('finished', 'cancelled'):
+                self.untrack(ext_id)
+        if listed:
+            for ext_id, match in list(self.matches.items()):
+                if match.from_calendar and ext_id not in listed:
+                    logger.info("%s is no longer in the calendar", ext_id)
+                    self.untrack(ext_id)
+
+    def _update_status(self, match, status):
+        """Wind the match down once its own page says it is over, or no longer live after it was"""
+        match.status = status
+        if status == 'live':
+            match.was_live = True
+        elif status in ('finished', 'cancelled') or (match.was_live and status != 'unknown'):
+            if not match.finishing:
+                logger.info("%s is %s", match.ext_id, status)
+            match.finishing = True
+
+    def poll(self, ext_id):
+        """Read the incidents table and status once and emit the changes; returns the number of changes"""
+        match = self.matches[ext_id]
+        started = time.perf_counter()
+        events, status = self.parser.parse_live(ext_id)
+        events = [event for event in events or [] if event.get('event_type') in self.event_types]
+        self.stats['polls'] += 1
+        self.stats['poll_seconds'] += time.perf_counter() - started
+        match.polls += 1
+        self._update_status(match, (status or {}).get('type', 'unknown'))
+
+        if match.events is None:
+            # First look: everything so far is new to subscribers
+            changes = [{'change': 'new', 'event': event} for event in events]
+        elif match.events and not events:
+            # A page that failed to load reads as an empty table; keep the last snapshot
+            self.stats['empty_polls'] += 1
+            return 0
+        else:
+            changes = diff_events(match.events, events)
+
+        match.events = events
+        for change in changes:
+            change['ext_id'] = ext_id
+            self.stats[change['change']] += 1
+            self._emit(change)
+        return len(changes)
+
+    def _next_interval(self, match, changed):
+        if changed:
+            return self.min_interval
+        return min(self.max_interval, match.interval * self.backoff)
+
+    def _refresh_calendar(self):
+        try:
+            self.refresh_live(self.calendar.fetch_games())
+        except Exception as e:
+            logger.warning("Calendar refresh failed: %s", e)
+
+    def run_once(self, now=None):
+        """Poll every match that is due; returns seconds until the next one is"""
+        now = now or time.monotonic()
+        while True:
+            with self._lock:
+                if not self._queue or self._queue[0][0] > now:
+                    break
+                _, ext_id = heapq.heappop(self._queue)
+            match = self.matches[ext_id]
+
+            try:
+                changed = self.poll(ext_id)
+            except Exception as e:
+                logger.warning("Poll of %s failed: %s", ext_id, e)
+                changed = 0
+
+            if match.finishing:
+                with self._lock:
+                    del self.matches[ext_id]
+                self._emit({'ext_id': ext_id, 'change': 'finished', 'events': match.events or []})
+                logger.info("Stopped tracking %s after %d polls", ext_id, match.polls)
+                continue
+
+            match.interval = self._next_interval(match, changed)
+            with self._lock:
+                heapq.heappush(self._queue, (time.monotonic() + match.interval, ext_id))
+
+        with self._lock:
+            return self._queue[0][0] - time.monotonic() if self._queue else None
+
+    def run(self):
+        """Poll until stop(); discovers live games from the calendar when one is set"""
+        self._stop.clear()
+        next_calendar = time.monotonic()
+        while not self._stop.is_set():
+            if self.calendar is not None and time.monotonic() >= next_calendar:
+                self._refresh_calendar()
+                next_calendar = time.monotonic() + self.calendar_interval
+
+            wait = self.run_once()
+            if wait is None:
+                if self.calendar is None:
+                    break  # nothing tracked and nothing to discover
+                wait = next_calendar - time.monotonic()
+            if self.calendar is not None:
+                wait = min(wait, next_calendar - time.monotonic())
+            self._stop.wait(max(0.0, wait))
+
+    def stop(self):
+        self._stop.set()
+
+    def close(self):
+        self.stop()
+        self.parser.close()
+
+
+def print_change(change):
+    if change['change'] == 'finished':
+        print(f"[{change['ext_id']}] finished, {len(change['events'])} events")
+        return
+    event = change['event']
+    assist = f" ({event['assist']})" if event.get('assist') else ""
+    print(f"[{change['ext_id']}] {change['change']:>7}: {event['minute']}' {event['event_type']} "
+          f"{event['player_name']}{assist} ({event['team_side']})")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Track live championat.asia matches")
+    arg_parser.add_argument('ext_ids', nargs='*', help="fixtures to track (default: live games of today's calendar)")
+    arg_parser.add_argument('--min-interval', type=float, default=10.0)
+    arg_parser.add_argument('--max-interval', type=float, default=120.0)
+    arg_parser.add_argument('--events', nargs='+', default=list(TRACKED_EVENTS), help="event types to report")
+    arg_parser.add_argument('-o', '--output', help="also append every change to this JSON Lines file")
+    add_metrics_arguments(arg_parser)
+    args = arg_parser.parse_args(argv)
+
+    metrics_server = metrics_from_args(args, default_level=logging.INFO)
+
+    from fetchers import HttpFetcher
+    fetcher = HttpFetcher()
+
+    calendar = None
+    if not args.ext_ids:
+        from futbol_match import OptimizedMatchParser
+        calendar = OptimizedMatchParser(fetcher=fetcher)
+
+    from futbol_match_details import MatchDetailParser
+    tracker = LiveTracker(MatchDetailParser(engine='http', fetcher=fetcher), calendar,
+                          min_interval=args.min_interval, max_interval=args.max_interval, event_types=args.events)
+    tracker.subscribe(print_change)
+
+    sink = None
+    if args.output:
+        from sinks import JsonLinesSink
+        sink = JsonLinesSink(args.output, fsync_every=1)
+        tracker.subscribe(sink.write)
+
+    for ext_id in args.ext_ids:
+        tracker.track(ext_id)
+
+    try:
+        tracker.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        tracker.close()
+        fetcher.close()
+        if sink is not None:
+            sink.close()
+        finish_metrics(args, metrics_server)
+        print(f"Tracker: {dict(tracker.stats)}")
+
+
+if __name__ == '__main__':
+    main()
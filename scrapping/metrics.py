@@ -0,0 +1,297 @@
+"""In-process metrics for the scrapers, exported as Prometheus text or OpenMetrics.
+
+The scrapers record into the module-level REGISTRY:
+
+    scraper_stage_seconds{stage}            histogram: navigation, wait, extraction, serialization
+    scraper_pages_total{source}             pages read: http, cache, selenium
+    scraper_items_total{kind}               records produced: match, event, news, ...
+    scraper_webdriver_commands_total{command}  WebDriver round-trips (browser.LeanChrome)
+    scraper_errors_total{stage}             exceptions raised inside a stage
+
+    with stage('extraction'):
+        events = parse_events_html(page_html)
+    PAGES.inc(source='http')
+
+A CLI exports them with add_metrics_arguments/metrics_from_args: --metrics
+FILE writes the text format at exit (e.g. for node_exporter's textfile
+collector, or OpenMetrics for a .om file), --metrics-port serves
+/metrics while it runs. -v/-vv raise log verbosity; hot loops log
+with `logger.debug("... %s", value)`, so at the default level they
+pay for neither string formatting nor I/O.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def total(self):
+        return sum(self._values.values())
+
+    def samples(self, openmetrics=False):
+        with self._lock:
+            values = sorted(self._values.items())
+        name = self.name + '_total'
+        return [f'{name}{_label_text(self.labels, key)} {_number(value)}' for key, value in values]
+
+
+class Gauge(_Metric):
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels))
+
+    def samples(self, openmetrics=False):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_label_text(self.labels, key)} {_number(value)}' for key, value in values]
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket counts, cumulated only when rendering; then sum and count
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def stats(self, **labels):
+        """(count, sum) of one label set"""
+        entry = self._values.get(self._key(labels))
+        return (entry[2], entry[1]) if entry else (0, 0.0)
+
+    def samples(self, openmetrics=False):
+        with self._lock:
+            values = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{_label_text(self.labels, key, [("le", _number(float(bound)))])} '
+                             f'{cumulative}')
+            lines.append(f'{self.name}_sum{_label_text(self.labels, key)} {_number(total)}')
+            lines.append(f'{self.name}_count{_label_text(self.labels, key)} {count}')
+        return lines
+
+
+class _Timer:
+    """Observes the time spent in a `with` block; exceptions also count as stage errors"""
+
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        if exc_type is not None and self.histogram is STAGE_SECONDS:
+            ERRORS.inc(**self.labels)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter, name, help, labels)
+
+    def gauge(self, name, help, labels=()):
+        return self._register(Gauge, name, help, labels)
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help, labels, buckets=buckets)
+
+    def render(self, openmetrics=False):
+        """Prometheus text exposition format 0.0.4, or OpenMetrics 1.0"""
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            family = name if openmetrics or metric.type != 'counter' else name + '_total'
+            lines.append(f'# HELP {family} {_escape(metric.help)}')
+            lines.append(f'# TYPE {family} {metric.type}')
+            lines.extend(metric.samples(openmetrics))
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path, openmetrics=None):
+        """Write the exposition atomically; `.om` files get OpenMetrics unless told otherwise"""
+        if openmetrics is None:
+            openmetrics = path.endswith('.om')
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render(openmetrics))
+        os.replace(temp_path, path)
+
+    def serve(self, port, host=''):
+        """Serve /metrics from a daemon thread; returns the server (call .shutdown() to stop)"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                openmetrics = 'application/openmetrics-text' in self.headers.get('Accept', '')
+                body = registry.render(openmetrics).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+        return server
+
+    def summary(self):
+        """Totals for a one-line report at the end of a run"""
+        elapsed = time.time() - self.started
+        pages = PAGES.total()
+        stages = {}
+        for key, (_, total, count) in list(STAGE_SECONDS._values.items()):
+            stages[key[0]] = {'count': count, 'seconds': round(total, 3)}
+        return {
+            'pages': pages,
+            'pages_per_sec': round(pages / elapsed, 2) if elapsed else 0.0,
+            'webdriver_commands': WEBDRIVER_COMMANDS.total(),
+            'errors': ERRORS.total(),
+            'stages': stages,
+        }
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram('scraper_stage_seconds', "Time spent per scraping stage", ['stage'])
+PAGES = REGISTRY.counter('scraper_pages', "Pages read", ['source'])
+ITEMS = REGISTRY.counter('scraper_items', "Records produced", ['kind'])
+WEBDRIVER_COMMANDS = REGISTRY.counter('scraper_webdriver_commands', "WebDriver round-trips", ['command'])
+ERRORS = REGISTRY.counter('scraper_errors', "Exceptions raised inside a stage", ['stage'])
+START_TIME = REGISTRY.gauge('scraper_start_time_seconds', "Unix time the process started")
+START_TIME.set(REGISTRY.started)
+
+
+def stage(name):
+    """Context manager timing one stage: navigation, wait, extraction or serialization"""
+    return _Timer(STAGE_SECONDS, {'stage': name})
+
+
+def add_metrics_arguments(arg_parser):
+    """-v / --metrics / --metrics-port options for a CLI"""
+    arg_parser.add_argument('-v', '--verbose', action='count', default=0,
+                            help="more log output (-v: info, -vv: per-row debug)")
+    arg_parser.add_argument('--metrics', metavar='FILE',
+                            help="write metrics at exit (Prometheus text; OpenMetrics for *.om)")
+    arg_parser.add_argument('--metrics-port', type=int, help="serve /metrics on this port while running")
+
+
+def metrics_from_args(args, default_level=logging.WARNING):
+    """Set the log level from -v and start the /metrics server if asked for"""
+    levels = [logging.WARNING, logging.INFO, logging.DEBUG]
+    start = levels.index(default_level) if default_level in levels else 0
+    level = levels[min(len(levels) - 1, start + args.verbose)]
+    logging.basicConfig(level=level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    logging.getLogger().setLevel(level)
+    if args.metrics_port:
+        return REGISTRY.serve(args.metrics_port)
+    return None
+
+
+def finish_metrics(args, server=None):
+    if args.metrics:
+        REGISTRY.write(args.metrics)
+    if server is not None:
+        server.shutdown()
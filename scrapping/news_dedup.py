@@ -0,0 +1,286 @@
+"""Duplicate and near-duplicate detection for scraped news.
+
+Every story is fingerprinted twice:
+
+- 'summary': title + summary, known from the news list before any detail
+  is loaded, so ChampionatParser can drop a repeated story before paying
+  for its details (an extra request, or a click and a wait in Chrome)
+- 'content': title + details.full_text, checked once the details are in,
+  which catches re-posts whose teaser was rewritten
+
+A fingerprint is an exact hash of the normalized text plus a sketch of
+its word unigrams and bigrams, looked up through bands stored in an
+indexed table, so a lookup only compares the few stories that share a
+band:
+
+- 'content' uses a 64-bit SimHash. Two stories are near-duplicates when
+  their SimHashes differ in at most `max_distance` bits; split into
+  `max_distance + 1` bands, any two such hashes agree on a whole band.
+- 'summary' uses a MinHash signature. A teaser is 15-40 words, and editing
+  a few of them flips far more than a few SimHash bits, so two teasers are
+  near-duplicates when the Jaccard similarity of their features (estimated
+  from the signatures) is at least `min_jaccard`. MINHASH_BANDS bands of
+  MINHASH_ROWS values make pairs above about 0.5 share a band.
+
+    dedup = NewsDedup('news_dedup.db')
+    parser = ChampionatParser(fetcher=fetcher, dedup=dedup)
+
+    python news_dedup.py championat_news.json championat_news_selenium.json -o news.jsonl
+"""
+import argparse
+import array
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+
+from crawl_state import news_key
+
+
+STAGES = ('summary', 'content')
+
+MINHASH_BANDS = 16
+MINHASH_ROWS = 4
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(_MERSENNE_PRIME))
+                 for _ in range(MINHASH_BANDS * MINHASH_ROWS)]
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def tokens(text):
+    return _WORD_RE.findall((text or '').lower())
+
+
+def exact_hash(words):
+    return hashlib.sha1(' '.join(words).encode('utf-8')).hexdigest()
+
+
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def features(words):
+    """Word unigrams and bigrams"""
+    return words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+
+
+def simhash(words, bits=64):
+    """SimHash of the word unigrams and bigrams"""
+    weights = [0] * bits
+    for feature in features(words):
+        h = _feature_hash(feature)
+        for i in range(bits):
+            weights[i] += 1 if h >> i & 1 else -1
+    return sum(1 << i for i, weight in enumerate(weights) if weight > 0)
+
+
+def minhash(words):
+    """MinHash signature of the set of word unigrams and bigrams, one value per permutation"""
+    hashes = {_feature_hash(feature) for feature in features(words)}
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def jaccard(signature, other):
+    """Jaccard similarity of two feature sets, estimated from their MinHash signatures"""
+    return sum(x == y for x, y in zip(signature, other)) / len(signature)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _signed(value):
+    """SQLite integers are signed 64-bit"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def stage_text(news_data, stage):
+    """Words fingerprinted at `stage`; empty when the story has nothing for it yet"""
+    if stage == 'summary':
+        body = news_data.get('summary')
+    else:
+        body = (news_data.get('details') or {}).get('full_text')
+    if not body:
+        return []
+    return tokens(news_data.get('title')) + tokens(body)
+
+
+class NewsDedup:
+    """SQLite index of news fingerprints"""
+
+    def __init__(self, path='news_dedup.db', max_distance=3, min_words=8, min_jaccard=0.6):
+        """min_words: shorter texts are only matched exactly, their sketches are too noisy"""
+        self.path = path
+        self.max_distance = max_distance
+        self.min_words = min_words
+        self.min_jaccard = min_jaccard
+        self.bands = max_distance + 1
+        self.band_bits = -(-64 // self.bands)
+        self.stats = {'checked': 0, 'exact': 0, 'near': 0}
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('pragma journal_mode=wal')
+        self.create_tables()
+
+    def create_tables(self):
+        with self._lock:
+            self.conn.execute('''
+                create table if not exists news_fingerprints (
+                    key text not null,
+                    stage varchar(10) not null,
+                    exact_hash varchar(40) not null,
+                    simhash integer,
+                    seen_at real not null,
+                    minhash blob,
+                    primary key (key, stage)
+                )
+            ''')
+            if 'minhash' not in {row[1] for row in self.conn.execute('pragma table_info(news_fingerprints)')}:
+                self.conn.execute('alter table news_fingerprints add column minhash blob')
+            self.conn.execute('create index if not exists news_fingerprints_exact on news_fingerprints (stage, exact_hash)')
+            # SimHash bands of the content stage, MinHash bands of the summary stage
+            self.conn.execute('''
+                create table if not exists news_simhash_bands (
+                    stage varchar(10) not null,
+                    band integer not null,
+                    value integer not null,
+                    key text not null
+                )
+            ''')
+            self.conn.execute('create index if not exists news_simhash_bands_lookup '
+                              'on news_simhash_bands (stage, band, value)')
+            self.conn.commit()
+
+    def _bands(self, stage, sketch):
+        if stage == 'summary':
+            return [(band, _signed(_feature_hash(' '.join(map(str, sketch[band * MINHASH_ROWS:][:MINHASH_ROWS])))))
+                    for band in range(MINHASH_BANDS)]
+        mask = (1 << self.band_bits) - 1
+        return [(band, sketch >> (band * self.band_bits) & mask) for band in range(self.bands)]
+
+    def _fingerprint(self, news_data, stage):
+        """Exact hash and sketch (MinHash signature or SimHash) of a stage's words"""
+        words = stage_text(news_data, stage)
+        if not words:
+            return None, None
+        if len(words) < self.min_words:
+            return exact_hash(words), None
+        return exact_hash(words), minhash(words) if stage == 'summary' else simhash(words)
+
+    def _similar(self, stage, sketch, row):
+        """Whether the stored (simhash, minhash) `row` is a near-duplicate of `sketch`"""
+        simhash_value, minhash_blob = row
+        if stage == 'summary':
+            return minhash_blob is not None and jaccard(array.array('Q', minhash_blob), sketch) >= self.min_jaccard
+        return simhash_value is not None and hamming(simhash_value & (1 << 64) - 1, sketch) <= self.max_distance
+
+    def find(self, news_data, stage):
+        """Key of an already seen story that `news_data` duplicates at `stage`, else None"""
+        exact, sketch = self._fingerprint(news_data, stage)
+        if exact is None:
+            return None
+        self.stats['checked'] += 1
+
+        with self._lock:
+            row = self.conn.execute('''
+                select key from news_fingerprints where stage = ? and exact_hash = ? limit 1
+            ''', (stage, exact)).fetchone()
+            if row:
+                self.stats['exact'] += 1
+                return row[0]
+            if sketch is None:
+                return None
+
+            candidates = set()
+            for band, value in self._bands(stage, sketch):
+                candidates.update(key for key, in self.conn.execute('''
+                    select key from news_simhash_bands where stage = ? and band = ? and value = ?
+                ''', (stage, band, value)))
+            for key in candidates:
+                row = self.conn.execute('select simhash, minhash from news_fingerprints where key = ? and stage = ?',
+                                        (key, stage)).fetchone()
+                if row and self._similar(stage, sketch, row):
+                    self.stats['near'] += 1
+                    return key
+        return None
+
+    def add(self, news_data, now=None):
+        """Index every stage `news_data` has text for"""
+        key = news_key(news_data)
+        now = now or time.time()
+        with self._lock:
+            for stage in STAGES:
+                exact, sketch = self._fingerprint(news_data, stage)
+                if exact is None:
+                    continue
+                simhash_value = _signed(sketch) if stage == 'content' and sketch is not None else None
+                minhash_blob = array.array('Q', sketch).tobytes() if stage == 'summary' and sketch else None
+                self.conn.execute('''
+                    insert into news_fingerprints (key, stage, exact_hash, simhash, minhash, seen_at)
+                    values (?, ?, ?, ?, ?, ?)
+                    on conflict (key, stage) do update set
+                        exact_hash = excluded.exact_hash, simhash = excluded.simhash, minhash = excluded.minhash,
+                        seen_at = excluded.seen_at
+                ''', (key, stage, exact, simhash_value, minhash_blob, now))
+                self.conn.execute('delete from news_simhash_bands where stage = ? and key = ?', (stage, key))
+                if sketch is not None:
+                    self.conn.executemany('''
+                        insert into news_simhash_bands (stage, band, value, key) values (?, ?, ?, ?)
+                    ''', [(stage, band, value, key) for band, value in self._bands(stage, sketch)])
+            self.conn.commit()
+
+    def is_duplicate(self, news_data):
+        """Check every stage `news_data` has text for; index it when it is new"""
+        for stage in STAGES:
+            if self.find(news_data, stage) is not None:
+                return True
+        self.add(news_data)
+        return False
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def read_news(path):
+    """News items of a .json dump (list) or a JSON Lines file"""
+    if path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    from sinks import read_json_lines
+    return list(read_json_lines(path))
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Merge news dumps, dropping duplicate stories")
+    arg_parser.add_argument('files', nargs='+', help=".json dumps or .jsonl files, oldest first")
+    arg_parser.add_argument('-o', '--output', required=True, help="JSON Lines file for the unique stories")
+    arg_parser.add_argument('--db', default=':memory:', help="dedup index to use and extend (default: in memory)")
+    arg_parser.add_argument('--max-distance', type=int, default=3,
+                            help="SimHash bits two near-duplicate full texts may differ in")
+    arg_parser.add_argument('--min-jaccard', type=float, default=0.6,
+                            help="similarity of two near-duplicate teasers (title + summary)")
+    args = arg_parser.parse_args(argv)
+
+    from sinks import JsonLinesSink
+
+    dedup = NewsDedup(args.db, max_distance=args.max_distance, min_jaccard=args.min_jaccard)
+    total = 0
+    with JsonLinesSink(args.output) as sink:
+        for path in args.files:
+            for news_data in read_news(path):
+                total += 1
+                if not dedup.is_duplicate(news_data):
+                    sink.write(news_data)
+        kept = sink.records
+    dedup.close()
+    print(f"{kept} unique of {total} stories ({dedup.stats['exact']} exact, {dedup.stats['near']} near duplicates)")
+
+
+if __name__ == '__main__':
+    main()
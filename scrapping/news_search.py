@@ -0,0 +1,467 @@
+"""Full-text search over scraped news, on SQLite FTS5.
+
+Every story is a row of `news`, mirrored into an external-content FTS5
+table (title, summary, full_text, facets) by triggers, and its tags go to
+an indexed `news_tags` table. Searches are ranked with bm25, with a title
+hit counting 10x and a summary hit 4x a body hit. Tags and news_type can
+be used as filters and counted as facets of the result set. The facets
+column holds one facet_token() per tag and news_type, so a filtered
+search is a single MATCH that FTS5 answers by merging doclists, instead
+of a lookup in news_tags for every matching row.
+
+NewsIndex.write() adds or updates one story in its own small transaction,
+so it can be used like the other sinks while ChampionatParser is
+producing items (futbool_news.py --index).
+
+Every query word must occur in a result, except the function words of
+STOPWORDS ('va', 'bilan', ...), which are left out of a query that has
+other words. bm25 reads the whole doclist of every query word and scores
+every match, so only the newest `rank_window` matches are ranked: they
+come first, best first, and the older matches follow newest first. For
+news that is what is wanted, and count() and paging agree.
+
+    python news_search.py build championat_news.json championat_news_selenium.json --db news_search.db
+    python news_search.py search "Paxtakor Navbahor" --tag Superliga --type oddiy
+    python news_search.py facets Paxtakor
+    python news_search.py search --prefix "Superliga"
+
+bench_search.py times queries over a synthetic 100k-article index.
+"""
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from crawl_state import news_key
+
+
+# bm25 weights of the FTS columns: title, summary, full_text, facets (filter tokens only)
+COLUMN_WEIGHTS = (10.0, 4.0, 1.0, 0.0)
+RANK_FUNCTION = 'bm25({}, {}, {}, {})'.format(*COLUMN_WEIGHTS)
+SCHEMA_VERSION = 1
+
+# Function words left out of a query that has other words (as fold() returns them), and the
+# letters o' and g', which unicode61 splits off as one-letter words (O'zbekiston -> o, zbekiston)
+STOPWORDS = frozenset((
+    'o', 'g',
+    'va', 'bilan', 'uchun', 'bu', 'u', 'ham', 'esa', 'yoki', 'lekin', 'ammo', 'biroq', 'shu', 'ushbu',
+    'ga', 'da', 'dan', 'ni', 'ning', 'eng', 'yana', 'endi', 'hali', 'kabi', 'emas',
+    'и', 'в', 'на', 'с', 'по', 'не', 'что', 'за',
+))
+# Shortest prefix FTS5 keeps an index for (prefix='2 3 4'); a shorter last word is matched whole
+MIN_PREFIX = 2
+# Longest one: a longer prefix is looked up in news_terms and searched as the OR of its words
+MAX_INDEXED_PREFIX = 4
+# More words than this under one prefix are left to FTS5's own prefix query
+MAX_EXPANSION = 50
+
+_TERM_RE = re.compile(r'\w+')
+
+
+def fold(term):
+    """A word as the unicode61 tokenizer stores it: lower case, without diacritics"""
+    decomposed = unicodedata.normalize('NFKD', term.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def query_terms(text):
+    return [fold(term) for term in _TERM_RE.findall(text or '')]
+
+
+def facet_token(kind, value):
+    """The single FTS5 token standing for a tag or news_type ('tag', 'type') in the facets column"""
+    return kind + hashlib.sha1(value.encode('utf-8')).hexdigest()[:16]
+
+
+def _quote(term):
+    return f'"{term}"'
+
+
+def match_expression(terms, prefix=False, expansion=None, facets=()):
+    """FTS5 query requiring every term in the text columns, and every facet token.
+
+    prefix=True matches the last term as a prefix: as the OR of `expansion`
+    (the words it starts) when given, else with FTS5's own prefix query.
+    Quoting each term keeps FTS5 operators and punctuation in user input from
+    being parsed as query syntax.
+    """
+    if not terms:
+        return None
+    quoted = [_quote(term) for term in terms]
+    if prefix:
+        quoted[-1] = f"({' OR '.join(map(_quote, expansion))})" if expansion else quoted[-1] + '*'
+    text = '{title summary full_text} : (%s)' % ' AND '.join(quoted)
+    return ' AND '.join([text, *(f'{{facets}} : {_quote(token)}' for token in facets)])
+
+
+class NewsIndex:
+    def __init__(self, path='news_search.db', rank_window=1000):
+        """rank_window: how many of the newest matches are ranked; None ranks them all"""
+        self.path = path
+        self.rank_window = rank_window
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('pragma journal_mode=wal')
+        self.conn.execute('pragma synchronous=normal')
+        self.create_tables()
+
+    def create_tables(self):
+        with self._lock:
+            version = self.conn.execute('pragma user_version').fetchone()[0]
+            if version < SCHEMA_VERSION and self.conn.execute(
+                    "select 1 from sqlite_master where name = 'news'").fetchone():
+                self._migrate()
+            self.conn.executescript('''
+                create table if not exists news (
+                    id integer primary key,
+                    key text not null unique,
+                    title text not null default '',
+                    summary text not null default '',
+                    full_text text not null default '',
+                    news_type varchar(30),
+                    date_time varchar(30),
+                    url text,
+                    data text not null,
+                    indexed_at real not null,
+                    facets text not null default ''
+                );
+                create index if not exists news_type_idx on news (news_type);
+
+                create table if not exists news_tags (
+                    news_id integer not null references news (id) on delete cascade,
+                    tag text not null,
+                    primary key (tag, news_id)
+                ) without rowid;
+                create index if not exists news_tags_news on news_tags (news_id);
+
+                -- Every word ever indexed, to expand prefixes longer than the prefix indexes
+                create table if not exists news_terms (term text primary key) without rowid;
+
+                create virtual table if not exists news_fts using fts5(
+                    title, summary, full_text, facets,
+                    content='news', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2',
+                    prefix='2 3 4'
+                );
+
+                create trigger if not exists news_fts_insert after insert on news begin
+                    insert into news_fts (rowid, title, summary, full_text, facets)
+                    values (new.id, new.title, new.summary, new.full_text, new.facets);
+                end;
+                create trigger if not exists news_fts_delete after delete on news begin
+                    insert into news_fts (news_fts, rowid, title, summary, full_text, facets)
+                    values ('delete', old.id, old.title, old.summary, old.full_text, old.facets);
+                end;
+                create trigger if not exists news_fts_update after update on news begin
+                    insert into news_fts (news_fts, rowid, title, summary, full_text, facets)
+                    values ('delete', old.id, old.title, old.summary, old.full_text, old.facets);
+                    insert into news_fts (rowid, title, summary, full_text, facets)
+                    values (new.id, new.title, new.summary, new.full_text, new.facets);
+                end;
+            ''')
+            if version < SCHEMA_VERSION:
+                if self.conn.execute('select 1 from news limit 1').fetchone():
+                    self._rebuild()
+                self.conn.execute(f'pragma user_version = {SCHEMA_VERSION}')
+            self.conn.commit()
+
+    def _migrate(self):
+        """Version 0 -> 1: the facets column, in news and in news_fts; _rebuild() refills the index"""
+        self.conn.executescript('''
+            drop trigger if exists news_fts_insert;
+            drop trigger if exists news_fts_delete;
+            drop trigger if exists news_fts_update;
+            drop table if exists news_fts;
+            drop table if exists news_fts_terms;
+            drop table if exists news_common_terms;
+        ''')
+        if 'facets' not in {row[1] for row in self.conn.execute('pragma table_info(news)')}:
+            self.conn.execute("alter table news add column facets text not null default ''")
+        tags = {}
+        for news_id, tag in self.conn.execute('select news_id, tag from news_tags'):
+            tags.setdefault(news_id, []).append(tag)
+        self.conn.executemany('update news set facets = ? where id = ?', [
+            (self._facets(tags.get(news_id, ()), news_type), news_id)
+            for news_id, news_type in self.conn.execute('select id, news_type from news').fetchall()
+        ])
+
+    def _rebuild(self):
+        """Refill news_fts from news, and news_terms from its vocabulary"""
+        self.conn.execute("insert into news_fts (news_fts) values ('rebuild')")
+        self.conn.execute("create virtual table temp.news_fts_vocab using fts5vocab(main, news_fts, 'row')")
+        self.conn.execute("insert or ignore into news_terms select term from temp.news_fts_vocab")
+        self.conn.execute('drop table temp.news_fts_vocab')
+
+    @staticmethod
+    def _facets(tags, news_type):
+        tokens = [facet_token('tag', tag) for tag in sorted(tags)]
+        if news_type:
+            tokens.append(facet_token('type', news_type))
+        return ' '.join(tokens)
+
+    def _upsert(self, news_data, now):
+        details = news_data.get('details') or {}
+        tags = {tag.strip() for tag in details.get('tags') or [] if tag and tag.strip()}
+        title, summary = news_data.get('title') or '', news_data.get('summary') or ''
+        full_text = details.get('full_text') or ''
+        row = (news_key(news_data), title, summary, full_text, news_data.get('news_type'),
+               news_data.get('date_time'), news_data.get('url'), json.dumps(news_data, ensure_ascii=False), now,
+               self._facets(tags, news_data.get('news_type')))
+        news_id = self.conn.execute('''
+            insert into news (key, title, summary, full_text, news_type, date_time, url, data, indexed_at, facets)
+            values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            on conflict (key) do update set
+                title = excluded.title, summary = excluded.summary, full_text = excluded.full_text,
+                news_type = excluded.news_type, date_time = excluded.date_time, url = excluded.url,
+                data = excluded.data, indexed_at = excluded.indexed_at, facets = excluded.facets
+            returning id
+        ''', row).fetchone()[0]
+        self.conn.execute('delete from news_tags where news_id = ?', (news_id,))
+        self.conn.executemany('insert into news_tags (news_id, tag) values (?, ?)', [(news_id, tag) for tag in tags])
+        terms = set(query_terms(title)) | set(query_terms(summary)) | set(query_terms(full_text))
+        self.conn.executemany('insert or ignore into news_terms (term) values (?)', [(term,) for term in terms])
+
+    def write(self, news_data):
+        """Add or update one story (sink interface)"""
+        with self._lock:
+            self._upsert(news_data, time.time())
+            self.conn.commit()
+
+    def write_many(self, news_items):
+        """Add or update many stories in one transaction; returns how many"""
+        count = 0
+        now = time.time()
+        with self._lock:
+            for news_data in news_items:
+                self._upsert(news_data, now)
+                count += 1
+            self.conn.commit()
+        return count
+
+    def expression(self, query, prefix=False, tags=None, news_type=None):
+        """FTS5 expression searched for `query` within `tags` and `news_type`, None if nothing can match.
+
+        The STOPWORDS of the query are dropped unless nothing else is left.
+        """
+        terms = query_terms(query)
+        prefix = prefix and bool(terms) and len(terms[-1]) >= MIN_PREFIX
+        whole_words = terms[:-1] if prefix else terms
+        kept = [term for term in whole_words if term not in STOPWORDS]
+        if prefix:
+            kept += terms[-1:]
+        kept = kept or terms
+        expansion = None
+        if prefix and len(kept[-1]) > MAX_INDEXED_PREFIX:
+            expansion = self._expand(kept[-1])
+            if not expansion:
+                return None
+        facets = [facet_token('tag', tag) for tag in tags or ()]
+        if news_type:
+            facets.append(facet_token('type', news_type))
+        return match_expression(kept, prefix, expansion, facets)
+
+    def _expand(self, prefix):
+        """The indexed words starting with `prefix`, None when there are more than MAX_EXPANSION.
+
+        FTS5 has no index for prefixes this long, so its own prefix query
+        merges the doclist of every such word, again for each snippet.
+        """
+        terms = [term for term, in self.conn.execute(
+            'select term from news_terms where term >= ? and term < ? limit ?',
+            (prefix, prefix + '\U0010ffff', MAX_EXPANSION + 1))]
+        return terms if len(terms) <= MAX_EXPANSION else None
+
+    def _filters(self, tags, news_type):
+        """SQL conditions restricting news to `tags` and `news_type` (searches filter in the MATCH)"""
+        conditions, params = [], []
+        for tag in tags or ():
+            conditions.append('id in (select news_id from news_tags where tag = ?)')
+            params.append(tag)
+        if news_type:
+            conditions.append('news_type = ?')
+            params.append(news_type)
+        return conditions, params
+
+    def _matching_ids(self, query, tags, news_type, prefix):
+        """Subquery of the ids a search would return (None: no story can match) and its parameters"""
+        if query:
+            with self._lock:
+                expression = self.expression(query, prefix, tags, news_type)
+            if expression is None:
+                return None, []
+            return 'select rowid from news_fts where news_fts match ?', [expression]
+        conditions, params = self._filters(tags, news_type)
+        return f"select id from news where {' and '.join(conditions) or '1'}", params
+
+    def search(self, query=None, tags=None, news_type=None, limit=20, offset=0, prefix=False):
+        """Stories matching all words of `query` (best first), and every tag in `tags`.
+
+        prefix=True also matches longer words starting with the last word
+        (search as you type, or Uzbek suffixes: 'Superliga' -> 'Superligada').
+        A prefix longer than MAX_INDEXED_PREFIX is searched as the OR of the
+        words of news_terms it starts.
+
+        Only the newest `rank_window` matches are ranked; the older ones
+        follow them newest first, with a score of None.
+
+        Without a query the most recently added stories are returned. Each
+        result is the stored item plus 'score' (bm25, lower is better) and
+        'snippet'.
+        """
+        if not query:
+            conditions, params = self._filters(tags, news_type)
+            with self._lock:
+                rows = self.conn.execute(f'''
+                    select data, null, substr(summary, 1, 120) from news
+                    where {' and '.join(conditions) or '1'} order by id desc limit ? offset ?
+                ''', [*params, limit, offset]).fetchall()
+            return [self._result(*row) for row in rows]
+
+        with self._lock:
+            expression = self.expression(query, prefix, tags, news_type)
+            if expression is None:
+                return []
+            oldest_ranked, windowed = 0, 0
+            if self.rank_window:
+                # FTS5 walks the matches newest first cheaply; only those from the window's oldest on are ranked
+                oldest_ranked, windowed = self.conn.execute('''
+                    select coalesce(min(rowid), 0), count(*) from (
+                        select rowid from news_fts where news_fts match ? order by rowid desc limit ?
+                    )
+                ''', (expression, self.rank_window)).fetchone()
+
+            # FTS5 only computes the snippets of the rows it returns. With facet tokens in the
+            # expression one could be cut from the facets column: then a text-only query makes them
+            text_expression = self.expression(query, prefix)
+            snippet = "snippet(news_fts, -1, '[', ']', '...', 12)" if expression == text_expression else 'null'
+            ranked = []
+            if not self.rank_window or offset < windowed:
+                ranked = self.conn.execute(f'''
+                    select rowid, rank, {snippet} from news_fts
+                    where news_fts match ? and rank match ? and rowid >= ?
+                    order by rank limit ? offset ?
+                ''', (expression, RANK_FUNCTION, oldest_ranked, limit, offset)).fetchall()
+            if self.rank_window and windowed == self.rank_window and len(ranked) < limit:
+                # Past the ranked window: the older matches, newest first
+                ranked += self.conn.execute(f'''
+                    select rowid, null, {snippet} from news_fts where news_fts match ? and rowid < ?
+                    order by rowid desc limit ? offset ?
+                ''', (expression, oldest_ranked, limit - len(ranked), max(0, offset - windowed))).fetchall()
+
+            rows = []
+            for news_id, score, snippet in ranked:
+                data, = self.conn.execute('select data from news where id = ?', (news_id,)).fetchone()
+                if expression != text_expression:
+                    snippet, = self.conn.execute('''
+                        select snippet(news_fts, -1, '[', ']', '...', 12) from news_fts
+                        where news_fts match ? and rowid = ?
+                    ''', (text_expression, news_id)).fetchone()
+                rows.append((data, score, snippet))
+        return [self._result(*row) for row in rows]
+
+    @staticmethod
+    def _result(data, score, snippet):
+        news_data = json.loads(data)
+        news_data['score'] = score
+        news_data['snippet'] = snippet
+        return news_data
+
+    def count(self, query=None, tags=None, news_type=None, prefix=False):
+        subquery, params = self._matching_ids(query, tags, news_type, prefix)
+        if subquery is None:
+            return 0
+        with self._lock:
+            return self.conn.execute(f'select count(*) from ({subquery})', params).fetchone()[0]
+
+    def facets(self, query=None, tags=None, news_type=None, limit=20, prefix=False):
+        """Tag and news_type counts over the stories a search would return"""
+        subquery, params = self._matching_ids(query, tags, news_type, prefix)
+        if subquery is None:
+            return {'tags': [], 'news_type': []}
+        with self._lock:
+            tag_counts = self.conn.execute(f'''
+                select tag, count(*) as hits from news_tags where news_id in ({subquery})
+                group by tag order by hits desc, tag limit ?
+            ''', [*params, limit]).fetchall()
+            type_counts = self.conn.execute(f'''
+                select news_type, count(*) as hits from news where id in ({subquery})
+                group by news_type order by hits desc
+            ''', params).fetchall()
+        return {'tags': tag_counts, 'news_type': type_counts}
+
+    def optimize(self):
+        """Merge the FTS index segments (after a large build)"""
+        with self._lock:
+            self.conn.execute("insert into news_fts (news_fts) values ('optimize')")
+            self.conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute('select count(*) from news').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def print_results(results):
+    for i, news_data in enumerate(results, 1):
+        score = f"{news_data['score']:.2f}" if news_data['score'] is not None else '-'
+        print(f"{i:>3}. [{score}] {news_data.get('title')}")
+        if news_data.get('snippet'):
+            print(f"      {news_data['snippet']}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Search scraped championat.asia news")
+    arg_parser.add_argument('--db', default='news_search.db', help="index file")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="index .json dumps and .jsonl files")
+    build.add_argument('files', nargs='+')
+
+    for name in ('search', 'facets'):
+        command = commands.add_parser(name)
+        command.add_argument('query', nargs='?', help="words that must all occur")
+        command.add_argument('-p', '--prefix', action='store_true', help="the last word may be the start of a longer one")
+        command.add_argument('--tag', action='append', default=[], help="only stories with this tag (repeatable)")
+        command.add_argument('--type', dest='news_type', help="only this news_type")
+        command.add_argument('-n', '--limit', type=int, default=10)
+    args = arg_parser.parse_args(argv)
+
+    with NewsIndex(args.db) as index:
+        if args.command == 'build':
+            from news_dedup import read_news
+            for path in args.files:
+                print(f"{path}: {index.write_many(read_news(path))} stories")
+            index.optimize()
+            print(f"{len(index)} stories indexed")
+            return
+
+        started = time.perf_counter()
+        if args.command == 'search':
+            results = index.search(args.query, args.tag, args.news_type, args.limit, prefix=args.prefix)
+            total = index.count(args.query, args.tag, args.news_type, args.prefix)
+            elapsed = time.perf_counter() - started
+            print_results(results)
+            print(f"\n{len(results)} of {total} stories in {elapsed * 1000:.1f} ms")
+        else:
+            facets = index.facets(args.query, args.tag, args.news_type, args.limit, args.prefix)
+            elapsed = time.perf_counter() - started
+            for name, counts in facets.items():
+                print(f"{name}: " + ", ".join(f"{value} ({count})" for value, count in counts))
+            print(f"\n{elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,540 @@
+"""Multi-process scraping on a persistent SQLite work queue.
+
+Calendar days and match ext_ids are enqueued as tasks; N worker processes
+lease them in batches, scrape them on their own parser pool (and their
+own Chrome instances with the selenium engine) and ack each task when its
+output is written. A lease expires after `lease_seconds` unless the worker
+renews it, so tasks of a crashed or killed worker go back to the queue. The
+supervisor also re-queues them at once when it sees the process die, and
+starts a replacement. A task that failed `max_attempts` times is parked
+as failed (see `status` / `retry`).
+
+Every worker writes its own JSON Lines files, so the processes share nothing
+but the queue:
+
+    out/games-w00-0.jsonl, out/matches-w00-0.jsonl, ..., out/metrics-w00-0.prom
+
+    python orchestrator.py enqueue --dates 01/07/2025 31/07/2025
+    python orchestrator.py enqueue --matches 19438666 19438667 -f ext_ids.txt
+    python orchestrator.py run -p 32 -o out/ --follow     # days also enqueue their matches
+    python orchestrator.py run -p 8 --cache .http_cache --offline  # replay a cached corpus
+    python orchestrator.py status
+    python orchestrator.py retry                          # failed tasks back to queued
+
+With the http engine a process is mostly lxml CPU work, so one process per
+core scales with the core count; --rate is the total requests/sec for the
+host and is split between the processes. With the selenium engine every
+thread drives a Chrome, so keep --threads at 1 and size -p by cores.
+"""
+import argparse
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from crawl_state import ext_id_from_link
+from resilience import CircuitOpen
+
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('date', 'match')
+
+
+class WorkQueue:
+    """Tasks (kind, key) with lease/ack semantics, shared by processes through SQLite.
+
+    queued -> leased (owner, lease_expires) -> done
+                                           -> queued again on nack/expiry, failed after max_attempts
+    """
+
+    def __init__(self, path='work_queue.db', lease_seconds=300.0, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # Autocommit; writes take the database lock with `begin immediate`
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute('pragma journal_mode=wal')
+        self.conn.execute('pragma synchronous=normal')
+        self.create_tables()
+
+    def create_tables(self):
+        with self._transaction() as conn:
+            conn.execute('''
+                create table if not exists tasks (
+                    id integer primary key,
+                    kind varchar(10) not null,
+                    key varchar(64) not null,
+                    status varchar(10) not null default 'queued',
+                    attempts integer not null default 0,
+                    owner varchar(32),
+                    lease_expires real,
+                    error text,
+                    enqueued_at real not null,
+                    updated_at real not null,
+                    unique (kind, key)
+                )
+            ''')
+            conn.execute('create index if not exists tasks_status on tasks (status, id)')
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self.conn.execute('begin immediate')
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute('rollback')
+                raise
+            self.conn.execute('commit')
+
+    def enqueue(self, kind, keys, requeue_done=False, now=None):
+        """Add tasks; existing ones are left alone unless `requeue_done`. Returns how many were (re)queued"""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown task kind {kind!r}, expected one of {KINDS}")
+        now = now or time.time()
+        rows = [(kind, str(key), now, now) for key in keys]
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany('''
+                insert into tasks (kind, key, enqueued_at, updated_at) values (?, ?, ?, ?)
+                on conflict (kind, key) do nothing
+            ''', rows)
+            if requeue_done:
+                conn.executemany('''
+                    update tasks set status = 'queued', attempts = 0, error = null, updated_at = ?
+                    where kind = ? and key = ? and status in ('done', 'failed')
+                ''', [(now, kind, key) for kind, key, _, _ in rows])
+            return conn.total_changes - before
+
+    def lease(self, owner, limit=1, now=None):
+        """Up to `limit` queued (or expired) tasks, leased to `owner` for lease_seconds"""
+        now = now or time.time()
+        with self._transaction() as conn:
+            rows = conn.execute('''
+                select id, kind, key, attempts from tasks
+                where status = 'queued' or (status = 'leased' and lease_expires < ?)
+                order by id limit ?
+            ''', (now, limit)).fetchall()
+
+            tasks = []
+            for task_id, kind, key, attempts in rows:
+                if attempts >= self.max_attempts:
+                    # Its lease ran out max_attempts times: it keeps killing workers
+                    conn.execute('''
+                        update tasks set status = 'failed', owner = null, error = 'lease expired', updated_at = ?
+                        where id = ?
+                    ''', (now, task_id))
+                    continue
+                conn.execute('''
+                    update tasks set status = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1,
+                        updated_at = ?
+                    where id = ?
+                ''', (owner, now + self.lease_seconds, now, task_id))
+                tasks.append({'id': task_id, 'kind': kind, 'key': key, 'attempts': attempts + 1})
+            return tasks
+
+    def renew(self, owner, task_ids, now=None):
+        """Extend the leases `owner` still holds; returns how many it still had"""
+        now = now or time.time()
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany('''
+                update tasks set lease_expires = ? where id = ? and owner = ? and status = 'leased'
+            ''', [(now + self.lease_seconds, task_id, owner) for task_id in task_ids])
+            return conn.total_changes - before
+
+    def ack(self, task_id, owner, now=None):
+        """Mark done; False if the lease was lost (another worker has the task now)"""
+        with self._transaction() as conn:
+            cursor = conn.execute('''
+                update tasks set status = 'done', owner = null, lease_expires = null, error = null, updated_at = ?
+                where id = ? and owner = ? and status = 'leased'
+            ''', (now or time.time(), task_id, owner))
+            return cursor.rowcount == 1
+
+    def nack(self, task_id, owner, error=None, count_attempt=True, now=None):
+        """Give the task back; it is failed for good once it used up max_attempts.
+
+        count_attempt=False hands it back without using up an attempt (the
+        task did not get a fair try, e.g. the host's circuit was open).
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute('''
+                update tasks set
+                    attempts = attempts - ?,
+                    status = case when attempts - ? >= ? then 'failed' else 'queued' end,
+                    owner = null, lease_expires = null, error = ?, updated_at = ?
+                where id = ? and owner = ? and status = 'leased'
+            ''', (int(not count_attempt), int(not count_attempt), self.max_attempts, error, now or time.time(),
+                  task_id, owner))
+            return cursor.rowcount == 1
+
+    def release_owner(self, owner, now=None):
+        """Re-queue every task leased by a dead worker; returns how many"""
+        with self._transaction() as conn:
+            cursor = conn.execute('''
+                update tasks set status = 'queued', owner = null, lease_expires = null, updated_at = ?
+                where owner = ? and status = 'leased'
+            ''', (now or time.time(), owner))
+            return cursor.rowcount
+
+    def retry_failed(self, kind=None, now=None):
+        query = "update tasks set status = 'queued', attempts = 0, updated_at = ? where status = 'failed'"
+        params = [now or time.time()]
+        if kind:
+            query += ' and kind = ?'
+            params.append(kind)
+        with self._transaction() as conn:
+            return conn.execute(query, params).rowcount
+
+    def active(self):
+        """Tasks that are queued or leased, i.e. the queue is not drained yet"""
+        with self._lock:
+            return self.conn.execute("select count(*) from tasks where status in ('queued', 'leased')").fetchone()[0]
+
+    def counts(self):
+        """{kind: {status: count}}"""
+        with self._lock:
+            rows = self.conn.execute('select kind, status, count(*) from tasks group by kind, status').fetchall()
+        counts = {}
+        for kind, status, count in rows:
+            counts.setdefault(kind, {})[status] = count
+        return counts
+
+    def failures(self, limit=20):
+        with self._lock:
+            return self.conn.execute('''
+                select kind, key, attempts, error from tasks where status = 'failed' order by updated_at desc limit ?
+            ''', (limit,)).fetchall()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class TaskFailed(Exception):
+    """The scraper returned nothing for a task"""
+
+
+class Worker:
+    """One process: leases batches of `threads` tasks and runs them on its own parser pool"""
+
+    def __init__(self, queue, owner, engine='http', threads=1, output_dir='.', follow=False, rate=None,
+                 poll=1.0, cache=None, offline=False):
+        from futbol_match_details import MatchDetailParser
+        from pool import BlockingPool
+        from sinks import JsonLinesSink
+
+        self.queue = queue
+        self.owner = owner
+        self.engine = engine
+        self.threads = threads
+        self.output_dir = output_dir
+        self.follow = follow
+        self.poll = poll
+        self.stats = {'done': 0, 'failed': 0, 'lost': 0, 'followed': 0, 'deferred': 0}
+        self._stop = threading.Event()
+        self._pause_until = 0.0
+
+        self.fetcher = None
+        if engine == 'http':
+            from fetchers import HttpFetcher
+            from resilience import Resilience
+            import requests
+            resilience = Resilience(rate=rate, transient=(requests.Timeout, requests.ConnectionError)) if rate else None
+            http_cache = None
+            if cache or offline:
+                from http_cache import HttpCache
+                http_cache = HttpCache(cache or '.http_cache', offline=offline)
+            self.fetcher = HttpFetcher(pool_size=threads, resilience=resilience, cache=http_cache)
+
+        self.match_parsers = BlockingPool(
+            lambda: MatchDetailParser(headless=True, engine=engine, fetcher=self.fetcher),
+            size=threads,
+            close=lambda parser: parser.close(),
+        )
+        self.calendar_drivers = None
+        if engine == 'selenium':
+            from futbol_match import MatchParserPool
+            self.calendar_drivers = MatchParserPool(pool_size=threads)
+
+        os.makedirs(output_dir, exist_ok=True)
+        self.games = JsonLinesSink(os.path.join(output_dir, f'games-{owner}.jsonl'))
+        self.matches = JsonLinesSink(os.path.join(output_dir, f'matches-{owner}.jsonl'))
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+
+    def fetch_games(self, date):
+        from futbol_match import OptimizedMatchParser
+
+        if self.calendar_drivers is None:
+            return OptimizedMatchParser(fetcher=self.fetcher).fetch_games(date)
+        driver = self.calendar_drivers.get_driver()
+        broken = False
+        try:
+            return OptimizedMatchParser(driver=driver).fetch_games(date)
+        except Exception as e:
+            from selenium.common.exceptions import TimeoutException, WebDriverException
+            broken = isinstance(e, WebDriverException) and not isinstance(e, TimeoutException)
+            raise
+        finally:
+            self.calendar_drivers.return_driver(driver, broken=broken)
+
+    def process(self, task):
+        if task['kind'] == 'date':
+            games = self.fetch_games(task['key'])
+            self.games.write_many(games)
+            if self.follow:
+                ext_ids = [ext_id for ext_id in map(ext_id_from_link, (game.get('link') for game in games)) if ext_id]
+                self.stats['followed'] += self.queue.enqueue('match', ext_ids)
+            return
+
+        from futbol_match_details import has_lineups
+
+        with self.match_parsers.lease() as parser:
+            # CircuitOpen propagates to run_batch, which defers the task
+            match_data = parser.parse_match(task['key'])
+        if match_data is None:
+            raise TaskFailed(f"No match data for {task['key']}")
+        if not has_lineups(match_data):
+            # What a failed or timed-out page load looks like; try again rather than store it as done
+            raise TaskFailed(f"Empty lineups for {task['key']}")
+        self.matches.write(match_data)
+
+    def _renew_leases(self, task_ids, done):
+        # Renew well before expiry; a worker that stops renewing loses its tasks
+        while not done.wait(self.queue.lease_seconds / 3):
+            if not self.queue.renew(self.owner, task_ids):
+                return
+
+    def run_batch(self, tasks):
+        done = threading.Event()
+        renewer = threading.Thread(target=self._renew_leases, args=([task['id'] for task in tasks], done),
+                                   daemon=True)
+        renewer.start()
+        try:
+            futures = {self.executor.submit(self.process, task): task for task in tasks}
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    future.result()
+                except CircuitOpen as e:
+                    # The host is failing; back off instead of burning the task's attempts
+                    self.queue.nack(task['id'], self.owner, f"{type(e).__name__}: {e}", count_attempt=False)
+                    self._pause_until = max(self._pause_until, time.monotonic() + e.retry_in)
+                    self.stats['deferred'] += 1
+                    continue
+                except Exception as e:
+                    logger.warning("%s %s failed (attempt %d): %s", task['kind'], task['key'], task['attempts'], e)
+                    self.queue.nack(task['id'], self.owner, f"{type(e).__name__}: {e}")
+                    self.stats['failed'] += 1
+                    continue
+                if self.queue.ack(task['id'], self.owner):
+                    self.stats['done'] += 1
+                else:
+                    # Lease expired mid-task; the output is written, the new owner will write it again
+                    self.stats['lost'] += 1
+        finally:
+            done.set()
+            renewer.join()
+
+    def run(self):
+        """Work until the queue is drained (nothing queued or leased) or stop()"""
+        while not self._stop.is_set():
+            pause = self._pause_until - time.monotonic()
+            if pause > 0 and self._stop.wait(pause):
+                break
+            tasks = self.queue.lease(self.owner, limit=self.threads)
+            if tasks:
+                self.run_batch(tasks)
+                continue
+            if not self.queue.active():
+                break
+            # Others still hold leases that may come back to the queue
+            self._stop.wait(self.poll)
+
+    def stop(self):
+        self._stop.set()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.match_parsers.close_all()
+        if self.calendar_drivers is not None:
+            self.calendar_drivers.close_all()
+        if self.fetcher is not None:
+            self.fetcher.close()
+            if self.fetcher.cache is not None:
+                self.fetcher.cache.close()
+        self.games.close()
+        self.matches.close()
+
+
+def worker_main(queue_path, owner, options, lease_seconds, max_attempts, log_level):
+    """Entry point of a worker process"""
+    logging.basicConfig(level=log_level, format=f"%(asctime)s {owner} %(levelname)s %(name)s: %(message)s")
+    from metrics import REGISTRY
+
+    queue = WorkQueue(queue_path, lease_seconds, max_attempts)
+    worker = Worker(queue, owner, **options)
+    try:
+        worker.run()
+    finally:
+        worker.close()
+        queue.close()
+        REGISTRY.write(os.path.join(options.get('output_dir', '.'), f'metrics-{owner}.prom'))
+        logger.info("Worker %s finished: %s", owner, worker.stats)
+
+
+class Orchestrator:
+    def __init__(self, queue_path='work_queue.db', processes=None, lease_seconds=300.0, max_attempts=3,
+                 max_restarts=None, **worker_options):
+        """
+        processes: worker processes (default: one per core)
+        max_restarts: replacements started for crashed workers (default: 2 x processes)
+        worker_options: Worker arguments (engine, threads, output_dir, follow, rate, cache, offline)
+        """
+        self.queue_path = queue_path
+        self.processes = processes or os.cpu_count() or 1
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.max_restarts = 2 * self.processes if max_restarts is None else max_restarts
+        self.worker_options = worker_options
+        self.restarts = 0
+        self._generation = {}
+
+    def _start(self, context, slot):
+        generation = self._generation.get(slot, -1) + 1
+        self._generation[slot] = generation
+        owner = f'w{slot:02d}-{generation}'
+        process = context.Process(
+            target=worker_main,
+            args=(self.queue_path, owner, self.worker_options, self.lease_seconds, self.max_attempts,
+                  logging.getLogger().getEffectiveLevel()),
+            name=owner,
+        )
+        process.start()
+        return owner, process
+
+    def run(self):
+        """Run workers until the queue is drained; returns the final queue counts"""
+        # Fresh interpreters: no inherited SQLite connections, locks or driver pools
+        context = multiprocessing.get_context('spawn')
+        queue = WorkQueue(self.queue_path, self.lease_seconds, self.max_attempts)
+        started = time.perf_counter()
+        workers = {}
+        try:
+            for slot in range(self.processes):
+                owner, process = self._start(context, slot)
+                workers[process.sentinel] = (slot, owner, process)
+
+            while workers:
+                for sentinel in multiprocessing.connection.wait(list(workers), timeout=self.lease_seconds):
+                    slot, owner, process = workers.pop(sentinel)
+                    process.join()
+                    if process.exitcode == 0:
+                        continue
+                    requeued = queue.release_owner(owner)
+                    logger.warning("Worker %s exited with %s, re-queued %d tasks", owner, process.exitcode, requeued)
+                    if queue.active() and self.restarts < self.max_restarts:
+                        self.restarts += 1
+                        owner, process = self._start(context, slot)
+                        workers[process.sentinel] = (slot, owner, process)
+        except KeyboardInterrupt:
+            logger.warning("Interrupted, stopping workers")
+            for _, owner, process in workers.values():
+                process.terminate()
+                process.join()
+                queue.release_owner(owner)
+            raise
+        finally:
+            counts = queue.counts()
+            queue.close()
+
+        logger.info("Queue drained in %.1fs with %d processes", time.perf_counter() - started, self.processes)
+        return counts
+
+
+def date_range(start_date, end_date):
+    start = datetime.strptime(start_date, "%d/%m/%Y")
+    end = datetime.strptime(end_date, "%d/%m/%Y")
+    return [(start + timedelta(days=i)).strftime("%d/%m/%Y") for i in range((end - start).days + 1)]
+
+
+def print_counts(counts):
+    for kind, statuses in sorted(counts.items()):
+        print(f"{kind:>6}: " + ", ".join(f"{status} {count}" for status, count in sorted(statuses.items())))
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Sharded multi-process championat.asia scraping")
+    arg_parser.add_argument('-q', '--queue', default='work_queue.db', help="SQLite work queue file")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    enqueue = commands.add_parser('enqueue', help="add calendar days and/or matches")
+    enqueue.add_argument('--dates', nargs=2, metavar=('START', 'END'), help="calendar days DD/MM/YYYY, inclusive")
+    enqueue.add_argument('--matches', nargs='+', default=[], help="match ext_ids")
+    enqueue.add_argument('-f', '--file', help="file with one ext_id per line")
+    enqueue.add_argument('--again', action='store_true', help="re-queue tasks that are already done or failed")
+
+    run = commands.add_parser('run', help="work the queue off with worker processes")
+    run.add_argument('-p', '--processes', type=int, help="worker processes (default: one per core)")
+    run.add_argument('-t', '--threads', type=int, default=1, help="parsers per process (default: 1)")
+    run.add_argument('--engine', choices=('http', 'selenium'), default='http')
+    run.add_argument('-o', '--output-dir', default='orchestrator_out')
+    run.add_argument('--follow', action='store_true', help="calendar days enqueue the matches they list")
+    run.add_argument('--rate', type=float, help="total requests/sec to championat.asia, split across processes")
+    run.add_argument('--cache', help="HTTP cache directory shared by the workers (http engine)")
+    run.add_argument('--offline', action='store_true', help="replay pages from --cache only")
+    run.add_argument('--lease', type=float, default=300.0, help="lease seconds before a task is handed out again")
+    run.add_argument('--max-attempts', type=int, default=3)
+    run.add_argument('-v', '--verbose', action='count', default=0)
+
+    commands.add_parser('status', help="task counts and recent failures")
+    retry = commands.add_parser('retry', help="re-queue failed tasks")
+    retry.add_argument('--kind', choices=KINDS)
+    args = arg_parser.parse_args(argv)
+
+    if args.command == 'run':
+        logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                            format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+        processes = args.processes or os.cpu_count() or 1
+        orchestrator = Orchestrator(
+            args.queue, processes, lease_seconds=args.lease, max_attempts=args.max_attempts,
+            engine=args.engine, threads=args.threads, output_dir=args.output_dir, follow=args.follow,
+            rate=args.rate / processes if args.rate else None, cache=args.cache, offline=args.offline,
+        )
+        print_counts(orchestrator.run())
+        return
+
+    queue = WorkQueue(args.queue)
+    try:
+        if args.command == 'enqueue':
+            if args.dates:
+                added = queue.enqueue('date', date_range(*args.dates), requeue_done=args.again)
+                print(f"{added} days queued")
+            ext_ids = list(args.matches)
+            if args.file:
+                with open(args.file, encoding='utf-8') as f:
+                    ext_ids.extend(line.strip() for line in f if line.strip())
+            if ext_ids:
+                added = queue.enqueue('match', ext_ids, requeue_done=args.again)
+                print(f"{added} matches queued")
+        elif args.command == 'retry':
+            print(f"{queue.retry_failed(args.kind)} tasks re-queued")
+        print_counts(queue.counts())
+        if args.command == 'status':
+            for kind, key, attempts, error in queue.failures():
+                print(f"failed {kind} {key} after {attempts} attempts: {error}")
+    finally:
+        queue.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeout(TimeoutError):
+    """No resource became available within the acquire timeout"""
+
+
+class PoolClosed(RuntimeError):
+    """The pool was shut down"""
+
+
+class BlockingPool:
+    """Fixed-size resource pool: acquire() waits for a free resource instead of
+    handing out None, and never creates more than `size` resources.
+
+    Resources are recycled after `max_uses` leases or `max_age` seconds, and
+    `check(resource)` (if given) must return True before an idle resource is
+    handed out again; failing ones are closed and replaced.
+    """
+
+    def __init__(self, factory, size=2, close=None, check=None, max_uses=None, max_age=None):
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self._close = close
+        self._check = check
+        self._resources = {}  # id(resource) -> [resource, created_at, uses]
+        self._idle = []
+        self._creating = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self.created = 0
+        self.recycled = 0
+        self.discarded = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def in_use(self):
+        with self._cond:
+            return len(self._resources) - len(self._idle)
+
+    def stats(self):
+        """Snapshot of pool metrics"""
+        with self._cond:
+            return {
+                'size': self.size,
+                'open': len(self._resources),
+                'in_use': len(self._resources) - len(self._idle),
+                'idle': len(self._idle),
+                'created': self.created,
+                'recycled': self.recycled,
+                'discarded': self.discarded,
+                'waits': self.waits,
+                'wait_seconds': self.wait_seconds,
+                'max_wait': self.max_wait,
+            }
+
+    def _expired(self, resource):
+        _, created_at, uses = self._resources[id(resource)]
+        if self.max_uses is not None and uses >= self.max_uses:
+            return True
+        return self.max_age is not None and time.monotonic() - created_at >= self.max_age
+
+    def acquire(self, timeout=None):
+        """Take a healthy resource, creating one while under `size`, otherwise wait"""
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        waited = False
+
+        try:
+            while True:
+                with self._cond:
+                    while True:
+                        if self._closed:
+                            raise PoolClosed("Pool is closed")
+                        if self._idle:
+                            resource = self._idle.pop()
+                            break
+                        if len(self._resources) + self._creating < self.size:
+                            self._creating += 1
+                            resource = None
+                            break
+
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            raise PoolTimeout(f"No free resource after {timeout}s")
+                        waited = True
+                        self._cond.wait(remaining)
+
+                    stale = resource is not None and self._expired(resource)
+                    if stale:
+                        self.recycled += 1
+                        self._forget(resource)
+
+                if stale:
+                    self._close_resource(resource)
+                    continue
+                if resource is None:
+                    return self._create()
+
+                # Liveness check outside the lock, it is a WebDriver round-trip
+                if self._check is None or self._is_healthy(resource):
+                    return resource
+                self.discard(resource)
+        finally:
+            if waited:
+                waited_for = time.monotonic() - started
+                with self._cond:
+                    self.waits += 1
+                    self.wait_seconds += waited_for
+                    self.max_wait = max(self.max_wait, waited_for)
+
+    def _is_healthy(self, resource):
+        try:
+            return bool(self._check(resource))
+        except Exception:
+            return False
+
+    def _create(self):
+        # Creating a browser takes seconds, don't hold the lock meanwhile
+        try:
+            resource = self.factory()
+        except BaseException:
+            with self._cond:
+                self._creating -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._creating -= 1
+            self._resources[id(resource)] = [resource, time.monotonic(), 0]
+            self.created += 1
+            closed = self._closed
+            if closed:
+                self._forget(resource)
+
+        if closed:
+            self._close_resource(resource)
+            raise PoolClosed("Pool is closed")
+        return resource
+
+    def release(self, resource):
+        """Give a resource back and wake up one waiter"""
+        with self._cond:
+            entry = self._resources.get(id(resource))
+            if entry is None:
+                return
+            entry[2] += 1
+
+            retire = self._closed or self._expired(resource)
+            if retire:
+                if not self._closed:
+                    self.recycled += 1
+                self._forget(resource)
+            else:
+                self._idle.append(resource)
+                self._cond.notify()
+
+        if retire:
+            self._close_resource(resource)
+
+    def discard(self, resource):
+        """Close a broken resource instead of returning it to the pool"""
+        with self._cond:
+            if id(resource) not in self._resources:
+                return
+            self.discarded += 1
+            self._forget(resource)
+        self._close_resource(resource)
+
+    @contextmanager
+    def lease(self, timeout=None):
+        resource = self.acquire(timeout)
+        try:
+            yield resource
+        finally:
+            self.release(resource)
+
+    def _forget(self, resource):
+        """Drop a resource from the books (lock held) and free its slot"""
+        self._resources.pop(id(resource), None)
+        if resource in self._idle:
+            self._idle.remove(resource)
+        self._cond.notify()
+
+    def _close_resource(self, resource):
+        if self._close:
+            try:
+                self._close(resource)
+            except Exception:
+                pass
+
+    def close_all(self):
+        """Close idle resources now; in-use ones are closed when released"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            for resource in idle:
+                self._forget(resource)
+            self._cond.notify_all()
+
+        for resource in idle:
+            self._close_resource(resource)
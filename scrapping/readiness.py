@@ -0,0 +1,140 @@
+"""Event-driven page readiness for the Selenium scrapers.
+
+Replaces fixed `time.sleep` calls with waits on DOM conditions and network
+idle. Optional waits (network idle) use timeouts learned from how long each
+condition usually takes; required waits never give up before
+REQUIRED_TIMEOUT, so a run of fast pages cannot make the next slow page
+time out and come back empty.
+Every wait is recorded against the fixed sleep it replaced, so a run can
+print how much idle time was saved.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from metrics import stage
+
+
+# Resource count and pending XHRs (jQuery, if the page uses it) in one round-trip
+_NETWORK_STATE_JS = """
+return [
+    performance.getEntriesByType('resource').length,
+    (window.jQuery && window.jQuery.active) || 0,
+    document.readyState
+];
+"""
+
+# Floor for required waits: what a page gets before it counts as not loading
+REQUIRED_TIMEOUT = 15.0
+
+
+class AdaptiveTimeout:
+    """Timeout = `factor` x the p95 of recently observed wait times, clamped"""
+
+    def __init__(self, initial=15.0, minimum=2.0, maximum=30.0, factor=3.0, window=50):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.samples = deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.samples.append(seconds)
+
+    def current(self):
+        if not self.samples:
+            return self.initial
+        ordered = sorted(self.samples)
+        p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+        return min(self.maximum, max(self.minimum, p95 * self.factor))
+
+
+class TimingReport:
+    """Waited time per condition vs. the fixed sleeps it replaced"""
+
+    def __init__(self):
+        self.waits = defaultdict(lambda: {'count': 0, 'waited': 0.0, 'budget': 0.0, 'timeouts': 0})
+        self._lock = threading.Lock()
+
+    def record(self, name, waited, budget=0.0, timed_out=False):
+        """Can be shared by parsers running in several threads"""
+        with self._lock:
+            entry = self.waits[name]
+            entry['count'] += 1
+            entry['waited'] += waited
+            entry['budget'] += budget
+            entry['timeouts'] += int(timed_out)
+
+    def idle_saved(self):
+        return sum(entry['budget'] - entry['waited'] for entry in self.waits.values())
+
+    def print_report(self):
+        print(f"\n{'wait':<24} {'count':>5} {'waited':>8} {'fixed sleep':>11} {'timeouts':>8}")
+        for name, entry in sorted(self.waits.items()):
+            print(f"{name:<24} {entry['count']:>5} {entry['waited']:>7.2f}s {entry['budget']:>10.2f}s "
+                  f"{entry['timeouts']:>8}")
+        print(f"Idle time eliminated: {self.idle_saved():.2f}s")
+
+
+class Readiness:
+    """Condition waits for one driver, with per-condition adaptive timeouts"""
+
+    def __init__(self, driver, poll=0.1, report=None):
+        self.driver = driver
+        self.poll = poll
+        self.report = report or TimingReport()
+        self.timeouts = {}
+
+    def timeout_for(self, name, initial=15.0):
+        if name not in self.timeouts:
+            self.timeouts[name] = AdaptiveTimeout(initial=initial)
+        return self.timeouts[name]
+
+    def wait(self, name, condition, budget=0.0, initial_timeout=15.0, required=True):
+        """Wait until `condition(driver)` is truthy and return its value.
+
+        budget: the fixed sleep this wait replaces, for the timing report.
+        required=False returns None on timeout instead of raising, and only
+        then is the timeout adaptive: a required wait gets at least
+        max(initial_timeout, REQUIRED_TIMEOUT) seconds.
+        """
+        timeout = self.timeout_for(name, initial_timeout)
+        seconds = timeout.current()
+        if required:
+            seconds = max(seconds, initial_timeout, REQUIRED_TIMEOUT)
+        started = time.perf_counter()
+        try:
+            with stage('wait'):
+                result = WebDriverWait(self.driver, seconds, poll_frequency=self.poll).until(condition)
+        except TimeoutException:
+            waited = time.perf_counter() - started
+            # Let slow conditions widen their own timeout next time
+            timeout.observe(waited)
+            self.report.record(name, waited, budget, timed_out=True)
+            if required:
+                raise
+            return None
+
+        waited = time.perf_counter() - started
+        timeout.observe(waited)
+        self.report.record(name, waited, budget)
+        return result
+
+    def network_idle(self, name='network_idle', idle_time=0.5, budget=0.0, initial_timeout=10.0):
+        """Wait until the document is loaded, no jQuery XHR is pending and no new
+        resources were requested for `idle_time` seconds"""
+        state = {'count': None, 'since': time.perf_counter()}
+
+        def idle(driver):
+            resources, pending, ready_state = driver.execute_script(_NETWORK_STATE_JS)
+            now = time.perf_counter()
+            if resources != state['count'] or pending or ready_state != 'complete':
+                state['count'] = resources
+                state['since'] = now
+                return False
+            return now - state['since'] >= idle_time
+
+        return self.wait(name, idle, budget, initial_timeout, required=False)
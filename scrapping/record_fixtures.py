@@ -0,0 +1,166 @@
+"""Offline HTML fixture corpus for the championat.asia parsers.
+
+fixtures/manifest.json lists every recorded page with its URL and kind
+(calendar, fixture, lineup, news, news_details); fixtures/expected/ holds
+the parser output for each calendar, match and news page. FixtureFetcher
+serves the pages by URL in place of HttpFetcher, so ChampionatParser,
+OptimizedMatchParser and MatchDetailParser run against the corpus without
+network access (see bench_parsers.py).
+
+    python record_fixtures.py --date 16/07/2025 --match 19438666 --news https://championat.asia/oz
+    python record_fixtures.py --update-expected      # after an intended parser output change
+"""
+import argparse
+import json
+import os
+from collections import Counter
+
+from http_cache import CacheMiss
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+CALENDAR_URL = "https://championat.asia/oz/game-center/calendar?sort=any&date={date}"
+FIXTURE_URL = "https://championat.asia/oz/game-center/fixture/{ext_id}"
+LINEUP_URL = "https://championat.asia/oz/game-center/fixture/lineup/load/{ext_id}"
+
+# Pages a benchmark case starts from; lineups and news details are fetched by those
+MAIN_KINDS = ('calendar', 'fixture', 'news')
+
+
+def load_manifest(directory=FIXTURES_DIR):
+    try:
+        with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)['pages']
+    except FileNotFoundError:
+        return []
+
+
+def save_manifest(pages, directory=FIXTURES_DIR):
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump({'pages': pages}, f, ensure_ascii=False, indent=2)
+
+
+class FixtureFetcher:
+    """HttpFetcher stand-in serving recorded pages; never touches the network"""
+
+    offline = True
+
+    def __init__(self, directory=FIXTURES_DIR):
+        self.directory = directory
+        self.paths = {page['url']: os.path.join(directory, page['file']) for page in load_manifest(directory)}
+        self.requests = Counter()
+        self._bodies = {}
+
+    def get(self, url):
+        if url not in self.paths:
+            raise CacheMiss(f"Not in the fixture corpus: {url}")
+        self.requests[url] += 1
+        if url not in self._bodies:
+            with open(self.paths[url], encoding='utf-8') as f:
+                self._bodies[url] = f.read()
+        return self._bodies[url]
+
+    def close(self):
+        pass
+
+
+def case_name(page):
+    return os.path.splitext(page['file'])[0]
+
+
+def case_argument(page):
+    return {'calendar': page.get('date'), 'fixture': page.get('ext_id'), 'news': page['url']}[page['kind']]
+
+
+def case_runner(kind, fetcher):
+    """The parser call a corpus page of `kind` is benchmarked with"""
+    if kind == 'calendar':
+        from futbol_match import OptimizedMatchParser
+        return OptimizedMatchParser(fetcher=fetcher).fetch_games
+    if kind == 'fixture':
+        from futbol_match_details import MatchDetailParser
+        return MatchDetailParser(engine='http', fetcher=fetcher).parse_match
+    if kind == 'news':
+        from futbool_news import ChampionatParser
+        return ChampionatParser(fetcher=fetcher).get_news
+    raise ValueError(f"No parser for {kind!r} pages")
+
+
+def main_pages(pages):
+    return [page for page in pages if page['kind'] in MAIN_KINDS]
+
+
+def expected_path(page, directory=FIXTURES_DIR):
+    return os.path.join(directory, 'expected', case_name(page) + '.json')
+
+
+def normalize(result):
+    """Parser output as it reads back from JSON (tuples -> lists)"""
+    return json.loads(json.dumps(result, ensure_ascii=False))
+
+
+def update_expected(directory=FIXTURES_DIR):
+    fetcher = FixtureFetcher(directory)
+    os.makedirs(os.path.join(directory, 'expected'), exist_ok=True)
+    for page in main_pages(load_manifest(directory)):
+        result = case_runner(page['kind'], fetcher)(case_argument(page))
+        with open(expected_path(page, directory), 'w', encoding='utf-8') as f:
+            json.dump(normalize(result), f, ensure_ascii=False, indent=2)
+        print(f"{expected_path(page, directory)} updated")
+
+
+def record(dates=(), ext_ids=(), news_urls=(), directory=FIXTURES_DIR):
+    """Fetch pages live and add them to the corpus (replacing older recordings of the same URL)"""
+    from datetime import datetime
+
+    from fetchers import HttpFetcher
+    from html_parsers import parse_news_page
+
+    pages = {page['url']: page for page in load_manifest(directory)}
+
+    with HttpFetcher() as fetcher:
+        def save(filename, url, **meta):
+            body = fetcher.get(url)
+            with open(os.path.join(directory, filename), 'w', encoding='utf-8') as f:
+                f.write(body)
+            pages[url] = dict(meta, url=url, file=filename)
+            print(f"{url} -> {filename}")
+            return body
+
+        for date in dates:
+            iso_date = datetime.strptime(date, "%d/%m/%Y").strftime("%Y-%m-%d")
+            save(f'calendar_{iso_date}.html', CALENDAR_URL.format(date=iso_date), kind='calendar', date=date)
+
+        for ext_id in ext_ids:
+            save(f'fixture_{ext_id}.html', FIXTURE_URL.format(ext_id=ext_id), kind='fixture', ext_id=ext_id)
+            save(f'lineup_{ext_id}.html', LINEUP_URL.format(ext_id=ext_id), kind='lineup', ext_id=ext_id)
+
+        for i, url in enumerate(news_urls):
+            body = save('news.html' if i == 0 else f'news_{i + 1}.html', url, kind='news')
+            for _, detail_url in parse_news_page(body) or []:
+                if detail_url:
+                    slug = detail_url.rstrip('/').split('/')[-2]
+                    save(f'news_details_{slug}.html', detail_url, kind='news_details')
+
+    save_manifest(sorted(pages.values(), key=lambda page: (MAIN_KINDS + ('lineup', 'news_details')).index(page['kind'])),
+                  directory)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Record the offline fixture corpus")
+    arg_parser.add_argument('--date', action='append', default=[], help="calendar day DD/MM/YYYY (repeatable)")
+    arg_parser.add_argument('--match', action='append', default=[], help="fixture ext_id (repeatable)")
+    arg_parser.add_argument('--news', action='append', default=[], help="news list URL (repeatable)")
+    arg_parser.add_argument('--update-expected', action='store_true',
+                            help="re-run the parsers on the corpus and rewrite fixtures/expected/")
+    arg_parser.add_argument('-d', '--directory', default=FIXTURES_DIR)
+    args = arg_parser.parse_args(argv)
+
+    if args.date or args.match or args.news:
+        record(args.date, args.match, args.news, args.directory)
+    if args.update_expected or args.date or args.match or args.news:
+        update_expected(args.directory)
+
+
+if __name__ == '__main__':
+    main()
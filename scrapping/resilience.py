@@ -0,0 +1,347 @@
+"""Retries, adaptive rate limiting and circuit breaking for championat.asia requests.
+
+Resilience wraps a single request function, keyed by host:
+
+- RetryPolicy: capped exponential backoff with full jitter. A Retry-After
+  header from the server is honoured.
+- AdaptiveRateLimiter: a token bucket whose rate grows a little after
+  every success, up to max_rate. Every 429, 5xx or timeout halves it,
+  down to min_rate (AIMD). A Retry-After pauses the host entirely.
+- CircuitBreaker: after `failure_threshold` transient failures in a row
+  the host is failed fast with CircuitOpen for `reset_timeout` seconds.
+  One probe request is then let through; it closes or re-opens the circuit.
+
+Only transient failures are retried and counted: timeouts (Selenium page
+load timeouts included), connection errors, 429 and 5xx. Any other HTTP
+error (404, ...) is raised at once and counts as the host answering; any
+other exception (a driver error, a parse error) is raised at once without
+telling the breaker anything about the host.
+
+    resilience = Resilience(rate=5.0)
+    html = resilience.call(url, lambda: session.get(url, timeout=15))
+    html = await resilience.call_async(url, lambda: fetch(url))
+
+HttpFetcher and AsyncCalendarClient use one by default. The Selenium
+scrapers send `driver.get` through the same instance, so a host whose
+circuit is open is not hit by the browser either.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+
+logger = logging.getLogger(__name__)
+
+# Not OSError: FileNotFoundError, PermissionError, ... do not go away by retrying
+TRANSIENT_EXCEPTIONS = (TimeoutError, ConnectionError)
+try:
+    import requests
+except ImportError:
+    pass
+else:
+    TRANSIENT_EXCEPTIONS += (requests.Timeout, requests.ConnectionError)
+try:
+    import aiohttp
+except ImportError:
+    pass
+else:
+    TRANSIENT_EXCEPTIONS += (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)
+try:
+    from selenium.common.exceptions import TimeoutException as SeleniumTimeout
+except ImportError:
+    pass
+else:
+    # driver.get() past the page load timeout; not a TimeoutError subclass
+    TRANSIENT_EXCEPTIONS += (SeleniumTimeout,)
+
+
+class CircuitOpen(Exception):
+    """The host failed too often; raised without making the request"""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"Circuit open for {host}, retry in {retry_in:.1f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def http_status(exc):
+    """HTTP status of a requests/aiohttp error, None for non-HTTP errors"""
+    status = getattr(exc, 'status', None)
+    if isinstance(status, int):
+        return status
+    response = getattr(exc, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+def retry_after(exc):
+    """Seconds from the Retry-After header of a failed response, if any"""
+    headers = getattr(exc, 'headers', None)
+    if headers is None:
+        headers = getattr(getattr(exc, 'response', None), 'headers', None)
+    value = headers.get('Retry-After') if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """`attempts` tries in total; before try n+1 sleep uniform(0, min(cap, base * 2**n))"""
+
+    def __init__(self, attempts=3, base=0.5, cap=30.0):
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.cap))
+        return delay
+
+    def sleep(self, attempt, retry_after=None):
+        time.sleep(self.delay(attempt, retry_after))
+
+
+class AdaptiveRateLimiter:
+    """Token bucket of `burst` tokens refilled at `rate` per second; the rate adapts (AIMD)"""
+
+    def __init__(self, rate=5.0, min_rate=0.5, max_rate=20.0, burst=1, increase=0.1, decrease=0.5):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token; returns how long to wait before using it.
+
+        The bucket may go negative, so concurrent callers queue up behind
+        each other instead of all waking up at once.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate, self._paused_until - now)
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, pause=None):
+        """429/5xx/timeout: back off multiplicatively, pausing for `pause` seconds if given"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            if pause:
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, name='', failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpen unless a request may go out now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                retry_in = self._opened_at + self.reset_timeout - now
+                if retry_in > 0:
+                    raise CircuitOpen(self.name, retry_in)
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self._probing:
+                # One probe at a time while half-open
+                raise CircuitOpen(self.name, self.reset_timeout)
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuit for %s closed", self.name)
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def release(self):
+        """The call said nothing about the host: let the next probe through, state unchanged"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                if self.state == self.CLOSED:
+                    logger.warning("Circuit for %s opened after %d failures", self.name, self.failures)
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class HostGuard:
+    """Rate limiter and circuit breaker of one host"""
+
+    def __init__(self, limiter, breaker):
+        self.limiter = limiter
+        self.breaker = breaker
+
+
+class Resilience:
+    def __init__(self, retry=None, rate=5.0, min_rate=0.5, max_rate=20.0, failure_threshold=5,
+                 reset_timeout=30.0, transient=TRANSIENT_EXCEPTIONS):
+        """
+        retry: RetryPolicy (default: 3 attempts); RetryPolicy(attempts=1) disables retries
+        rate: starting requests/sec per host; None disables rate limiting
+        failure_threshold: consecutive transient failures that open a host's circuit; None disables it
+        transient: exception types retried besides HTTP 429/5xx
+        """
+        self.retry = retry or RetryPolicy()
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.transient = tuple(transient)
+        self.stats = Counter()
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def host(self, url):
+        host = urlsplit(url).netloc or url
+        with self._lock:
+            guard = self._hosts.get(host)
+            if guard is None:
+                limiter = AdaptiveRateLimiter(self.rate, self.min_rate, self.max_rate) if self.rate else None
+                breaker = (CircuitBreaker(host, self.failure_threshold, self.reset_timeout)
+                           if self.failure_threshold else None)
+                guard = self._hosts[host] = HostGuard(limiter, breaker)
+            return guard
+
+    def is_transient(self, exc):
+        status = http_status(exc)
+        if status is not None:
+            return status == 429 or status >= 500
+        return isinstance(exc, self.transient)
+
+    def _before(self, guard):
+        if guard.breaker is not None:
+            try:
+                guard.breaker.before_call()
+            except CircuitOpen:
+                self.stats['short_circuited'] += 1
+                raise
+
+    def _succeeded(self, guard):
+        self.stats['requests'] += 1
+        if guard.limiter is not None:
+            guard.limiter.on_success()
+        if guard.breaker is not None:
+            guard.breaker.record_success()
+
+    def _failed(self, guard, url, exc, attempt):
+        """Seconds to wait before the next attempt; re-raises when `exc` is final"""
+        self.stats['requests'] += 1
+        if not self.is_transient(exc):
+            if guard.breaker is not None:
+                if http_status(exc) is not None:
+                    # The host answered, it just was not what we wanted (404, ...)
+                    guard.breaker.record_success()
+                else:
+                    guard.breaker.release()
+            raise exc
+
+        pause = retry_after(exc)
+        self.stats['throttled' if http_status(exc) == 429 else 'transient_errors'] += 1
+        if guard.limiter is not None:
+            guard.limiter.on_throttle(pause)
+        if guard.breaker is not None:
+            guard.breaker.record_failure()
+
+        if attempt + 1 >= self.retry.attempts:
+            self.stats['gave_up'] += 1
+            raise exc
+        delay = self.retry.delay(attempt, pause)
+        self.stats['retries'] += 1
+        logger.warning("%s: attempt %d failed (%s), retrying in %.1fs", url, attempt + 1, exc, delay)
+        return delay
+
+    def call(self, url, request):
+        """request() with rate limiting, retries and the host's circuit breaker"""
+        guard = self.host(url)
+        for attempt in range(self.retry.attempts):
+            self._before(guard)
+            if guard.limiter is not None:
+                guard.limiter.acquire()
+            try:
+                result = request()
+            except Exception as e:
+                time.sleep(self._failed(guard, url, e, attempt))
+                continue
+            self._succeeded(guard)
+            return result
+
+    async def call_async(self, url, request):
+        """Like call(), for a coroutine function `request`"""
+        guard = self.host(url)
+        for attempt in range(self.retry.attempts):
+            self._before(guard)
+            if guard.limiter is not None:
+                await guard.limiter.acquire_async()
+            try:
+                result = await request()
+            except Exception as e:
+                await asyncio.sleep(self._failed(guard, url, e, attempt))
+                continue
+            self._succeeded(guard)
+            return result
+
+    def summary(self):
+        hosts = {}
+        with self._lock:
+            guards = dict(self._hosts)
+        for host, guard in guards.items():
+            hosts[host] = {
+                'rate': round(guard.limiter.rate, 2) if guard.limiter else None,
+                'circuit': guard.breaker.state if guard.breaker else None,
+            }
+        return dict(self.stats, hosts=hosts)
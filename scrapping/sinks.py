@@ -0,0 +1,185 @@
+"""Streaming JSON Lines output shared by the scrapers.
+
+Each record is written as soon as it is scraped, so a crash loses at most
+the records since the last fsync instead of the whole run.
+
+Without rotation records are appended to `path` itself. With rotation
+(by size and/or by day) each chunk is written to `<chunk>.part` and
+renamed to its final name only when it is complete, so readers never see
+half-written files:
+
+    news.jsonl -> news-20250716-0001.jsonl.gz, news-20250716-0002.jsonl.gz, ...
+"""
+import gzip
+import io
+import json
+import os
+import threading
+from datetime import datetime
+
+from metrics import stage
+
+try:
+    import zstandard
+except ImportError:  # zstd compression is optional
+    zstandard = None
+
+
+COMPRESSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+class JsonLinesSink:
+    def __init__(self, path, rotate_bytes=None, rotate_daily=False, compress=None, fsync_every=100):
+        if compress not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compress!r}, expected one of {list(COMPRESSIONS)}")
+        if compress == 'zstd' and zstandard is None:
+            raise RuntimeError("zstd compression needs the `zstandard` package")
+
+        self.path = path
+        self.rotate_bytes = rotate_bytes
+        self.rotate_daily = rotate_daily
+        self.compress = compress
+        self.fsync_every = fsync_every
+        self.records = 0
+        self.files = []
+
+        self._lock = threading.Lock()
+        self._raw = None
+        self._stream = None
+        self._part_path = None
+        self._final_path = None
+        self._day = None
+        self._chunk = 0
+        self._bytes = 0
+        self._unsynced = 0
+
+    @property
+    def rotating(self):
+        return bool(self.rotate_bytes or self.rotate_daily)
+
+    def _chunk_path(self, day):
+        base, ext = os.path.splitext(self.path)
+        ext = ext or '.jsonl'
+        while True:
+            self._chunk += 1
+            candidate = f"{base}-{day}-{self._chunk:04d}{ext}{COMPRESSIONS[self.compress]}"
+            if not os.path.exists(candidate):
+                return candidate
+
+    def _open(self):
+        day = datetime.now().strftime("%Y%m%d")
+        if self.rotating:
+            self._final_path = self._chunk_path(day)
+            self._part_path = self._final_path + '.part'
+            self._raw = open(self._part_path, 'wb')
+        else:
+            self._final_path = self.path + COMPRESSIONS[self.compress]
+            self._part_path = None
+            self._raw = open(self._final_path, 'ab')
+
+        if self.compress == 'gzip':
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='wb')
+        elif self.compress == 'zstd':
+            self._stream = zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+
+        self._day = day
+        self._bytes = 0
+
+    def _sync(self):
+        if self._stream is not self._raw:
+            self._stream.flush()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._unsynced = 0
+
+    def _finish(self):
+        """Close the current file and publish it under its final name"""
+        if self._raw is None:
+            return
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+        if self._part_path:
+            os.replace(self._part_path, self._final_path)
+        if self._final_path not in self.files:
+            self.files.append(self._final_path)
+        self._raw = self._stream = None
+        self._unsynced = 0
+
+    def _needs_rotation(self):
+        if self.rotate_bytes and self._bytes >= self.rotate_bytes:
+            return True
+        return self.rotate_daily and datetime.now().strftime("%Y%m%d") != self._day
+
+    def write(self, record):
+        with stage('serialization'):
+            self._write(record)
+
+    def _write(self, record):
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            if self._raw is not None and self.rotating and self._needs_rotation():
+                self._finish()
+            if self._raw is None:
+                self._open()
+
+            self._stream.write(line)
+            self._bytes += len(line)
+            self.records += 1
+            self._unsynced += 1
+            if self.fsync_every and self._unsynced >= self.fsync_every:
+                self._sync()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def close(self):
+        with self._lock:
+            self._finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def add_sink_arguments(arg_parser):
+    """--rotate-mb / --rotate-daily / --compress / --fsync-every options for a CLI"""
+    arg_parser.add_argument('--rotate-mb', type=float, help="start a new output file after this many MB")
+    arg_parser.add_argument('--rotate-daily', action='store_true', help="start a new output file every day")
+    arg_parser.add_argument('--compress', choices=[c for c in COMPRESSIONS if c], help="compress output files")
+    arg_parser.add_argument('--fsync-every', type=int, default=100, help="fsync after this many records")
+
+
+def sink_from_args(path, args):
+    return JsonLinesSink(
+        path,
+        rotate_bytes=int(args.rotate_mb * 1024 * 1024) if args.rotate_mb else None,
+        rotate_daily=args.rotate_daily,
+        compress=args.compress,
+        fsync_every=args.fsync_every,
+    )
+
+
+def read_json_lines(path):
+    """Iterate the records of a (possibly compressed) JSON Lines file"""
+    if path.endswith('.gz'):
+        f = gzip.open(path, 'rt', encoding='utf-8')
+    elif path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("Reading .zst files needs the `zstandard` package")
+        f = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True),
+                             encoding='utf-8')
+    else:
+        f = open(path, encoding='utf-8')
+
+    with f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
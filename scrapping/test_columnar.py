@@ -0,0 +1,54 @@
+"""columnar: a match exported again replaces its earlier rows in reads.
+
+    pytest test_columnar.py
+"""
+import datetime
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from columnar import ColumnarSink, goals_by_player, read_table
+
+
+def match(goals):
+    return {
+        'ext_id': '19438666',
+        'events': [{'minute': str(10 * i + 5), 'event_type': 'goal', 'team_side': 'home',
+                    'player_name': 'Dostonbek Erkinov'} for i in range(goals)],
+        'home_team': {'starting_lineup': [{'player_name': 'Dostonbek Erkinov', 'shirt_number': '9'}]},
+        'away_team': {},
+    }
+
+
+GAME = {
+    'id': 'game_1', 'date': '2025-07-16', 'tournament': 'Superliga', 'time': '19:00',
+    'home_team': 'Paxtakor', 'away_team': 'Navbahor', 'score': '1 : 0', 'status': {'type': 'live'},
+    'link': 'https://championat.asia/oz/game-center/fixture/19438666',
+}
+
+
+def test_reexported_match_is_counted_once(tmp_path):
+    with ColumnarSink(tmp_path) as sink:
+        sink.write(GAME)
+        sink.write(match(goals=1))
+    # A live match fetched again later, in another run
+    with ColumnarSink(tmp_path) as sink:
+        sink.write(dict(GAME, score='2 : 0', status={'type': 'finished'}))
+        sink.write(match(goals=2))
+
+    goals, = goals_by_player(tmp_path).to_pylist()
+    assert goals == {'player_name': 'Dostonbek Erkinov', 'goals': 2, 'matches': 1}
+    assert read_table(tmp_path, 'lineups').num_rows == 1
+    games = read_table(tmp_path, 'games', columns=['date', 'home_score', 'status']).to_pylist()
+    assert games == [{'date': datetime.date(2025, 7, 16), 'home_score': 2, 'status': 'finished'}]
+    assert read_table(tmp_path, 'events', latest=False).num_rows == 3
+
+
+def test_reexport_without_events_hides_earlier_events(tmp_path):
+    with ColumnarSink(tmp_path) as sink:
+        sink.write(match(goals=1))
+        sink.write(match(goals=0))
+
+    assert read_table(tmp_path, 'events').num_rows == 0
+    assert read_table(tmp_path, 'lineups').num_rows == 1
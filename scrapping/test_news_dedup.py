@@ -0,0 +1,52 @@
+"""news_dedup on teasers: a lightly edited re-post is a near-duplicate, another story is not.
+
+    pytest test_news_dedup.py
+"""
+import pytest
+
+from news_dedup import NewsDedup, hamming, simhash, stage_text
+
+
+TEASER = {
+    'title': "Nega Eron klublari yoppasiga o'zbekistonlik futbolchilarni olmoqda? Hamma gap FIFA beradigan puldami?",
+    'summary': "Yozgi transfer oynasi vaqtida ikkita xabardan bittasi \"o'zbekistonlik futbolchi Eronga ketmoqda\" "
+               "degan sarlavha bilan boshlanmoqda.",
+    'url': 'https://championat.asia/uz/news/eron-klublari',
+}
+# The same story re-posted with a reworded title and teaser
+EDITED_TEASER = {
+    'title': "Nima uchun Eron klublari yoppasiga o'zbekistonlik futbolchilarni olmoqda? Hamma gap FIFA beradigan "
+             "puldami?",
+    'summary': "Yozgi transfer oynasi davomida ikkita xabardan bittasi \"o'zbekistonlik futbolchi Eronga ketmoqda\" "
+               "degan sarlavha bilan boshlanyapti.",
+    'url': 'https://championat.asia/uz/news/eron-klublari-2',
+}
+OTHER_TEASER = {
+    'title': "Paxtakor Navbahorni mag'lub etib, Superliga peshqadamligini saqlab qoldi",
+    'summary': "Superliganing 12-turida Paxtakor Namanganda Navbahor bilan o'ynadi va ikkinchi bo'limda "
+               "urilgan gol hisobiga g'alaba qozondi.",
+    'url': 'https://championat.asia/uz/news/paxtakor-navbahor',
+}
+
+
+@pytest.fixture
+def dedup():
+    index = NewsDedup(':memory:')
+    yield index
+    index.close()
+
+
+def test_edited_teaser_is_near_duplicate(dedup):
+    # Too far apart for the SimHash distance the content stage uses
+    assert hamming(simhash(stage_text(TEASER, 'summary')), simhash(stage_text(EDITED_TEASER, 'summary'))) > 3
+
+    assert not dedup.is_duplicate(TEASER)
+    assert dedup.find(EDITED_TEASER, 'summary') == 'https://championat.asia/uz/news/eron-klublari'
+    assert dedup.stats['near'] == 1
+
+
+def test_other_teaser_is_not_duplicate(dedup):
+    assert not dedup.is_duplicate(TEASER)
+    assert not dedup.is_duplicate(OTHER_TEASER)
+    assert dedup.is_duplicate(TEASER)
+    assert dedup.stats['exact'] == 1